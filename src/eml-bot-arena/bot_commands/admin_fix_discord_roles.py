@@ -22,6 +22,16 @@ async def admin_fix_discord_roles(
         #######################################################################
         #                               RECORDS                               #
         #######################################################################
+        # Read the latest data, not a cached copy
+        await database.core_database.prefetch_tables(
+            [
+                database.table_player.table_name,
+                database.table_team.table_name,
+                database.table_team_player.table_name,
+                database.table_suspension.table_name,
+                database.table_cooldown.table_name,
+            ]
+        )
         # Player
         player_records = await database.table_player.get_player_records()
         # Team
@@ -190,6 +190,8 @@ async def admin_manual_match_entry(
                 scores=scores,
             )
             assert match_record, f"Error: Failed to create match record."
+        # Make sure the result is saved before confirming it
+        await database.core_database.flush()
 
         #######################################################################
         #                              RESPONSE                               #
@@ -88,71 +88,102 @@ async def admin_suspend_player(
         else:
             player_name = None
 
-        # Delete Existing Suspension
-        if their_existing_suspension_record:
-            await database.table_suspension.delete_suspension_record(
-                their_existing_suspension_record
-            )
-        # Create New Suspension
-        new_suspension_record = (
-            await database.table_suspension.create_suspension_record(
-                player_id=player_id,
-                player_name=player_name,
-                reason=reason,
-                expiration=expiration_days,
-            )
+        # Disband "Their" Team (if captain)
+        is_captain = (
+            their_teamplayer_record
+            and await their_teamplayer_record.get_field(TeamPlayerFields.is_captain)
         )
-        assert new_suspension_record, f"Error: Failed to create suspension record."
+        teammate_teamplayers = []
+        if is_captain:
+            their_player_id = await their_teamplayer_record.get_field(
+                TeamPlayerFields.player_id
+            )
+            for teammate_teamplayer in theirteam_teamplayers:
+                teammate_player_id = await teammate_teamplayer.get_field(
+                    TeamPlayerFields.player_id
+                )
+                if teammate_player_id != their_player_id:
+                    teammate_teamplayers.append(teammate_teamplayer)
 
-        # Delete "Their" TeamPlayer
-        if their_teamplayer_record:
-            await database.table_team_player.delete_team_player_record(
-                their_teamplayer_record
+        # Save all the changes together, or none of them
+        async with database.transaction():
+            # Delete Existing Suspension
+            if their_existing_suspension_record:
+                await database.table_suspension.delete_suspension_record(
+                    their_existing_suspension_record
+                )
+            # Create New Suspension
+            new_suspension_record = (
+                await database.table_suspension.create_suspension_record(
+                    player_id=player_id,
+                    player_name=player_name,
+                    reason=reason,
+                    expiration=expiration_days,
+                )
             )
-        # Delete "Their" Player
-        if their_player_record:
-            await database.table_player.delete_player_record(their_player_record)
-        # Remove All "Their" Discord League Roles
-        if discord_member:
-            await discord_helpers.member_remove_all_league_roles(member=discord_member)
+            assert new_suspension_record, f"Error: Failed to create suspension record."
 
-        # Disband "Their" Team (if captain)
-        if their_teamplayer_record:
-            if await their_teamplayer_record.get_field(TeamPlayerFields.is_captain):
-                # "TheirTeam" TeamPlayers
-                their_player_id = await their_teamplayer_record.get_field(
-                    TeamPlayerFields.player_id
+            # Delete "Their" TeamPlayer
+            if their_teamplayer_record:
+                await database.table_team_player.delete_team_player_record(
+                    their_teamplayer_record
                 )
-                for teammate_teamplayer in theirteam_teamplayers:
-                    teammate_player_id = await teammate_teamplayer.get_field(
-                        TeamPlayerFields.player_id
-                    )
-                    if teammate_player_id == their_player_id:
-                        continue
-                    # Delete TeamPlayer
+            # Delete "Their" Player
+            if their_player_record:
+                await database.table_player.delete_player_record(their_player_record)
+
+            # Delete "TheirTeam" TeamPlayers and Team
+            if is_captain:
+                for teammate_teamplayer in teammate_teamplayers:
                     await database.table_team_player.delete_team_player_record(
                         teammate_teamplayer
                     )
-                    # Remove Discord Team Roles
-                    await discord_helpers.member_remove_team_roles(
-                        member=await discord_helpers.member_from_discord_id(
-                            guild=interaction.guild,
-                            discord_id=await teammate_teamplayer.get_field(
-                                TeamPlayerFields.player_id
-                            ),
-                        ),
-                    )
-                # Team
                 if their_team_record:
-                    # Delete Team Record
                     await database.table_team.delete_team_record(their_team_record)
-                    # Remove Discord Guild Team Role
-                    await discord_helpers.guild_remove_team_role(
-                        guild=interaction.guild,
-                        team_name=await their_team_record.get_field(
-                            TeamFields.team_name
-                        ),
+
+        # Discord roles are changed once the records are saved; a failure here
+        # is logged, and doesn't stop the other role changes
+        # Remove All "Their" Discord League Roles
+        if discord_member:
+            try:
+                await discord_helpers.member_remove_all_league_roles(
+                    member=discord_member
+                )
+            except Exception as error:
+                logger.exception(error)
+        # Remove "TheirTeam" Discord Team Roles
+        for teammate_teamplayer in teammate_teamplayers:
+            try:
+                teammate_player_records = (
+                    await database.table_player.get_player_records(
+                        record_id=await teammate_teamplayer.get_field(
+                            TeamPlayerFields.player_id
+                        )
+                    )
+                )
+                if not teammate_player_records:
+                    continue
+                teammate_member = await discord_helpers.member_from_discord_id(
+                    guild=interaction.guild,
+                    discord_id=await teammate_player_records[0].get_field(
+                        PlayerFields.discord_id
+                    ),
+                )
+                if teammate_member:
+                    await discord_helpers.member_remove_team_roles(
+                        member=teammate_member
                     )
+            except Exception as error:
+                logger.exception(error)
+        # Remove Discord Guild Team Role
+        if is_captain and their_team_record:
+            try:
+                await discord_helpers.guild_remove_team_role(
+                    guild=interaction.guild,
+                    team_name=await their_team_record.get_field(TeamFields.team_name),
+                )
+            except Exception as error:
+                logger.exception(error)
 
         #######################################################################
         #                              RESPONSE                               #
@@ -163,48 +163,55 @@ async def match_result_accept(
         #                             PROCESSING                              #
         #######################################################################
 
-        # Update Match Result Invite
-        await selected_invite.set_field(
-            ResultFields.invite_status, InviteStatus.ACCEPTED
-        )
-        await selected_invite.set_field(
-            ResultFields.to_player_id,
-            await to_player_record.get_field(PlayerFields.record_id),
-        )
-        from_team_id = await selected_invite.get_field(ResultFields.from_team_id)
-        to_team_id = await selected_invite.get_field(ResultFields.to_team_id)
-        assert from_team_id != to_team_id, f"Cannot accept your own invites."
-        await database.table_match_result_invite.update_match_result_invite_record(
-            selected_invite
-        )
+        # Save all the changes together, or none of them
+        async with database.transaction():
+            # Update Match Result Invite
+            await selected_invite.set_field(
+                ResultFields.invite_status, InviteStatus.ACCEPTED
+            )
+            await selected_invite.set_field(
+                ResultFields.to_player_id,
+                await to_player_record.get_field(PlayerFields.record_id),
+            )
+            from_team_id = await selected_invite.get_field(ResultFields.from_team_id)
+            to_team_id = await selected_invite.get_field(ResultFields.to_team_id)
+            assert from_team_id != to_team_id, f"Cannot accept your own invites."
+            await database.table_match_result_invite.update_match_result_invite_record(
+                selected_invite
+            )
 
-        # Get Match
-        match_records = await database.table_match.get_match_records(
-            record_id=await selected_invite.get_field(ResultFields.match_id)
-        )
-        assert match_records, f"Error: Failed to find match record."
-        match_record = match_records[0]
+            # Get Match
+            match_records = await database.table_match.get_match_records(
+                record_id=await selected_invite.get_field(ResultFields.match_id)
+            )
+            assert match_records, f"Error: Failed to find match record."
+            match_record = match_records[0]
 
-        # Get Scores
-        scores = await selected_invite.get_scores()
-        outcome = await selected_invite.get_field(ResultFields.match_outcome)
-        from_team_id = await selected_invite.get_field(ResultFields.from_team_id)
-        team_a_id = await match_record.get_field(MatchFields.team_a_id)
-        if team_a_id != from_team_id:
-            scores = await match_helpers.get_reversed_scores(scores)
-            outcome = await match_helpers.get_reversed_outcome(outcome)
+            # Get Scores
+            scores = await selected_invite.get_scores()
+            outcome = await selected_invite.get_field(ResultFields.match_outcome)
+            from_team_id = await selected_invite.get_field(ResultFields.from_team_id)
+            team_a_id = await match_record.get_field(MatchFields.team_a_id)
+            if team_a_id != from_team_id:
+                scores = await match_helpers.get_reversed_scores(scores)
+                outcome = await match_helpers.get_reversed_outcome(outcome)
+
+            # Update Match
+            await match_record.set_field(
+                MatchFields.match_status, MatchStatus.COMPLETED
+            )
+            await match_record.set_scores(scores)
+            await match_record.set_field(MatchFields.outcome, outcome)
+            match_record = MatchRecord(await match_record.to_list())  # normalize
+            await database.table_match.update_match_record(match_record)
 
-        # Update Match
-        await match_record.set_field(MatchFields.match_status, MatchStatus.COMPLETED)
-        await match_record.set_scores(scores)
-        await match_record.set_field(MatchFields.outcome, outcome)
-        match_record = MatchRecord(await match_record.to_list())  # normalize
-        await database.table_match.update_match_record(match_record)
+            # Delete Match Result Invite
+            await database.table_match_result_invite.delete_match_result_invite_record(
+                selected_invite
+            )
 
-        # Delete Match Result Invite
-        await database.table_match_result_invite.delete_match_result_invite_record(
-            selected_invite
-        )
+        # Make sure the result is saved before confirming it
+        await database.core_database.flush()
 
         # Get team "A" Player Records
         team_a_teamplayer_records = (
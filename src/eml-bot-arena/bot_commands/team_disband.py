@@ -68,38 +68,59 @@ async def team_disband(
         #                             PROCESSING                              #
         #######################################################################
 
-        # Remove Discord roles
-        for player in our_player_records:
-            member = await discord_helpers.member_from_discord_id(
-                guild=interaction.guild,
-                discord_id=await player.get_field(PlayerFields.discord_id),
-            )
-            await discord_helpers.member_remove_team_roles(member)
-        await discord_helpers.guild_remove_team_role(
-            guild=interaction.guild,
-            team_name=await our_team.get_field(TeamFields.team_name),
-        )
+        # Save all the changes together, or none of them
+        async with database.transaction():
+            # Delete "Our" TeamPlayer
+            for teamplayer in our_teamplayer_records:
+                # Create Cooldown
+                new_cooldown_record = (
+                    await database.table_cooldown.create_cooldown_record(
+                        player_id=await teamplayer.get_field(
+                            TeamPlayerFields.player_id
+                        ),
+                        old_team_id=await teamplayer.get_field(
+                            TeamPlayerFields.team_id
+                        ),
+                        player_name=await teamplayer.get_field(
+                            TeamPlayerFields.vw_player
+                        ),
+                        old_team_name=await our_team.get_field(TeamFields.team_name),
+                    )
+                )
+                assert new_cooldown_record, "Error: Failed to create cooldowns."
+                # Delete TeamPlayer
+                await database.table_team_player.delete_team_player_record(teamplayer)
 
-        # Delete "Our" TeamPlayer
-        for teamplayer in our_teamplayer_records:
-            # Create Cooldown
-            new_cooldown_record = await database.table_cooldown.create_cooldown_record(
-                player_id=await teamplayer.get_field(TeamPlayerFields.player_id),
-                old_team_id=await teamplayer.get_field(TeamPlayerFields.team_id),
-                player_name=await teamplayer.get_field(TeamPlayerFields.vw_player),
-                old_team_name=await our_team.get_field(TeamFields.team_name),
-            )
-            assert new_cooldown_record, "Error: Failed to create cooldowns."
-            # Delete TeamPlayer
-            await database.table_team_player.delete_team_player_record(teamplayer)
+            # Delete "Our" Team
+            await database.table_team.delete_team_record(our_team)
 
-        # Delete "Our" Team
-        await database.table_team.delete_team_record(our_team)
+            # Update roster view
+            await database_helpers.update_roster_view(
+                database=database,
+                team_id=await our_team.get_field(TeamFields.record_id),
+            )
 
-        # Update roster view
-        await database_helpers.update_roster_view(
-            database=database, team_id=await our_team.get_field(TeamFields.record_id)
-        )
+        # Discord roles are changed once the records are saved; a failure here
+        # is logged, and doesn't stop the other role changes
+        # Remove "Our" Discord Team Roles
+        for player in our_player_records:
+            try:
+                member = await discord_helpers.member_from_discord_id(
+                    guild=interaction.guild,
+                    discord_id=await player.get_field(PlayerFields.discord_id),
+                )
+                if member:
+                    await discord_helpers.member_remove_team_roles(member)
+            except Exception as error:
+                logger.exception(error)
+        # Remove Discord Guild Team Role
+        try:
+            await discord_helpers.guild_remove_team_role(
+                guild=interaction.guild,
+                team_name=await our_team.get_field(TeamFields.team_name),
+            )
+        except Exception as error:
+            logger.exception(error)
 
         #######################################################################
         #                              RESPONSE                               #
@@ -74,9 +74,35 @@ INVITES_TO_SUB_SEND_MAX = 5
 INVITES_TO_TEAM_EXPIRATION_DAYS = 7
 INVITES_TO_TEAM_RECEIVE_MAX = 5
 INVITES_TO_TEAM_SEND_MAX = 5
+LEAGUE_DB_APPEND_BUFFER_MAX_ROWS = 50
+LEAGUE_DB_APPEND_BUFFER_SECONDS = 10
+LEAGUE_DB_CACHE_DURATION_FAST_SECONDS = 60
 LEAGUE_DB_CACHE_DURATION_SECONDS = 300
-LEAGUE_DB_QUEUE_WRITE_DELAY_SECONDS = 0
+LEAGUE_DB_CACHE_DURATION_SLOW_SECONDS = 3600
+LEAGUE_DB_CACHE_MAX_STALENESS_FAST_SECONDS = 180
+LEAGUE_DB_CACHE_MAX_STALENESS_SECONDS = 900
+LEAGUE_DB_CACHE_MAX_STALENESS_SLOW_SECONDS = 10800
+LEAGUE_DB_COMPACTION_HOUR_UTC = 9  # quiet hours in both NA and EU
+LEAGUE_DB_EXECUTOR_MAX_WORKERS = 4
+LEAGUE_DB_EXPIRY_SWEEP_INTERVAL_SECONDS = 300
+LEAGUE_DB_HISTORY_ARCHIVE_DAYS = 90  # 0 to keep all history in the spreadsheet
+LEAGUE_DB_HISTORY_ARCHIVE_INTERVAL_SECONDS = 86400
+LEAGUE_DB_HTTP_KEEPALIVE_SECONDS = 60
+LEAGUE_DB_HTTP_MAX_CONNECTIONS = 8
+LEAGUE_DB_MATCH_WINDOW_AFTER_SECONDS = 10800
+LEAGUE_DB_MATCH_WINDOW_BEFORE_SECONDS = 3600
+LEAGUE_DB_MATCH_WINDOW_CHECK_INTERVAL_SECONDS = 300
+LEAGUE_DB_PREFETCH_INTERVAL_SECONDS = 0  # 0 to only prefetch at startup
+LEAGUE_DB_QUEUE_RETRY_DELAY_SECONDS = 5
+LEAGUE_DB_QUOTA_BACKOFF_BASE_SECONDS = 2
+LEAGUE_DB_QUOTA_BACKOFF_MAX_SECONDS = 32
+LEAGUE_DB_QUOTA_MAX_RETRIES = 5
+LEAGUE_DB_QUOTA_MAX_WAIT_SECONDS = 30
+LEAGUE_DB_QUOTA_READS_PER_MINUTE = 60
+LEAGUE_DB_QUOTA_WRITES_PER_MINUTE = 60
+LEAGUE_DB_REQUEST_TIMEOUT_SECONDS = 30
 LEAGUE_DB_RESPONSE_TIMEOUT_SECONDS = 5
+LEAGUE_DB_SNAPSHOT_INTERVAL_SECONDS = 60
 LEAGUE_DB_SPREADSHEET_DEFAULT_COLS = 27
 LEAGUE_DB_SPREADSHEET_DEFAULT_ROWS = 1000
 LEAGUE_DB_TAB_COMMAND_LOCK = "CommandLock"
@@ -95,6 +121,8 @@ LEAGUE_DB_TAB_TEAM_INVITE = "TeamInvite"
 LEAGUE_DB_TAB_TEAM_PLAYER = "TeamPlayer"
 LEAGUE_DB_TAB_VW_ROSTER = "vwRoster"
 LEAGUE_DB_TAB_CONSTANTS = "Constants"
+LEAGUE_DB_TOMBSTONE = "~deleted~"
+LEAGUE_DB_WRITE_CONFLICT_POLICY = "OVERWRITE"  # or "KEEP_SHEET"
 LINK_ACCUMULATED_POINTS = "https://echomasterleague.com/eml-accumulated-points-ap-system/"  # Comment added to keep line long enough for the formatter to ignore
 LINK_ACTION_LIST = "https://docs.google.com/spreadsheets/d/e/2PACX-1vRhkQIBw9ETybdGNVggWnAf9ueizzDMc0lbKcsDPQsD6c1jDd8p8u8OUwl5gdcR2M14KmCV6-eF03p4/pubhtml"
 LINK_BOT_COMMANDS = "https://echomasterleague.com/eml-bot-commands/"
@@ -1,6 +1,12 @@
-from database.database_core import CoreDatabase
+from database.cache_policy import (
+    DEFAULT_CACHE_POLICY,
+    WRITE_ONLY_CACHE_POLICY,
+    CachePolicy,
+)
 from database.fields import BaseFields
+from database.history_archive import HistoryArchive
 from database.records import BaseRecord
+from database.storage_backend import StorageBackend
 from enum import IntEnum, StrEnum, verify, EnumCheck
 from typing import Type
 import constants
@@ -25,37 +31,44 @@ class BaseTable:
     - `insert_record(record)`: Insert a new record into the table
     ## Read:
     - `get_table_data()`: Get all the data from the worksheet. (i.e. the table)
+    - `get_table_rows(**filters)`: Get the data rows, narrowed down by indexed fields
     - `get_record(record_id)`: Get a record by its ID
     ## Update:
     - `update_record(record)`: Update a record in the table
     ## Delete:
     - `delete_record(record_id)`: Delete a record by its ID
+    - `_soft_delete`: Only mark deleted rows, for tables deleted from often
+    - `delete_expired_records()`: Delete the records past their `_expires_field`
+    ## History:
+    - `archive_history(archive, before)`: Move old history out of the database
+    ## Indexes:
+    - `_index_fields`: Fields to keep a secondary index on, for hot finder filters
+    ## Caching:
+    - `_cache_policy`: How the table is cached (see `cache_policy.py`)
     """
 
+    _index_fields: list[IntEnum] = []
+    _cache_policy: CachePolicy = DEFAULT_CACHE_POLICY
+    _soft_delete: bool = False
+    _expires_field: IntEnum | None = None
+
     def __init__(
         self,
-        db: CoreDatabase,
+        db: StorageBackend,
         table_name: str,
         record_type: Type[BaseRecord],
         fields: Type[BaseFields],
     ):
         self.table_name: str = table_name
-        self._db: CoreDatabase = db
+        self._db: StorageBackend = db
         self._record_type: Type[BaseRecord] = record_type
         self._fields: Type[BaseFields] = fields
         self._history_table: HistoryTable
-        try:
-            table_worksheet: gspread.worksheet.Worksheet
-            table_worksheet = db.get_table_worksheet(table_name)
-        except DbErrors.EmlWorksheetDoesNotExist as error:
-            # Create the worksheet if it doesn't exist
-            table_worksheet = db.create_table_worksheet(table_name)
-            # Add the fields to the worksheet
-            field_list = [field.name for field in fields]
-            table_worksheet.update(f"A1", [field_list])
-        except DbErrors.EmlWorksheetCreateError as error:
-            message = f"Worksheet '{table_name}' does not exist and could not be created: {error}"
-            raise DbErrors.EmlWorksheetDoesNotExist(message)
+        db.add_table(table_name, [field.name for field in fields])
+        db.add_table_index(table_name, [field.value for field in self._index_fields])
+        db.set_cache_policy(table_name, self._cache_policy)
+        if self._soft_delete:
+            db.enable_soft_delete(table_name)
         history_table_name = f"{table_name}{constants.LEAGUE_DB_TAB_SUFFIX_HISTORY}"
         self._history_table = HistoryTable(db, history_table_name, record_type, fields)
 
@@ -69,6 +82,27 @@ class BaseTable:
             )
         return table
 
+    async def get_table_rows(
+        self, **filters: int | float | str | None
+    ) -> list[list[int | float | str | None]]:
+        """Get the data rows of the table (no header), narrowed down by field values
+
+        Filters are given by field name (e.g. `record_id=...`), empty ones are
+        ignored. The record ID or the most selective `_index_fields` index picks
+        the candidate rows, so callers must still match them against every filter.
+        """
+        columns = {}
+        for field_name, value in filters.items():
+            if value is not None and value != "":
+                columns[self._fields[field_name].value] = value
+        try:
+            rows = await self._db.find_table_rows(self.table_name, columns)
+        except gspread.exceptions.APIError as error:
+            raise DbErrors.EmlWorksheetReadError(
+                f"Error reading worksheet: {error.response.text}"
+            )
+        return rows
+
     async def create_record(
         self,
         data_list: list[int | float | str | None],
@@ -101,44 +135,55 @@ class BaseTable:
         await record.set_field(
             BaseFields.updated_at, await general_helpers.iso_timestamp()
         )
-        table = await self.get_table_data()
-        for row in table:
-            if table.index(row) == 0:
-                continue
-            if row[BaseFields.record_id] == record_id:
-                # Update History
-                operation = HistoryOperations.UPDATE
-                await self._history_table.create_history_record(record, operation)
-                # Update Records
-                record_list = await record.to_list()
-                await self._db.update_row(
-                    table_name=self.table_name, row_data=record_list
-                )
-                return
-        raise DbErrors.EmlRecordNotFound(f"Record '{record_id}' not found")
+        row = await self._db.get_table_row(self.table_name, record_id)
+        if not row:
+            raise DbErrors.EmlRecordNotFound(f"Record '{record_id}' not found")
+        # Update History
+        operation = HistoryOperations.UPDATE
+        await self._history_table.create_history_record(record, operation)
+        # Update Records
+        record_list = await record.to_list()
+        await self._db.update_row(table_name=self.table_name, row_data=record_list)
 
     async def delete_record(self, record_id: str):
         """Delete a record from the table"""
-        table = await self.get_table_data()
-        for row in table:
-            if table.index(row) == 0:
+        row = await self._db.get_table_row(self.table_name, record_id)
+        if not row:
+            raise DbErrors.EmlRecordNotFound(f"Record '{record_id}' not found")
+        try:
+            # Update History
+            record = self._record_type(row)
+            operation = HistoryOperations.DELETE
+            await self._history_table.create_history_record(record, operation)
+            # Delete Record
+            await self._db.delete_row(table_name=self.table_name, record_id=record_id)
+        except gspread.exceptions.APIError as error:
+            raise DbErrors.EmlWorksheetWriteError(
+                f"Error writing to worksheet: {error.response.text}"
+            )
+
+    async def delete_expired_records(self) -> int:
+        """Delete the records whose `_expires_field` is in the past
+
+        Finders already leave expired records out, so this only needs to run
+        now and then (see `FullDatabase.schedule_expiry_sweep`).
+        """
+        if self._expires_field is None:
+            return 0
+        now = await general_helpers.epoch_timestamp()
+        count = 0
+        for row in await self.get_table_rows():
+            expires_at = row[self._expires_field]
+            if not expires_at:
                 continue
-            if row[BaseFields.record_id] == record_id:
-                try:
-                    # Update History
-                    record = self._record_type(row)
-                    operation = HistoryOperations.DELETE
-                    await self._history_table.create_history_record(record, operation)
-                    # Delete Record
-                    await self._db.delete_row(
-                        table_name=self.table_name, record_id=record_id
-                    )
-                except gspread.exceptions.APIError as error:
-                    raise DbErrors.EmlWorksheetWriteError(
-                        f"Error writing to worksheet: {error.response.text}"
-                    )
-                return
-        raise DbErrors.EmlRecordNotFound(f"Record '{record_id}' not found")
+            if now > await general_helpers.epoch_timestamp(expires_at):
+                await self.delete_record(row[BaseFields.record_id])
+                count += 1
+        return count
+
+    async def archive_history(self, archive: HistoryArchive, before: str) -> int:
+        """Move the history of the table created before an ISO timestamp to an archive"""
+        return await self._history_table.archive_history(archive, before)
 
 
 """
@@ -170,34 +215,27 @@ class HistoryOperations(StrEnum):
 
 
 class HistoryTable:
-    """A class to manipulate a History table in the database"""
+    """A class to manipulate a History table in the database
+
+    History is only ever appended to, so it is never downloaded, and its rows
+    may be committed a few seconds after the records they describe.
+    """
 
     def __init__(
         self,
-        db: CoreDatabase,
+        db: StorageBackend,
         table_name: str,
         record_type: Type[BaseRecord] = BaseRecord,
         fields: Type[BaseFields] = BaseFields,
     ):
         self.table_name: str = table_name
-        self._db: CoreDatabase = db
+        self._db: StorageBackend = db
         self._record_type: Type[BaseRecord] = record_type
         self._record_fields: Type[BaseFields] = fields
-        try:
-            history_worksheet: gspread.worksheet.Worksheet
-            history_worksheet = db.get_table_worksheet(table_name)
-        except DbErrors.EmlWorksheetDoesNotExist as error:
-            # Create the worksheet if it doesn't exist
-            history_worksheet = db.create_table_worksheet(table_name)
-            # Add the fields to the worksheet
-            fields: Type[IntEnum] = self._record_fields
-            original_field_list = [field.name for field in fields]
-            history_field_list = [field.name for field in HistoryFields]
-            field_list = history_field_list + original_field_list
-            history_worksheet.update(f"A1", [field_list])
-        except DbErrors.EmlWorksheetCreateError as error:
-            message = f"Worksheet '{table_name}' does not exist and could not be created: {error}"
-            raise DbErrors.EmlWorksheetDoesNotExist(message)
+        original_field_list = [field.name for field in self._record_fields]
+        history_field_list = [field.name for field in HistoryFields]
+        db.add_table(table_name, history_field_list + original_field_list)
+        db.set_cache_policy(table_name, WRITE_ONLY_CACHE_POLICY)
 
     async def create_history_record(
         self, record: BaseRecord, operation: HistoryOperations
@@ -219,3 +257,21 @@ class HistoryTable:
             raise DbErrors.EmlWorksheetWriteError(
                 f"Error writing to worksheet: {error.response.text}"
             )
+
+    async def archive_history(self, archive: HistoryArchive, before: str) -> int:
+        """Move the history records created before an ISO timestamp to an archive
+
+        Archived rows are indexed by the ID of the original record.
+        """
+        try:
+            return await self._db.archive_rows(
+                self.table_name,
+                HistoryFields.history_created_at,
+                before,
+                archive,
+                key_column=len(HistoryFields) + BaseFields.record_id,
+            )
+        except gspread.exceptions.APIError as error:
+            raise DbErrors.EmlWorksheetWriteError(
+                f"Error writing to worksheet: {error.response.text}"
+            )
@@ -0,0 +1,56 @@
+import constants
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Cache Policy
+"""
+
+
+class CachePolicy:
+    """How the local cache treats a table (see `BaseTable._cache_policy`)
+
+    Attributes:
+        ttl_seconds (float): Age at which a cached table is refreshed in the background
+        max_staleness_seconds (float): Age at which reads wait for a fresh copy
+        preload (bool): Whether the table is pulled by a default `prefetch_tables`
+        pinned (bool): Whether the cached table is kept until pulled explicitly
+        write_only (bool): Whether the table is only ever appended to, never read
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = constants.LEAGUE_DB_CACHE_DURATION_SECONDS,
+        max_staleness_seconds: float = constants.LEAGUE_DB_CACHE_MAX_STALENESS_SECONDS,
+        preload: bool = True,
+        pinned: bool = False,
+        write_only: bool = False,
+    ):
+        self.ttl_seconds: float = ttl_seconds
+        self.max_staleness_seconds: float = max(max_staleness_seconds, ttl_seconds)
+        self.preload: bool = preload and not write_only
+        self.pinned: bool = pinned
+        self.write_only: bool = write_only
+
+
+DEFAULT_CACHE_POLICY = CachePolicy()
+"""Most tables: edited by the bot, and now and then by staff"""
+
+FAST_CACHE_POLICY = CachePolicy(
+    ttl_seconds=constants.LEAGUE_DB_CACHE_DURATION_FAST_SECONDS,
+    max_staleness_seconds=constants.LEAGUE_DB_CACHE_MAX_STALENESS_FAST_SECONDS,
+)
+"""Tables whose sheet edits matter within a minute or so"""
+
+SLOW_CACHE_POLICY = CachePolicy(
+    ttl_seconds=constants.LEAGUE_DB_CACHE_DURATION_SLOW_SECONDS,
+    max_staleness_seconds=constants.LEAGUE_DB_CACHE_MAX_STALENESS_SLOW_SECONDS,
+)
+"""Settings tables, rarely edited on the sheet"""
+
+PINNED_CACHE_POLICY = CachePolicy(pinned=True)
+"""Tables only the bot writes, so the cached copy never goes stale"""
+
+WRITE_ONLY_CACHE_POLICY = CachePolicy(write_only=True)
+"""Append-only logs (e.g. History tables), never downloaded"""
@@ -0,0 +1,55 @@
+import gzip
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Cache Snapshot
+
+A compact, on-disk copy of the local cache, so a restart does not start cold.
+"""
+
+
+class CacheSnapshot:
+    """A gzipped JSON file holding the state of the local cache
+
+    The file is replaced atomically, so a crash while saving leaves the last
+    snapshot intact. A missing or unreadable snapshot just means a cold start.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path: str = file_path
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+
+    def read(self) -> dict | None:
+        """Read the last snapshot saved, if there is a usable one"""
+        if not os.path.exists(self.file_path):
+            return None
+        try:
+            with gzip.open(self.file_path, "rt", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, EOFError, ValueError) as error:
+            logger.warning(f"Ignored unreadable cache snapshot: {error}")
+            return None
+
+    def write(self, state: dict) -> None:
+        """Durably replace the snapshot with the state of the local cache
+
+        Serializing and compressing take a while for a large cache: call this
+        in a thread, with a `state` no one else changes meanwhile.
+        """
+        content = gzip.compress(dump_state(state).encode("utf-8"), compresslevel=6)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.file_path)
+
+
+def dump_state(state: dict) -> str:
+    """Serialize the state of the local cache as JSON"""
+    return json.dumps(state, default=str, separators=(",", ":"))
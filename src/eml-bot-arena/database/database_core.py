@@ -1,6 +1,31 @@
-from database.enums import WriteOperations
+from database.cache_policy import DEFAULT_CACHE_POLICY, CachePolicy
+from database.cache_snapshot import CacheSnapshot
+from database.enums import RequestPriority, WriteConflictPolicies, WriteOperations
+from database.fields import BaseFields
+from database.history_archive import HistoryArchive
+from database.request_scheduler import READ, WRITE, RequestScheduler, request_priority
+from database.sheets_transport import (
+    GspreadTransport,
+    SheetsTransport,
+    fill_rows,
+    quote_title,
+)
+from database.storage_backend import StorageBackend, Transaction, get_undo_write
+from database.write_log import WriteLog
+from database.write_planner import (
+    WritePlan,
+    delete_rows_requests,
+    is_tombstone,
+    new_worksheet_requests,
+    plan_writes,
+)
 import constants
 import errors.database_errors as DbErrors
+import asyncio
+import bisect
+import contextvars
+import datetime
+import functools
 import gspread
 import time
 import logging
@@ -8,7 +33,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class CoreDatabase:
+class CoreDatabase(StorageBackend):
     """Google Sheets (pseudo-) Database
 
     This class is a pseudo-database that uses Google Sheets as a backend. It is
@@ -18,164 +43,1409 @@ class CoreDatabase:
         _gs_client (gspread.Client): The Google Sheets client to use
         _db_spreadsheet (gspread.Spreadsheet): The Google Sheets spreadsheet to use as a database
         _db_local_cache (dict): A cache of worksheets to reduce API calls
+        _db_cache_index (dict): The slot of each record in the local cache, by record ID
+        _db_cache_secondary (dict): The record IDs of each casefolded value, by table and column
         _db_write_queue (list): A queue of write operations to commit to the database
+        _db_write_batches (list): The `WriteBatch` each queued write belongs to
+        _db_writes_queued (int): How many writes were ever queued
+        _db_writes_committed (int): How many of them left the queue, committed
+        _db_isolate_until (int): Writes up to this count are committed one batch at a time
+        _db_sheet_rows (dict): The 1-based sheet row of each record, as last committed
+        _db_write_lock (asyncio.Lock): Serializes commits of the write queue
+        _db_write_log_lock (asyncio.Lock): Keeps the write log in the order of the queue
+        _db_write_task (asyncio.Task): Background task draining the write queue
+        _db_prefetch_task (asyncio.Task): Background task refreshing the local cache
+        _db_refresh_tasks (dict): Background refresh of each stale table
+        _db_table_pulls (dict): The pull in flight for each worksheet, if any
+        _db_transport (SheetsTransport): How runtime Sheets API calls are made
+        _db_scheduler (RequestScheduler): Keeps runtime Sheets API calls within quota
+        _db_write_log (WriteLog): On-disk copy of the write queue, if any
+        _db_transactions (list): The transactions open in any task
+        _db_sheet_versions (dict): The `updated_at` of each record, as last seen on the sheet
+        _db_write_versions (dict): The `updated_at` each pending UPDATE/DELETE was based on
+        _db_conflict_policy (WriteConflictPolicies): How to handle records edited on the sheet
+        _db_cache_revisions (dict): The spreadsheet's last update time when each table was pulled
+        _db_cache_fetch_times (dict): When each table's data was last read, not just renewed
+        _db_revision_commits (dict): The commit count up to which each table's revision holds
+        _db_commit_revision (tuple): The spreadsheet's last update time after the last commit
+        _db_change_detection (bool): Whether the spreadsheet's last update time can be read
+        _db_snapshot (CacheSnapshot): On-disk copy of the local cache, if any
+        _db_snapshot_task (asyncio.Task): Background task saving the local cache
+        _db_snapshot_pull_times (dict): The saved pull time of tables loaded from the snapshot
+        _db_cache_policies (dict): How each table is cached (every `BaseTable` sets one)
+        _db_append_task (asyncio.Task): Background task committing buffered appends
+        _db_soft_delete_tables (set): The tables whose deleted rows are only marked
+        _db_compaction_task (asyncio.Task): Background task removing marked rows
     """
 
-    def __init__(self, gs_client: gspread.Client, spreadsheet_url: str):
-        """Initialize the Database class"""
+    def __init__(
+        self,
+        gs_client: gspread.Client,
+        spreadsheet_url: str,
+        transport: SheetsTransport = None,
+        write_log_file: str = None,
+        conflict_policy: str = constants.LEAGUE_DB_WRITE_CONFLICT_POLICY,
+        snapshot_file: str = None,
+    ):
+        """Initialize the Database class
+
+        Worksheets are set up through `gs_client`. Reads and writes at runtime go
+        through `transport`, which defaults to `gspread` in a thread pool.
+        With a `write_log_file`, queued writes survive restarts: writes left in
+        it by the last run are queued again, before anything is read.
+        A record edited on the sheet since it was read is handled according to
+        `conflict_policy` (see `WriteConflictPolicies`).
+        With a `snapshot_file`, the local cache is saved regularly and loaded
+        back at startup, to be served (as stale) until it is revalidated.
+        """
         self._gs_client = gs_client
         self._worksheets: dict[str, gspread.Worksheet] = {}
+        self._db_missing_worksheets: dict[str, list[str]] = {}
         self._db_cache_pull_times: dict[str, float] = {}
+        self._db_cache_fetch_times: dict[str, float] = {}
         self._db_local_cache: dict[str, list[list[int | float | str | None]]] = {}
+        self._db_cache_index: dict[str, dict[str, int]] = {}
+        self._db_cache_secondary: dict[str, dict[int, dict[str, set[str]]]] = {}
         self._db_write_queue: list[list[int | float | str | None]] = []
+        self._db_write_batches: list[WriteBatch] = []
+        self._db_writes_queued: int = 0
+        self._db_writes_committed: int = 0
+        self._db_isolate_until: int = 0
+        self._db_sheet_rows: dict[str, dict[str, int]] = {}
+        self._db_sheet_row_counts: dict[str, int] = {}
+        self._db_write_lock: asyncio.Lock = None
+        self._db_write_log_lock: asyncio.Lock = None
+        self._db_write_signal: asyncio.Event = None
+        self._db_write_task: asyncio.Task = None
+        self._db_prefetch_task: asyncio.Task = None
+        self._db_refresh_tasks: dict[str, asyncio.Task] = {}
+        self._db_table_pulls: dict[str, asyncio.Task] = {}
+        self._db_commit_count: int = 0
+        self._db_recent_commits: list[tuple[int, list]] = []
+        self._db_pulls_in_flight: list[int] = []
+        self._db_unconfirmed_inserts: set[tuple[str, str]] = set()
+        self._db_transactions: list[Transaction] = []
+        self._db_sheet_versions: dict[str, dict[str, str]] = {}
+        self._db_write_versions: dict[str, dict[str, str]] = {}
+        self._db_conflict_policy = WriteConflictPolicies(conflict_policy)
+        self._db_cache_revisions: dict[str, str] = {}
+        self._db_revision_commits: dict[str, int] = {}
+        self._db_commit_revision: tuple[int, str | None] = (0, None)
+        self._db_change_detection: bool = True
+        self._db_snapshot: CacheSnapshot = None
+        self._db_snapshot_task: asyncio.Task = None
+        self._db_snapshot_pull_times: dict[str, float] = {}
+        self._db_cache_policies: dict[str, CachePolicy] = {}
+        self._db_append_task: asyncio.Task = None
+        self._db_soft_delete_tables: set[str] = set()
+        self._db_compaction_task: asyncio.Task = None
+        self._db_write_log: WriteLog = None
+        if write_log_file:
+            self._db_write_log = WriteLog(write_log_file)
+            self._replay_write_log()
         try:
             logger.debug(f"Connecting to Spreadsheet: {spreadsheet_url}")
             self._db_spreadsheet = gs_client.open_by_url(spreadsheet_url)
         except gspread.SpreadsheetNotFound as error:
             raise DbErrors.EmlSpreadsheetDoesNotExist(f"Spreadsheet not found: {error}")
+        self._db_transport = transport or GspreadTransport(self._db_spreadsheet)
+        self._db_scheduler = RequestScheduler()
+        self._load_worksheets()
+        if snapshot_file:
+            self._db_snapshot = CacheSnapshot(snapshot_file)
+            self._load_snapshot()
+
+    def _replay_write_log(self) -> None:
+        """Queue the writes left in the write log by the last run
+
+        Their INSERTs may already have been committed just before the last run
+        stopped, so they are only appended if the record is not found. Each
+        write is its own batch, as the log does not keep them together.
+        """
+        writes = self._db_write_log.read()
+        if not writes:
+            return
+        logger.warning(f"Replaying {len(writes)} write(s) from the write log")
+        for write in writes:
+            if len(write) > 2 and write[1] == WriteOperations.INSERT:
+                self._db_unconfirmed_inserts.add((write[0], str(write[2])))
+        self._db_write_queue += writes
+        self._db_write_batches += [WriteBatch() for _ in writes]
+        self._db_writes_queued += len(writes)
+
+    def _load_worksheets(self) -> None:
+        """Get all the worksheets of the DB spreadsheet from its metadata"""
+        logger.info("[ 0 write, 1 read ] Getting Worksheets")
+        try:
+            worksheets = self._db_spreadsheet.worksheets()
+        except gspread.exceptions.APIError as error:
+            raise DbErrors.EmlWorksheetReadError(f"Worksheets not read: {error}")
+        self._worksheets = {worksheet.title: worksheet for worksheet in worksheets}
+
+    def add_table(self, table_name: str, field_names: list[str]) -> None:
+        """Make sure a worksheet exists, with a header row of field names
+
+        Missing worksheets are only created by `create_missing_tables`.
+        """
+        if table_name not in self._worksheets:
+            self._db_missing_worksheets[table_name] = field_names
+
+    def set_cache_policy(self, table_name: str, policy: CachePolicy) -> None:
+        """Say how a worksheet should be cached"""
+        self._db_cache_policies[table_name] = policy
+        if table_name in self._db_snapshot_pull_times:
+            self._age_snapshot_table(table_name)
+            del self._db_snapshot_pull_times[table_name]
+
+    def get_cache_policy(self, table_name: str) -> CachePolicy:
+        """Get how a worksheet is cached"""
+        return self._db_cache_policies.get(table_name, DEFAULT_CACHE_POLICY)
+
+    def enable_soft_delete(self, table_name: str) -> None:
+        """Mark the deleted rows of a worksheet as tombstones, instead of removing them
+
+        Removing a row is slow, and shifts every row below it. Tombstones are
+        hidden from reads, and removed by `compact_tables`.
+        """
+        self._db_soft_delete_tables.add(table_name)
 
-    def create_table_worksheet(self, title: str) -> gspread.Worksheet:
-        """Create a new worksheet in the DB spreadsheet"""
+    def create_missing_tables(self) -> None:
+        """Create all the missing worksheets in the DB spreadsheet at once"""
+        if not self._db_missing_worksheets:
+            return
+        titles = list(self._db_missing_worksheets.keys())
+        logger.info(f"[ 1 write, 1 read ] Creating Worksheets: {titles}")
+        next_id = max((ws.id for ws in self._worksheets.values()), default=0) + 1
+        requests = []
+        for sheet_id, title in enumerate(titles, start=next_id):
+            requests += new_worksheet_requests(
+                sheet_id, title, self._db_missing_worksheets[title]
+            )
         try:
-            worksheet = self._db_spreadsheet.add_worksheet(
-                title,
-                rows=constants.LEAGUE_DB_SPREADSHEET_DEFAULT_ROWS,
-                cols=constants.LEAGUE_DB_SPREADSHEET_DEFAULT_COLS,
+            self._db_spreadsheet.batch_update({"requests": requests})
+        except gspread.exceptions.APIError as error:
+            raise DbErrors.EmlWorksheetCreateError(f"Worksheets not created: {error}")
+        self._db_missing_worksheets = {}
+        self._load_worksheets()
+
+    async def start(self) -> None:
+        """Start committing replayed writes, and saving the cache snapshot"""
+        if self._db_write_queue:
+            self.schedule_writes()
+        if self._db_snapshot and (
+            self._db_snapshot_task is None or self._db_snapshot_task.done()
+        ):
+            self._db_snapshot_task = asyncio.get_running_loop().create_task(
+                self._snapshot_worker(), name="db-snapshot-worker"
             )
-            worksheet.format("A1:Z1", {"textFormat": {"bold": True}})
-            worksheet.freeze(rows=1)
-        except gspread.WorksheetNotFound as error:
-            raise DbErrors.EmlWorksheetCreateError(f"Worsheet not created: {error}")
-        return worksheet
+
+    def _load_snapshot(self) -> None:
+        """Fill the local cache from the snapshot saved by the last run
+
+        The tables are marked stale, so they are served right away and
+        revalidated (see `_fetch_tables`) on first read or prefetch. Cache
+        policies are set later, so each table is aged again by its own.
+        """
+        state = self._db_snapshot.read()
+        if not state or state.get("spreadsheet_id") != self._db_spreadsheet.id:
+            return
+        tables = state.get("tables", {})
+        for table_name, table in tables.items():
+            if table_name not in self._worksheets:
+                continue
+            self._set_cache(table_name, table["data"])
+            self._db_snapshot_pull_times[table_name] = table["pull_time"]
+            self._db_cache_fetch_times[table_name] = table.get("fetch_time", 0)
+            self._age_snapshot_table(table_name)
+            if table["revision"] is not None:
+                self._db_cache_revisions[table_name] = table["revision"]
+                self._db_revision_commits[table_name] = self._db_commit_count
+            if table["sheet_rows"] is not None:
+                self._db_sheet_rows[table_name] = table["sheet_rows"]
+                self._db_sheet_row_counts[table_name] = table["sheet_row_count"]
+            if table["sheet_versions"] is not None:
+                self._db_sheet_versions[table_name] = table["sheet_versions"]
+        # writes replayed from the write log are newer than the snapshot
+        for write in self._db_write_queue:
+            self._apply_to_cache(write)
+        logger.info(f"Loaded cache snapshot of {len(tables)} table(s)")
+
+    def _age_snapshot_table(self, table_name: str) -> None:
+        """Mark a table loaded from the snapshot stale, by its cache policy
+
+        Write-only tables are dropped from the local cache instead.
+        """
+        policy = self.get_cache_policy(table_name)
+        if policy.write_only:
+            self._db_local_cache.pop(table_name, None)
+            self._db_cache_index.pop(table_name, None)
+            self._db_cache_pull_times.pop(table_name, None)
+            self._db_cache_fetch_times.pop(table_name, None)
+            self._db_cache_revisions.pop(table_name, None)
+            self._forget_sheet_rows(table_name)
+            return
+        stale_time = time.time() - policy.ttl_seconds - 1
+        self._db_cache_pull_times[table_name] = min(
+            self._db_snapshot_pull_times[table_name], stale_time
+        )
+
+    def _get_snapshot_state(self) -> dict | None:
+        """Get the state of the local cache to save, if it is consistent now
+
+        Tables with pending writes are left out, and nothing is saved while a
+        transaction is open, so the snapshot only holds committed data.
+        """
+        if self._db_transactions:
+            return None
+        tables = {}
+        for table_name, table_data in self._db_local_cache.items():
+            if table_name not in self._db_cache_pull_times:
+                continue
+            if self.is_table_pending(table_name):
+                continue
+            # copied, as it is serialized in a thread while the cache changes
+            tables[table_name] = {
+                "data": [list(row) for row in table_data],
+                "pull_time": self._db_cache_pull_times[table_name],
+                "fetch_time": self._db_cache_fetch_times.get(table_name, 0),
+                "revision": self._db_cache_revisions.get(table_name),
+                "sheet_rows": copy_dict(self._db_sheet_rows.get(table_name)),
+                "sheet_row_count": self._db_sheet_row_counts.get(table_name),
+                "sheet_versions": copy_dict(self._db_sheet_versions.get(table_name)),
+            }
+        return {"spreadsheet_id": self._db_spreadsheet.id, "tables": tables}
+
+    async def _save_snapshot(self) -> None:
+        """Save the local cache to its snapshot (written in a thread)"""
+        state = self._get_snapshot_state()
+        if state is None or not state["tables"]:
+            return
+        await asyncio.to_thread(self._db_snapshot.write, state)
+        logger.debug(f"Saved cache snapshot of {len(state['tables'])} table(s)")
+
+    async def _snapshot_worker(self) -> None:
+        """Save the local cache to its snapshot on a schedule"""
+        logger.debug("DB snapshot worker started")
+        while True:
+            await asyncio.sleep(constants.LEAGUE_DB_SNAPSHOT_INTERVAL_SECONDS)
+            try:
+                await self._save_snapshot()
+            except Exception as error:
+                logger.exception(f"Failed to save cache snapshot:\n{error}")
 
     def get_table_worksheet(self, table_name: str) -> gspread.Worksheet:
         """Get a worksheet from the DB spreadsheet by title"""
-        try:
-            if table_name not in self._worksheets:
-                logger.info(f"[ 0 write, 1 read ] Getting Worksheet: {table_name}")
-                self._worksheets[table_name] = self._db_spreadsheet.worksheet(
-                    table_name
-                )
-        except gspread.WorksheetNotFound as error:
-            raise DbErrors.EmlWorksheetDoesNotExist(f"Worksheet not found: {error}")
+        if table_name not in self._worksheets:
+            raise DbErrors.EmlWorksheetDoesNotExist(
+                f"Worksheet not found: {table_name}"
+            )
         return self._worksheets[table_name]
 
     async def get_table_data(
         self, table_name: str
     ) -> list[list[int | float | str | None]]:
-        """Get all the data from a worksheet"""
-        # write any pending changes to the spreadsheet
-        await self.commit_all_writes()
+        """Get all the data from a worksheet
+
+        A cached copy older than the table's `ttl_seconds` is still returned
+        right away, while it is refreshed in the background. Only past its
+        `max_staleness_seconds` is the worksheet pulled inline, and a pinned
+        table is only pulled again when expired explicitly (see `CachePolicy`).
+        Queued writes are overlaid on the pulled data (see `_fetch_tables`), so
+        reads never wait for the write queue to be committed.
+        Use `prefetch_tables` first to read the very latest data.
+        """
+        policy = self.get_cache_policy(table_name)
+        if policy.write_only:
+            raise DbErrors.EmlWorksheetReadError(
+                f"Worksheet is write-only: {table_name}"
+            )
         # get the data from the worksheet if needed
         is_cached = (
             table_name in self._db_local_cache
             and table_name in self._db_cache_pull_times
         )
-        is_stale = (
-            table_name in self._db_cache_pull_times
-            and (time.time() - self._db_cache_pull_times[table_name])
-            > constants.LEAGUE_DB_CACHE_DURATION_SECONDS
-        )
-        is_safe = len(self._db_write_queue) == 0
-        if not is_cached or (is_stale and is_safe):
+        pull_time = self._db_cache_pull_times.get(table_name, 0)
+        age = time.time() - pull_time
+        is_stale = age > policy.ttl_seconds
+        is_expired = age > policy.max_staleness_seconds
+        if policy.pinned and pull_time:
+            is_stale = is_expired = False
+        if not is_cached or is_expired:
             logger.debug(f"[ 0 write, 1 read ] Getting Table: {table_name}")
             try:
-                worksheet = self.get_table_worksheet(table_name)
-                table_data = worksheet.get_all_values()
-                self._db_local_cache[table_name] = table_data
-                self._db_cache_pull_times[table_name] = time.time()
+                await self._pull_table(table_name)
                 logger.debug(f"DB Read cache updated for {table_name}")
             except Exception as error:
                 logger.exception(
                     f"Failed to update DB Read cache for {table_name}:\n{error}"
                 )
+        elif is_stale:
+            # serve the stale copy now, and refresh it for the next read
+            self._refresh_table_in_background(table_name)
         return self._db_local_cache[table_name]
 
+    def _refresh_table_in_background(self, table_name: str) -> None:
+        """Pull a worksheet into the local cache, unless it is already being pulled"""
+        task = self._db_refresh_tasks.get(table_name)
+        if task and not task.done():
+            return
+        self._db_refresh_tasks[table_name] = asyncio.get_running_loop().create_task(
+            self._refresh_table(table_name), name=f"db-refresh-{table_name}"
+        )
+
+    async def _refresh_table(self, table_name: str) -> None:
+        """Pull a worksheet into the local cache, logging any failure"""
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug(f"[ 0 write, 1 read ] Refreshing Table: {table_name}")
+        try:
+            await self._pull_table(table_name)
+            logger.debug(f"DB Read cache refreshed for {table_name}")
+        except Exception as error:
+            logger.exception(
+                f"Failed to refresh DB Read cache for {table_name}:\n{error}"
+            )
+
+    async def _pull_table(self, table_name: str) -> None:
+        """Pull all the data of a worksheet into the local cache"""
+        await self._pull_tables([table_name])
+
+    async def _pull_tables(self, table_names: list[str]) -> None:
+        """Pull all the data of many worksheets into the local cache at once
+
+        Worksheets already being pulled are not read again: concurrent readers
+        all wait for the same pull (single-flight).
+        """
+        pulls = {
+            self._db_table_pulls[name]
+            for name in table_names
+            if name in self._db_table_pulls
+        }
+        new_names = [name for name in table_names if name not in self._db_table_pulls]
+        if new_names:
+            pull = asyncio.get_running_loop().create_task(
+                self._fetch_tables(new_names), name="db-pull"
+            )
+            for table_name in new_names:
+                self._db_table_pulls[table_name] = pull
+            pull.add_done_callback(functools.partial(self._end_table_pull, new_names))
+            pulls.add(pull)
+        # a cancelled reader must not cancel the pull of the others
+        await asyncio.gather(*[asyncio.shield(pull) for pull in pulls])
+
+    def _end_table_pull(self, table_names: list[str], pull: asyncio.Task) -> None:
+        """Forget a finished pull, so the next read pulls the worksheets again"""
+        for table_name in table_names:
+            if self._db_table_pulls.get(table_name) is pull:
+                del self._db_table_pulls[table_name]
+        if not pull.cancelled():
+            pull.exception()  # retrieved by the readers, if any are left
+
+    async def _fetch_tables(self, table_names: list[str]) -> None:
+        """Read many worksheets into the local cache in a single request
+
+        The local cache is only updated once all of them have arrived, with the
+        same pull time. Cached worksheets are not read again if the spreadsheet
+        has not changed at all since they were pulled (a cheap Drive metadata
+        read): their cache is only renewed. The check is skipped when commits
+        of ours changed the spreadsheet since, as it could only fail, and for
+        tables last read more than their `max_staleness_seconds` ago, in case
+        an edit was missed (see `_carry_revisions`).
+        """
+        for table_name in table_names:
+            self.get_table_worksheet(table_name)
+        revision_count = self._db_commit_count
+        now = time.time()
+        checked = [
+            table_name
+            for table_name in table_names
+            if table_name in self._db_local_cache
+            and table_name in self._db_cache_revisions
+            and self._db_revision_commits.get(table_name) == revision_count
+            and now - self._db_cache_fetch_times.get(table_name, 0)
+            <= self.get_cache_policy(table_name).max_staleness_seconds
+        ]
+        commit_count, revision = self._db_commit_revision
+        if checked or commit_count != revision_count or revision is None:
+            revision = await self._get_revision()
+        if revision is not None:
+            unchanged = [
+                table_name
+                for table_name in checked
+                if self._db_cache_revisions.get(table_name) == revision
+            ]
+            if unchanged:
+                logger.debug(f"DB Read cache renewed, unchanged tables: {unchanged}")
+                renew_time = time.time()
+                for table_name in unchanged:
+                    self._db_cache_pull_times[table_name] = renew_time
+                table_names = [name for name in table_names if name not in unchanged]
+                if not table_names:
+                    return
+        commit_count = self._db_commit_count
+        self._db_pulls_in_flight.append(commit_count)
+        try:
+            ranges = [quote_title(table_name) for table_name in table_names]
+            values_list = await self._db_scheduler.run(
+                READ, lambda: self._db_transport.values_batch_get(ranges)
+            )
+        finally:
+            self._db_pulls_in_flight.remove(commit_count)
+        pull_time = time.time()
+        for table_name, values in zip(table_names, values_list):
+            table_data = fill_rows(values)
+            self._set_cache(
+                table_name, [row for row in table_data if not is_tombstone(row)]
+            )
+            self._db_cache_pull_times[table_name] = pull_time
+            self._db_cache_fetch_times[table_name] = pull_time
+            if revision is not None:
+                self._db_cache_revisions[table_name] = revision
+                self._db_revision_commits[table_name] = revision_count
+            else:
+                self._db_cache_revisions.pop(table_name, None)
+            if self._db_commit_count == commit_count:
+                self._index_sheet_rows(table_name, table_data)
+            else:
+                # writes committed during the pull may be missing from its data
+                for count, writes in self._db_recent_commits:
+                    if count > commit_count:
+                        for write in writes:
+                            if write[0] == table_name:
+                                self._apply_to_cache(write)
+                self._forget_sheet_rows(table_name)
+            # writes still pending are never in the pulled data
+            for write in self._db_write_queue:
+                if write[0] == table_name:
+                    self._apply_to_cache(write)
+            for transaction in self._db_transactions:
+                for write in transaction.writes:
+                    if write[0] == table_name:
+                        self._apply_to_cache(write)
+        self._prune_recent_commits()
+
+    async def _get_revision(self) -> str | None:
+        """Get the last update time of the spreadsheet, if it can be read"""
+        if not self._db_change_detection:
+            return None
+        try:
+            return await self._db_transport.get_last_update_time()
+        except (NotImplementedError, gspread.exceptions.APIError) as error:
+            if isinstance(error, gspread.exceptions.APIError) and error.code == 429:
+                return None
+            logger.warning(f"Change detection disabled: {error!r}")
+            self._db_change_detection = False
+        except Exception as error:
+            logger.warning(
+                f"Failed to read the spreadsheet's last update time: {error}"
+            )
+        return None
+
+    def _expire_table(self, table_name: str) -> None:
+        """Make the next read pull a table again, even if the sheet has not changed"""
+        self._db_cache_revisions.pop(table_name, None)
+        if table_name in self._db_cache_pull_times:
+            self._db_cache_pull_times[table_name] = 0
+
+    async def prefetch_tables(self, table_names: list[str] = None) -> None:
+        """Pull many worksheets into the local cache in a single request
+
+        Defaults to every table whose cache policy says to `preload` it, so the
+        first reads after startup or cache expiry are free. Write-only tables
+        are never pulled.
+        """
+        if table_names is None:
+            table_names = self._get_preload_tables()
+        table_names = [
+            table_name
+            for table_name in table_names
+            if not self.get_cache_policy(table_name).write_only
+        ]
+        if not table_names:
+            return
+        logger.debug(f"[ 0 write, 1 read ] Prefetching {len(table_names)} Tables")
+        try:
+            await self._pull_tables(table_names)
+            logger.debug(f"DB Read cache prefetched for {len(table_names)} tables")
+        except Exception as error:
+            logger.exception(f"Failed to prefetch DB Read cache:\n{error}")
+
+    def schedule_prefetch(self, interval_seconds: float) -> None:
+        """Prefetch all tables in the background, every `interval_seconds`"""
+        if self._db_prefetch_task is None or self._db_prefetch_task.done():
+            self._db_prefetch_task = asyncio.get_running_loop().create_task(
+                self._prefetch_worker(interval_seconds), name="db-prefetch-worker"
+            )
+
+    async def _prefetch_worker(self, interval_seconds: float) -> None:
+        """Refresh the stale tables of the local cache on a schedule"""
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug("DB prefetch worker started")
+        while True:
+            await asyncio.sleep(interval_seconds)
+            table_names = self._get_stale_tables()
+            if table_names:
+                await self.prefetch_tables(table_names)
+
+    def _get_preload_tables(self) -> list[str]:
+        """Get the tables whose cache policy says to `preload` them"""
+        return [
+            table_name
+            for table_name, policy in self._db_cache_policies.items()
+            if policy.preload
+        ]
+
+    def _get_stale_tables(self) -> list[str]:
+        """Get the preloaded tables that are past their `ttl_seconds`"""
+        now = time.time()
+        table_names = []
+        for table_name in self._get_preload_tables():
+            policy = self.get_cache_policy(table_name)
+            pull_time = self._db_cache_pull_times.get(table_name, 0)
+            if policy.pinned and pull_time:
+                continue
+            if now - pull_time > policy.ttl_seconds:
+                table_names.append(table_name)
+        return table_names
+
+    async def get_table_row(
+        self, table_name: str, record_id: str
+    ) -> list[int | float | str | None] | None:
+        """Get a single row of a worksheet by its record ID"""
+        table = await self.get_table_data(table_name)
+        slot = self._db_cache_index.get(table_name, {}).get(str(record_id).casefold())
+        return table[slot] if slot is not None else None
+
+    async def find_table_rows(
+        self, table_name: str, filters: dict[int, int | float | str]
+    ) -> list[list[int | float | str | None]]:
+        """Get the candidate rows of a worksheet for a set of column filters
+
+        The most selective index among the filtered columns narrows the rows down.
+        Candidates are returned in table order, and still need to be matched
+        against every filter by the caller. Without a usable index, all data rows
+        (no header) are returned.
+        """
+        table = await self.get_table_data(table_name)
+        record_index = self._db_cache_index.get(table_name, {})
+        column_indexes = self._db_cache_secondary.get(table_name, {})
+        best_keys = None
+        for column, value in filters.items():
+            key = str(value).casefold()
+            if column == 0:
+                keys = {key} if key in record_index else set()
+            elif column in column_indexes:
+                keys = column_indexes[column].get(key, set())
+            else:
+                continue
+            if best_keys is None or len(keys) < len(best_keys):
+                best_keys = keys
+        if best_keys is None:
+            return table[1:]
+        slots = sorted(record_index[key] for key in best_keys if key in record_index)
+        return [table[slot] for slot in slots]
+
+    def add_table_index(self, table_name: str, columns: list[int]) -> None:
+        """Maintain a secondary index on some columns of a worksheet"""
+        column_indexes = self._db_cache_secondary.setdefault(table_name, {})
+        for column in columns:
+            column_indexes.setdefault(column, {})
+        if table_name in self._db_local_cache:
+            self._set_cache(table_name, self._db_local_cache[table_name])
+
     async def append_row(
         self, table_name: str, row_data: list[int | float | str | None]
     ) -> None:
         """Insert a record into a worksheet"""
-        # Add the write operation to the queue
-        queued_write = [table_name, WriteOperations.INSERT] + row_data
-        self._db_write_queue.append(queued_write)
-        # Update the local cache
-        if table_name in self._db_local_cache:
-            self._db_local_cache[table_name] += [row_data]
-        # write any pending changes to the spreadsheet
-        await self.commit_all_writes()
+        await self.apply_writes([[table_name, WriteOperations.INSERT] + row_data])
 
     async def update_row(
         self, table_name: str, row_data: list[int | float | str | None]
     ) -> None:
         """Update a record in a worksheet"""
-        # Add the write operation to the queue
-        queued_write = [table_name, WriteOperations.UPDATE] + row_data
-        self._db_write_queue.append(queued_write)
-        # Update the local cache
-        id = row_data[0]
-        if table_name in self._db_local_cache:
-            for i, row in enumerate(self._db_local_cache[table_name]):
-                if row[0] == id:
-                    self._db_local_cache[table_name][i] = row_data
-                    break
-        # write any pending changes to the spreadsheet
-        await self.commit_all_writes()
+        await self.apply_writes([[table_name, WriteOperations.UPDATE] + row_data])
 
     async def delete_row(self, table_name: str, record_id: str) -> None:
         """Delete a record from a worksheet"""
-        # Add the write operation to the write queue
-        queued_write = [table_name, WriteOperations.DELETE, record_id]
-        self._db_write_queue.append(queued_write)
-        # Update the local cache
-        if table_name in self._db_local_cache:
-            for i, row in enumerate(self._db_local_cache[table_name]):
-                if row[0] == record_id:
-                    del self._db_local_cache[table_name][i]
-                    break
-        # write any pending changes to the spreadsheet
-        await self.commit_all_writes()
-
-    async def commit_next_write(
-        self,
+        await self.apply_writes([[table_name, WriteOperations.DELETE, record_id]])
+
+    async def replace_table(
+        self, table_name: str, table_data: list[list[int | float | str | None]]
     ) -> None:
-        """Commit a single write operation to the worksheet"""
-        if not self._db_write_queue or not self._db_write_queue[0]:
-            raise ValueError("Write queue is empty")
-        write = self._db_write_queue[0]
-        if len(write) < 3:
-            write_entry = self._db_write_queue.pop(0)
-            raise ValueError(
-                f"Write operation discarded for missing data: {write_entry}"
+        """Replace all the data in a worksheet"""
+        await self.apply_writes([[table_name, WriteOperations.REPLACE] + table_data])
+
+    async def apply_writes(self, writes: list[list[int | float | str | None]]) -> None:
+        """Queue a batch of write operations and apply them to the local cache
+
+        Inside a `transaction()`, the writes are only applied to the local cache,
+        and queued when the transaction ends. Appends to write-only tables (e.g.
+        History) are buffered: they go with the next commit, or on their own
+        once `LEAGUE_DB_APPEND_BUFFER_MAX_ROWS` or
+        `LEAGUE_DB_APPEND_BUFFER_SECONDS` is reached.
+        The writes are one batch: if any of them is dropped at commit (see
+        `WriteConflictPolicies`), all of them are, and `flush` raises.
+        """
+        transaction = self.get_transaction()
+        if transaction is not None:
+            for write in writes:
+                old_data = self._get_cached_data(write)
+                if old_data is not False:
+                    transaction.undo.append(get_undo_write(write, old_data))
+                transaction.writes.append(write)
+                self._apply_to_cache(write)
+            return
+        async with self._get_write_log_lock():
+            if self._db_write_log:
+                # Write ahead, so the writes survive a crash before they are committed
+                await asyncio.to_thread(self._db_write_log.append, writes)
+            batch = WriteBatch()
+            _pending_batches.set(
+                tuple(
+                    pending
+                    for pending in _pending_batches.get()
+                    if pending.error or not pending.done
+                )
+                + (batch,)
             )
-        table_name = write[0]
-        operation = write[1]
-        record_id = write[2]
-        row_data = write[2:]
-        worksheet = self.get_table_worksheet(table_name)
-        if operation == WriteOperations.INSERT:
-            logger.debug(f"[ 1 write, 0 read ] INSERT in {worksheet.title}")
-            worksheet.append_row(row_data, table_range="A1")
-        elif operation == WriteOperations.UPDATE:
-            logger.debug(f"[ 1 write, 1 read ] UPDATE in {worksheet.title}")
-            cell = worksheet.find(record_id, in_column=1)
-            worksheet.update(f"A{cell.row}", [row_data])
-        elif operation == WriteOperations.DELETE:
-            logger.debug(f"[ 1 write, 1 read ] DELETE in {worksheet.title}")
-            cell = worksheet.find(record_id, in_column=1)
-            worksheet.delete_rows(cell.row)
-        self._db_write_queue.pop(0)
-
-    async def commit_all_writes(self) -> None:
-        """Commit the write queue to the database"""
+            for write in writes:
+                # Add the write operation to the queue
+                self._db_write_queue.append(write)
+                self._db_write_batches.append(batch)
+                self._db_writes_queued += 1
+                self._track_write_version(write)
+                # Update the local cache
+                self._apply_to_cache(write)
+        # Let the background writer commit the changes
+        if all(self._is_buffered_write(write) for write in writes):
+            self._schedule_buffered_writes()
+        else:
+            self.schedule_writes()
+
+    def _is_buffered_write(self, write: list) -> bool:
+        """Check if a write can wait in the buffer, as an append to a write-only table"""
+        return (
+            write[1] == WriteOperations.INSERT
+            and self.get_cache_policy(write[0]).write_only
+        )
+
+    def _schedule_buffered_writes(self) -> None:
+        """Wake the background writer once the buffer is full, or after a delay"""
+        buffered = sum(map(self._is_buffered_write, self._db_write_queue))
+        if buffered >= constants.LEAGUE_DB_APPEND_BUFFER_MAX_ROWS:
+            self.schedule_writes()
+        elif self._db_append_task is None or self._db_append_task.done():
+            self._db_append_task = asyncio.get_running_loop().create_task(
+                self._append_timer(), name="db-append-timer"
+            )
+
+    async def _append_timer(self) -> None:
+        """Wake the background writer after `LEAGUE_DB_APPEND_BUFFER_SECONDS`"""
+        await asyncio.sleep(constants.LEAGUE_DB_APPEND_BUFFER_SECONDS)
+        self.schedule_writes()
+
+    async def _begin_transaction(self, transaction: Transaction) -> None:
+        """Keep the writes of a transaction in the local cache across pulls"""
+        self._db_transactions.append(transaction)
+
+    async def _commit_transaction(self, transaction: Transaction) -> None:
+        """Queue the writes of a transaction as one batch"""
         try:
-            while len(self._db_write_queue) > 0:
-                await self.commit_next_write()
-                time.sleep(constants.LEAGUE_DB_QUEUE_WRITE_DELAY_SECONDS)
-        except Exception as error:
-            logger.exception(f"Failed to commit write: {error}")
+            await super()._commit_transaction(transaction)
         finally:
-            if len(self._db_write_queue) > 0:
-                logger.warn(f"DB Write Queue Length: {len(self._db_write_queue)}")
+            # kept until queued, for pulls that end while the write log is written
+            self._db_transactions.remove(transaction)
+
+    async def _rollback_transaction(self, transaction: Transaction) -> None:
+        """Undo the writes of a transaction in the local cache"""
+        self._db_transactions.remove(transaction)
+        for write in reversed(transaction.undo):
+            if write is not None:
+                self._apply_to_cache(write)
+        # expire the tables, in case they were pulled during the transaction
+        for table_name in {write[0] for write in transaction.writes}:
+            self._expire_table(table_name)
+        logger.info(f"Rolled back {len(transaction.writes)} write(s)")
+
+    def _get_cached_data(self, write: list) -> list | None | bool:
+        """Get the cached row a write operation would overwrite
+
+        That is the whole table for a `REPLACE`, `None` if there is no such row,
+        or `False` if the table is not cached.
+        """
+        table_name = write[0]
+        if table_name not in self._db_local_cache:
+            return False
+        table = self._db_local_cache[table_name]
+        if write[1] == WriteOperations.REPLACE:
+            return [list(row) for row in table]
+        slot = self._db_cache_index.get(table_name, {}).get(str(write[2]).casefold())
+        return None if slot is None else list(table[slot])
+
+    def _apply_to_cache(self, write: list) -> None:
+        """Apply a write operation to the local cache (if the table is cached)
+
+        This is idempotent, so a write can safely be applied more than once.
+        """
+        table_name, operation, data = write[0], write[1], write[2:]
+        if table_name not in self._db_local_cache:
+            return
+        table = self._db_local_cache[table_name]
+        index = self._db_cache_index.setdefault(table_name, {})
+        if operation == WriteOperations.REPLACE:
+            self._set_cache(table_name, [list(row) for row in data])
+            return
+        key = str(data[0]).casefold()
+        slot = index.get(key)
+        if operation in (WriteOperations.INSERT, WriteOperations.UPDATE):
+            if slot is not None:
+                self._index_row(table_name, key, table[slot], remove=True)
+                table[slot] = data
+            elif operation == WriteOperations.INSERT:
+                index[key] = len(table)
+                table.append(data)
+            else:
+                return
+            self._index_row(table_name, key, data)
+        elif operation == WriteOperations.DELETE and slot is not None:
+            self._index_row(table_name, key, table[slot], remove=True)
+            del table[slot]
+            del index[key]
+            for other_key, other_slot in index.items():
+                if other_slot > slot:
+                    index[other_key] = other_slot - 1
+
+    def _index_row(
+        self,
+        table_name: str,
+        key: str,
+        row: list[int | float | str | None],
+        remove: bool = False,
+    ) -> None:
+        """Add (or remove) a cached row to the secondary indexes of its table"""
+        for column, column_index in self._db_cache_secondary.get(
+            table_name, {}
+        ).items():
+            value = str(row[column] if column < len(row) else "").casefold()
+            if remove:
+                keys = column_index.get(value)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del column_index[value]
+            else:
+                column_index.setdefault(value, set()).add(key)
+
+    def _set_cache(
+        self, table_name: str, table_data: list[list[int | float | str | None]]
+    ) -> None:
+        """Set the cached data of a table and rebuild its indexes"""
+        index = {}
+        for slot, row in enumerate(table_data[1:], start=1):  # skip header row
+            if row:
+                index.setdefault(str(row[0]).casefold(), slot)
+        self._db_local_cache[table_name] = table_data
+        self._db_cache_index[table_name] = index
+        column_indexes = self._db_cache_secondary.get(table_name, {})
+        for column in column_indexes:
+            column_indexes[column] = {}
+        for key, slot in index.items():
+            self._index_row(table_name, key, table_data[slot])
+
+    async def commit_all_writes(self) -> bool:
+        """Commit the write queue to the database
+
+        All pending writes are folded into a single `batch_update` request.
+        Returns whether the commit succeeded (writes queued meanwhile are left
+        for the next one). Batches dropped for conflicts count as committed,
+        and are reported by `flush`. If a commit fails without a clear answer
+        (e.g. it timed out), it may still have been applied, so its INSERTs are
+        looked for on the sheet before they are sent again.
+        A commit refused for good (see `is_permanent_error`) is tried again one
+        batch at a time, until the batch at fault is found and dropped. A
+        permission error (401, 403) would refuse every batch alike, so the
+        whole commit is dropped at once.
+        """
+        async with self._get_write_lock():
+            write_count = len(self._db_write_queue)
+            if write_count == 0:
+                return True
+            if self._db_writes_committed < self._db_isolate_until:
+                first_batch = self._db_write_batches[0]
+                write_count = self._db_write_batches.count(first_batch)
+            sent_inserts = set()
+            try:
+                writes = self._db_write_queue[:write_count]
+                batches = self._db_write_batches[:write_count]
+                plans = plan_writes(writes)
+                lookups = {name: plan.get_lookups() for name, plan in plans.items()}
+                unconfirmed = self._get_unconfirmed_inserts(plans)
+                for table_name, record_ids in unconfirmed.items():
+                    lookups[table_name] += record_ids
+                row_numbers, versions, read_count = await self._find_sheet_rows(lookups)
+                conflicts = self._find_write_conflicts(versions)
+                dropped = self._resolve_write_conflicts(writes, batches, conflicts)
+                if dropped:
+                    plans = plan_writes(
+                        [
+                            write
+                            for write, batch in zip(writes, batches)
+                            if batch not in dropped
+                        ]
+                    )
+                for table_name, record_ids in unconfirmed.items():
+                    # replayed INSERTs of records already in the sheet become UPDATEs
+                    if table_name in plans:
+                        found = [
+                            id for id in record_ids if id in row_numbers[table_name]
+                        ]
+                        plans[table_name].convert_inserts_to_updates(found)
+                requests = []
+                for table_name, plan in plans.items():
+                    worksheet = self.get_table_worksheet(table_name)
+                    requests += plan.get_requests(
+                        worksheet.id,
+                        row_numbers[table_name],
+                        soft_delete=table_name in self._db_soft_delete_tables,
+                    )
+                logger.debug(
+                    f"[ 1 write, {read_count} read ] FLUSH of {write_count} queued write(s) in {list(plans)}"
+                )
+                # tables known unchanged up to now stay so, if only we edit the sheet
+                current_tables = [
+                    table_name
+                    for table_name, count in self._db_revision_commits.items()
+                    if count == self._db_commit_count
+                    and table_name in self._db_cache_revisions
+                ]
+                revisions = (None, None)
+                sent_inserts = {
+                    (table_name, record_id)
+                    for table_name, plan in plans.items()
+                    for record_id in plan.get_insert_ids()
+                }
+                if requests:
+                    revisions = await self._db_scheduler.run(
+                        WRITE,
+                        lambda: self._send_commit(requests, bool(current_tables)),
+                    )
+                committed_writes = [
+                    write
+                    for write, batch in zip(writes, batches)
+                    if batch not in dropped
+                ]
+                del self._db_write_queue[:write_count]
+                del self._db_write_batches[:write_count]
+                self._db_writes_committed += write_count
+                for batch in batches:
+                    batch.done = True
+                for write, batch in zip(writes, batches):
+                    if batch in dropped:
+                        # read the edits made on the sheet, without the dropped writes
+                        self._expire_table(write[0])
+                await self._rewrite_write_log()
+                self._db_unconfirmed_inserts.clear()
+                self._db_commit_count += 1
+                self._carry_revisions(current_tables, *revisions)
+                if self._db_pulls_in_flight:
+                    self._db_recent_commits.append(
+                        (self._db_commit_count, committed_writes)
+                    )
+                for table_name, plan in plans.items():
+                    self._update_sheet_rows(table_name, plan, row_numbers[table_name])
+                self._db_write_versions = {}
+                for write in self._db_write_queue:
+                    self._track_write_version(write)
+                return True
+            except Exception as error:
+                logger.exception(f"Failed to commit write: {error}")
+                if not is_rejection(error):
+                    self._db_unconfirmed_inserts |= sent_inserts
+                if not is_permanent_error(error):
+                    return False
+                batch_count = len(set(self._db_write_batches[:write_count]))
+                if batch_count > 1 and not is_permission_error(error):
+                    # find the batch at fault, and let the others through
+                    self._db_isolate_until = self._db_writes_committed + write_count
+                    return False
+                await self._drop_writes(write_count, error)
+                return True
+            finally:
+                if len(self._db_write_queue) > 0:
+                    logger.warn(f"DB Write Queue Length: {len(self._db_write_queue)}")
+
+    async def _drop_writes(self, write_count: int, error: Exception) -> None:
+        """Drop the first writes of the queue for good, as the API refused them
+
+        They are logged, as they are not kept anywhere else, and their batch
+        is marked with an `EmlWorksheetWriteError` for `flush` to raise.
+        """
+        writes = self._db_write_queue[:write_count]
+        batches = self._db_write_batches[:write_count]
+        logger.error(
+            f"Dropped {write_count} write(s) refused by the Sheets API ({error}):"
+            f" {writes}"
+        )
+        del self._db_write_queue[:write_count]
+        del self._db_write_batches[:write_count]
+        self._db_writes_committed += write_count
+        for batch in batches:
+            batch.done = True
+            batch.error = DbErrors.EmlWorksheetWriteError(
+                f"Writes refused by the Sheets API: {error}"
+            )
+        await self._rewrite_write_log()
+        # read back what the sheet holds, without the dropped writes
+        for table_name in {write[0] for write in writes}:
+            self._expire_table(table_name)
+        self._db_write_versions = {}
+        for write in self._db_write_queue:
+            self._track_write_version(write)
+
+    async def _rewrite_write_log(self) -> None:
+        """Compact the write log down to the write queue (written in a thread)"""
+        if not self._db_write_log:
+            return
+        async with self._get_write_log_lock():
+            writes = list(self._db_write_queue)
+            await asyncio.to_thread(self._db_write_log.rewrite, writes)
+
+    async def _send_commit(
+        self, requests: list[dict], check_revision: bool
+    ) -> tuple[str | None, str | None]:
+        """Send a commit, and get the spreadsheet's last update time around it
+
+        The times are only read if `check_revision` is set (i.e. some cached
+        table could be kept unchanged through the commit).
+        """
+        if not check_revision:
+            await self._db_transport.batch_update(requests)
+            return None, None
+        before = await self._get_revision()
+        await self._db_transport.batch_update(requests)
+        return before, await self._get_revision()
+
+    def _carry_revisions(
+        self, table_names: list[str], before: str | None, after: str | None
+    ) -> None:
+        """Keep tables known unchanged through a commit of ours
+
+        Their revision moves to the spreadsheet's last update time `after` the
+        commit, if it was still theirs just `before` it (i.e. no one else edited
+        the sheet meanwhile). An edit landing during the commit itself cannot be
+        told apart from it, so carried tables are still read again once they
+        are past their `max_staleness_seconds` (see `_fetch_tables`).
+        """
+        self._db_commit_revision = (self._db_commit_count, after)
+        if before is None or after is None:
+            return
+        for table_name in table_names:
+            if self._db_cache_revisions.get(table_name) == before:
+                self._db_cache_revisions[table_name] = after
+                self._db_revision_commits[table_name] = self._db_commit_count
+
+    def _get_unconfirmed_inserts(
+        self, plans: dict[str, WritePlan]
+    ) -> dict[str, list[str]]:
+        """Get the replayed INSERTs of each plan, which may already be committed"""
+        unconfirmed = {}
+        if not self._db_unconfirmed_inserts:
+            return unconfirmed
+        for table_name, plan in plans.items():
+            record_ids = [
+                record_id
+                for record_id in plan.get_insert_ids()
+                if (table_name, record_id) in self._db_unconfirmed_inserts
+            ]
+            if record_ids:
+                unconfirmed[table_name] = record_ids
+        return unconfirmed
+
+    async def _find_sheet_rows(
+        self, lookups: dict[str, list[str]]
+    ) -> tuple[dict[str, dict[str, int]], dict[str, dict[str, str]], int]:
+        """Find the sheet rows of records, using the row index where possible
+
+        Rows known from the index are verified together in one batched read of
+        their first columns. Unknown or mismatched records are found in one batched read of the
+        first columns of their tables, which also rebuilds their row index.
+        The first columns hold the record ID and, in versioned tables, `updated_at`.
+
+        Returns:
+            The sheet rows of the records by table, the `updated_at` of the
+            records in versioned tables, and the number of reads used
+        """
+        row_numbers = {table_name: {} for table_name in lookups}
+        versions = {table_name: {} for table_name in lookups}
+        last_column = gspread.utils.rowcol_to_a1(1, BaseFields.updated_at + 1)[:-1]
+        guesses: list[tuple[str, str, int]] = []
+        misses: list[tuple[str, str]] = []
+        for table_name, record_ids in lookups.items():
+            sheet_rows = self._db_sheet_rows.get(table_name, {})
+            for record_id in record_ids:
+                if record_id in sheet_rows:
+                    guesses.append((table_name, record_id, sheet_rows[record_id]))
+                else:
+                    misses.append((table_name, record_id))
+        read_count = 0
+        if guesses:
+            read_count += 1
+            ranges = [
+                f"{quote_title(name)}!A{row}:{last_column}{row}"
+                for name, _, row in guesses
+            ]
+            values_list = await self._db_scheduler.run(
+                READ, lambda: self._db_transport.values_batch_get(ranges)
+            )
+            for i, (table_name, record_id, row) in enumerate(guesses):
+                values = values_list[i] if i < len(values_list) else None
+                if values and values[0] and str(values[0][0]) == str(record_id):
+                    row_numbers[table_name][record_id] = row
+                    if table_name in self._db_sheet_versions:
+                        versions[table_name][record_id] = get_version(values[0])
+                    continue
+                logger.warning(
+                    f"Row index out of date for '{record_id}' in {table_name}"
+                )
+                self._forget_sheet_rows(table_name)
+                self._expire_table(table_name)
+                misses.append((table_name, record_id))
+        if misses:
+            # index every table with unknown rows from one read of their ID columns
+            read_count += 1
+            table_names = list(dict.fromkeys(table_name for table_name, _ in misses))
+            ranges = [
+                f"{quote_title(table_name)}!A:{last_column}"
+                for table_name in table_names
+            ]
+            columns = await self._db_scheduler.run(
+                READ, lambda: self._db_transport.values_batch_get(ranges)
+            )
+            for table_name, column in zip(table_names, columns):
+                self._index_sheet_rows(table_name, fill_rows(column))
+            for table_name, record_id in misses:
+                row = self._db_sheet_rows[table_name].get(record_id)
+                if row:
+                    row_numbers[table_name][record_id] = row
+                    sheet_versions = self._db_sheet_versions.get(table_name, {})
+                    if record_id in sheet_versions:
+                        versions[table_name][record_id] = sheet_versions[record_id]
+        return row_numbers, versions, read_count
+
+    def _track_write_version(self, write: list) -> None:
+        """Remember the `updated_at` on the sheet that an UPDATE or DELETE is based on"""
+        table_name, operation = write[0], write[1]
+        if operation not in (WriteOperations.UPDATE, WriteOperations.DELETE):
+            return
+        record_id = str(write[2])
+        sheet_versions = self._db_sheet_versions.get(table_name, {})
+        if record_id in sheet_versions:
+            write_versions = self._db_write_versions.setdefault(table_name, {})
+            write_versions.setdefault(record_id, sheet_versions[record_id])
+
+    def _find_write_conflicts(
+        self, versions: dict[str, dict[str, str]]
+    ) -> dict[str, list[str]]:
+        """Get the records edited on the sheet since the pending writes read them"""
+        conflicts = {}
+        for table_name, record_versions in versions.items():
+            write_versions = self._db_write_versions.get(table_name, {})
+            for record_id, version in record_versions.items():
+                if record_id in write_versions and write_versions[record_id] != version:
+                    conflicts.setdefault(table_name, []).append(record_id)
+        return conflicts
+
+    def _resolve_write_conflicts(
+        self,
+        writes: list[list[int | float | str | None]],
+        batches: list["WriteBatch"],
+        conflicts: dict[str, list[str]],
+    ) -> set["WriteBatch"]:
+        """Apply the conflict policy to records edited on the sheet
+
+        Returns the batches to drop: with `KEEP_SHEET`, every batch (e.g. a
+        transaction) with an UPDATE or DELETE of such a record is dropped whole,
+        and marked with an `EmlWorksheetWriteConflict`.
+        """
+        for table_name, record_ids in conflicts.items():
+            logger.warning(
+                f"Records edited on the sheet since they were read from {table_name}"
+                f" ({self._db_conflict_policy}): {record_ids}"
+            )
+        if self._db_conflict_policy != WriteConflictPolicies.KEEP_SHEET:
+            return set()
+        dropped = set()
+        for write, batch in zip(writes, batches):
+            if write[1] in (
+                WriteOperations.UPDATE,
+                WriteOperations.DELETE,
+            ) and str(
+                write[2]
+            ) in conflicts.get(write[0], ()):
+                batch.error = DbErrors.EmlWorksheetWriteConflict(
+                    f"'{write[2]}' was edited in {write[0]} since it was read,"
+                    " so the writes made with it were dropped"
+                )
+                dropped.add(batch)
+        if dropped:
+            dropped_count = sum(batch in dropped for batch in batches)
+            logger.error(f"Dropped {dropped_count} write(s) for conflicts")
+        return dropped
+
+    def _index_sheet_rows(
+        self, table_name: str, table_data: list[list[int | float | str | None]]
+    ) -> None:
+        """Build the row index of a table from data just pulled from the sheet"""
+        sheet_rows = {}
+        for i, row in enumerate(table_data[1:], start=2):  # skip header row
+            if row and row[0] not in sheet_rows and not is_tombstone(row):
+                sheet_rows[row[0]] = i
+        self._db_sheet_rows[table_name] = sheet_rows
+        self._db_sheet_row_counts[table_name] = len(table_data)
+        header = table_data[0] if table_data else []
+        if get_version(header) == BaseFields.updated_at.name:
+            self._db_sheet_versions[table_name] = {
+                str(row[0]): get_version(row)
+                for row in table_data[1:]
+                if row and row[0] not in ("", None) and not is_tombstone(row)
+            }
+
+    def _update_sheet_rows(
+        self, table_name: str, plan: WritePlan, row_numbers: dict[str, int]
+    ) -> None:
+        """Keep the row index of a table correct after its writes are committed"""
+        if plan.replace_rows is not None:
+            self._index_sheet_rows(table_name, plan.replace_rows)
+            return
+        if table_name not in self._db_sheet_rows:
+            return
+        sheet_rows = self._db_sheet_rows[table_name]
+        # Deleted rows shift every row below them up (tombstones stay in place)
+        deleted_rows = sorted(
+            row_numbers[record_id]
+            for record_id in plan.deletes
+            if record_id in row_numbers
+        )
+        if table_name in self._db_soft_delete_tables:
+            for record_id in plan.deletes:
+                sheet_rows.pop(record_id, None)
+        elif deleted_rows:
+            for record_id in plan.deletes:
+                sheet_rows.pop(record_id, None)
+            for record_id, row in sheet_rows.items():
+                sheet_rows[record_id] = row - bisect.bisect_left(deleted_rows, row)
+            self._db_sheet_row_counts[table_name] -= len(deleted_rows)
+        # Inserted rows are appended after the last row
+        for data in plan.inserts:
+            if data is None:
+                continue
+            self._db_sheet_row_counts[table_name] += 1
+            sheet_rows.setdefault(data[0], self._db_sheet_row_counts[table_name])
+        # The sheet now holds the versions just written
+        sheet_versions = self._db_sheet_versions.get(table_name)
+        if sheet_versions is not None:
+            for record_id in plan.deletes:
+                sheet_versions.pop(str(record_id), None)
+            for data in list(plan.updates.values()) + plan.inserts:
+                if data is not None:
+                    sheet_versions[str(data[0])] = get_version(data)
+
+    def _forget_sheet_rows(self, table_name: str) -> None:
+        """Drop the row index of a table, until it is pulled again"""
+        self._db_sheet_rows.pop(table_name, None)
+        self._db_sheet_row_counts.pop(table_name, None)
+        self._db_sheet_versions.pop(table_name, None)
+
+    def _prune_recent_commits(self) -> None:
+        """Forget committed writes that no pull in flight could have missed"""
+        oldest = min(self._db_pulls_in_flight, default=self._db_commit_count)
+        self._db_recent_commits = [
+            (count, writes)
+            for count, writes in self._db_recent_commits
+            if count > oldest
+        ]
+
+    async def archive_rows(
+        self,
+        table_name: str,
+        column: int,
+        before: str,
+        archive: HistoryArchive,
+        key_column: int = 0,
+    ) -> int:
+        """Move the rows whose `column` sorts before `before` to an archive
+
+        The rows are archived before they are deleted from the sheet, so a
+        failure in between may archive them twice, but never loses them.
+        Commits wait meanwhile, so the sheet's row numbers stay valid.
+        """
+        worksheet = self.get_table_worksheet(table_name)
+        async with self._get_write_lock():
+            values_list = await self._db_scheduler.run(
+                READ,
+                lambda: self._db_transport.values_batch_get([quote_title(table_name)]),
+            )
+            table_data = fill_rows(values_list[0])
+            rows, row_numbers = [], []
+            for row_number, row in enumerate(table_data[1:], start=2):
+                if row[column] != "" and str(row[column]) < before:
+                    rows.append(row)
+                    row_numbers.append(row_number)
+            if not rows:
+                return 0
+            await asyncio.to_thread(
+                archive.add_segment, table_name, table_data[0], rows, key_column
+            )
+            requests = delete_rows_requests(worksheet.id, row_numbers)
+            logger.info(
+                f"[ 1 write, 1 read ] Archiving {len(rows)} row(s) of {table_name}"
+            )
+            await self._db_scheduler.run(
+                WRITE, lambda: self._db_transport.batch_update(requests)
+            )
+            # pulls in flight read row numbers that no longer hold
+            self._db_commit_count += 1
+            self._forget_sheet_rows(table_name)
+            self._expire_table(table_name)
+        return len(rows)
+
+    async def compact_tables(self) -> None:
+        """Remove the tombstone rows of all soft-delete worksheets in one batch
+
+        The remaining rows close up in order, and the row index is rebuilt from
+        the same read. Commits wait meanwhile, so the row numbers stay valid.
+        """
+        table_names = sorted(self._db_soft_delete_tables)
+        if not table_names:
+            return
+        async with self._get_write_lock():
+            ranges = [quote_title(table_name) for table_name in table_names]
+            values_list = await self._db_scheduler.run(
+                READ, lambda: self._db_transport.values_batch_get(ranges)
+            )
+            requests = []
+            compacted_tables = {}
+            for table_name, values in zip(table_names, values_list):
+                table_data = fill_rows(values)
+                rows = [
+                    row_number
+                    for row_number, row in enumerate(table_data[1:], start=2)
+                    if is_tombstone(row)
+                ]
+                if not rows:
+                    continue
+                worksheet = self.get_table_worksheet(table_name)
+                requests += delete_rows_requests(worksheet.id, rows)
+                compacted_tables[table_name] = [
+                    row for row in table_data if not is_tombstone(row)
+                ]
+            if not requests:
+                return
+            logger.info(
+                f"[ 1 write, 1 read ] Compacting Tables: {list(compacted_tables)}"
+            )
+            await self._db_scheduler.run(
+                WRITE, lambda: self._db_transport.batch_update(requests)
+            )
+            # pulls in flight read row numbers that no longer hold
+            self._db_commit_count += 1
+            for table_name, table_data in compacted_tables.items():
+                self._index_sheet_rows(table_name, table_data)
+
+    def schedule_compaction(
+        self, hour_utc: int = constants.LEAGUE_DB_COMPACTION_HOUR_UTC
+    ) -> None:
+        """Compact the soft-delete tables in the background, every day at an hour"""
+        if self._db_compaction_task is None or self._db_compaction_task.done():
+            self._db_compaction_task = asyncio.get_running_loop().create_task(
+                self._compaction_worker(hour_utc), name="db-compaction-worker"
+            )
+
+    async def _compaction_worker(self, hour_utc: int) -> None:
+        """Compact the soft-delete tables daily, during quiet hours"""
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug("DB compaction worker started")
+        while True:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            next_run = now.replace(hour=hour_utc, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += datetime.timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            try:
+                await self.compact_tables()
+            except Exception as error:
+                logger.exception(f"Failed to compact tables:\n{error}")
+
+    async def flush(self) -> None:
+        """Wait until all pending writes are committed to the database
+
+        Use this as a barrier before replying when durability matters. Only
+        the writes queued before the call are waited for: writes queued by
+        other tasks meanwhile do not delay it, nor make it fail.
+        Raises the error of any batch queued by this task since its last flush
+        that was dropped (e.g. `EmlWorksheetWriteConflict`).
+        """
+        watermark = self._db_writes_queued
+        while self._db_writes_committed < watermark:
+            isolate_until = self._db_isolate_until
+            if (
+                not await self.commit_all_writes()
+                and self._db_isolate_until == isolate_until
+            ):
+                raise DbErrors.EmlWorksheetWriteError(
+                    f"Failed to commit {watermark - self._db_writes_committed} pending write(s)"
+                )
+        batches = _pending_batches.get()
+        _pending_batches.set(())
+        for batch in batches:
+            if batch.error:
+                raise batch.error
+
+    def is_table_pending(self, table_name: str) -> bool:
+        """Check if a table has writes waiting in the write queue"""
+        return any(write[0] == table_name for write in self._db_write_queue)
+
+    def schedule_writes(self) -> None:
+        """Wake the background writer, starting it if needed"""
+        if self._db_write_signal is None:
+            self._db_write_signal = asyncio.Event()
+        if self._db_write_task is None or self._db_write_task.done():
+            self._db_write_task = asyncio.get_running_loop().create_task(
+                self._write_worker(), name="db-write-worker"
+            )
+        self._db_write_signal.set()
+
+    async def _write_worker(self) -> None:
+        """Drain the write queue in the background
+
+        Failed commits are retried after a pause, except to find the batch at
+        fault in a commit refused for good (see `commit_all_writes`).
+        """
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug("DB write worker started")
+        while True:
+            await self._db_write_signal.wait()
+            self._db_write_signal.clear()
+            isolate_until = self._db_isolate_until
+            if not await self.commit_all_writes():
+                if self._db_isolate_until == isolate_until:
+                    # retry the failed writes after a pause
+                    await asyncio.sleep(constants.LEAGUE_DB_QUEUE_RETRY_DELAY_SECONDS)
+                self._db_write_signal.set()
+            elif self._db_write_queue:
+                # writes queued during the commit go in the next batch
+                self._db_write_signal.set()
+
+    def _get_write_lock(self) -> asyncio.Lock:
+        """Get the lock serializing commits (created inside the event loop)"""
+        if self._db_write_lock is None:
+            self._db_write_lock = asyncio.Lock()
+        return self._db_write_lock
+
+    def _get_write_log_lock(self) -> asyncio.Lock:
+        """Get the lock serializing write log updates (created inside the event loop)"""
+        if self._db_write_log_lock is None:
+            self._db_write_log_lock = asyncio.Lock()
+        return self._db_write_log_lock
 
     async def get_pending_writes(
         self,
@@ -188,3 +1458,55 @@ class CoreDatabase:
     ) -> dict[str, float]:
         """Get all cache times"""
         return self._db_cache_pull_times
+
+
+class WriteBatch:
+    """The writes queued together by one `apply_writes` (e.g. a transaction)
+
+    Attributes:
+        done (bool): Whether the writes left the write queue
+        error (Exception): Why the writes were dropped instead of committed, if so
+    """
+
+    def __init__(self):
+        self.done: bool = False
+        self.error: Exception | None = None
+
+
+_pending_batches: contextvars.ContextVar[tuple[WriteBatch, ...]] = (
+    contextvars.ContextVar("pending_batches", default=())
+)
+"""The batches queued by the current task since it last flushed"""
+
+
+def is_rejection(error: Exception) -> bool:
+    """Check if an error is the API refusing a request, so it was not applied"""
+    return isinstance(error, gspread.exceptions.APIError) and 400 <= error.code < 500
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Check if an error would happen again on retry (e.g. 400, 403, 404)
+
+    Quota (429), timeouts (408), server errors and connection errors are
+    worth retrying; other errors from the API are not, nor a missing worksheet.
+    """
+    if isinstance(error, DbErrors.EmlWorksheetDoesNotExist):
+        return True
+    return is_rejection(error) and error.code not in (408, 429)
+
+
+def is_permission_error(error: Exception) -> bool:
+    """Check if an error is the API refusing access to the spreadsheet"""
+    return is_rejection(error) and error.code in (401, 403)
+
+
+def copy_dict(value: dict | None) -> dict | None:
+    """Copy a dictionary, if there is one"""
+    return None if value is None else dict(value)
+
+
+def get_version(row: list[int | float | str | None]) -> str:
+    """Get the `updated_at` of a row read from the sheet"""
+    if len(row) <= BaseFields.updated_at:
+        return ""
+    return str(row[BaseFields.updated_at])
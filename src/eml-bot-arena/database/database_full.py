@@ -1,4 +1,8 @@
-from database.database_core import CoreDatabase
+from database.base_table import BaseTable
+from database.enums import RequestPriority
+from database.history_archive import HistoryArchive
+from database.request_scheduler import request_priority
+from database.storage_backend import StorageBackend
 from database.table_command_lock import CommandLockTable
 from database.table_cooldown import CooldownTable
 from database.table_league_sub_match import LeagueSubMatchTable
@@ -13,6 +17,9 @@ from database.table_team_invite import TeamInviteTable
 from database.table_team_player import TeamPlayerTable
 from database.table_vw_roster import VwRosterTable
 from database.table_constants import ConstantsTable
+import asyncio
+import constants
+import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,7 +28,7 @@ logger = logging.getLogger(__name__)
 class FullDatabase:
     """Holds all the tables"""
 
-    def __init__(self, core_database: CoreDatabase):
+    def __init__(self, core_database: StorageBackend):
         """Initialize the Database class"""
         self.core_database = core_database
         self.table_command_lock = CommandLockTable(core_database)
@@ -38,4 +45,97 @@ class FullDatabase:
         self.table_team_player = TeamPlayerTable(core_database)
         self.table_vw_roster = VwRosterTable(core_database)
         self.table_constants = ConstantsTable(core_database)
+        self._archive_task: asyncio.Task = None
+        self._expiry_task: asyncio.Task = None
+        self._match_window_task: asyncio.Task = None
+        # Create any missing tables at once
+        core_database.create_missing_tables()
 
+    def transaction(self):
+        """Apply all the writes made inside as one batch at exit, or none of them
+
+        Use as `async with database.transaction():` around the writes of a
+        command, so a failure midway leaves no half-applied changes.
+        """
+        return self.core_database.transaction()
+
+    def _get_tables(self) -> list[BaseTable]:
+        """Get all the tables"""
+        return [table for table in vars(self).values() if isinstance(table, BaseTable)]
+
+    async def delete_expired_records(self) -> int:
+        """Delete the expired records of every table, as one batch"""
+        count = 0
+        async with self.transaction():
+            for table in self._get_tables():
+                count += await table.delete_expired_records()
+        return count
+
+    def schedule_expiry_sweep(self) -> None:
+        """Delete expired records in the background, every few minutes"""
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.get_running_loop().create_task(
+                self._expiry_worker(), name="db-expiry-worker"
+            )
+
+    async def _expiry_worker(self) -> None:
+        """Delete expired records every `LEAGUE_DB_EXPIRY_SWEEP_INTERVAL_SECONDS`"""
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug("DB expiry worker started")
+        while True:
+            try:
+                count = await self.delete_expired_records()
+                if count:
+                    logger.info(f"Deleted {count} expired record(s)")
+            except Exception as error:
+                logger.exception(f"Failed to delete expired records:\n{error}")
+            await asyncio.sleep(constants.LEAGUE_DB_EXPIRY_SWEEP_INTERVAL_SECONDS)
+
+    def schedule_match_window_check(self) -> None:
+        """Switch the Match cache policy on match windows, in the background"""
+        if self._match_window_task is None or self._match_window_task.done():
+            self._match_window_task = asyncio.get_running_loop().create_task(
+                self._match_window_worker(), name="db-match-window-worker"
+            )
+
+    async def _match_window_worker(self) -> None:
+        """Check for match windows every `LEAGUE_DB_MATCH_WINDOW_CHECK_INTERVAL_SECONDS`"""
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug("DB match window worker started")
+        while True:
+            try:
+                await self.table_match.update_cache_policy()
+            except Exception as error:
+                logger.exception(f"Failed to check for match windows:\n{error}")
+            await asyncio.sleep(constants.LEAGUE_DB_MATCH_WINDOW_CHECK_INTERVAL_SECONDS)
+
+    async def archive_history(self, archive: HistoryArchive, days: int) -> int:
+        """Move the history of every table older than some days to an archive"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        before = (now - datetime.timedelta(days=days)).isoformat()
+        count = 0
+        for table in self._get_tables():
+            count += await table.archive_history(archive, before)
+        return count
+
+    def schedule_history_archive(self, archive: HistoryArchive) -> None:
+        """Archive old history in the background, at startup and then every day or so"""
+        if self._archive_task is None or self._archive_task.done():
+            self._archive_task = asyncio.get_running_loop().create_task(
+                self._archive_worker(archive), name="db-archive-worker"
+            )
+
+    async def _archive_worker(self, archive: HistoryArchive) -> None:
+        """Keep only `LEAGUE_DB_HISTORY_ARCHIVE_DAYS` of history in the database"""
+        request_priority.set(RequestPriority.BACKGROUND)
+        logger.debug("DB archive worker started")
+        # a pass at startup, so restarts don't keep putting it off
+        while True:
+            try:
+                count = await self.archive_history(
+                    archive, constants.LEAGUE_DB_HISTORY_ARCHIVE_DAYS
+                )
+                logger.info(f"Archived {count} history record(s)")
+            except Exception as error:
+                logger.exception(f"Failed to archive history:\n{error}")
+            await asyncio.sleep(constants.LEAGUE_DB_HISTORY_ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,386 @@
+from database.cache_policy import CachePolicy
+from database.enums import WriteOperations
+from database.history_archive import HistoryArchive
+from database.storage_backend import StorageBackend, Transaction
+import errors.database_errors as DbErrors
+import asyncio
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteDatabase(StorageBackend):
+    """SQLite Database
+
+    Stores the tables in a local SQLite file, so reads and writes take
+    milliseconds and are not subject to any API quota. Each table gets a real
+    index on its record ID and on every column passed to `add_table_index`.
+
+    Values are stored as text, the way the Google Sheet reads them back, and
+    compared case-insensitively (`casefold`), like the table finders do.
+
+    A Google Sheets database can be given as a `mirror`: every write is then
+    also queued to the Sheet, for staff to look at. The mirror is only read to
+    seed local tables that are still empty (see `prefetch_tables`).
+
+    A `transaction()` is a SQLite transaction on the one connection, so writes
+    from other tasks wait until it ends, rather than joining it. Reads from
+    other tasks do see its writes meanwhile, as with the Sheets cache.
+
+    Attributes:
+        _db_connection (sqlite3.Connection): The connection to the SQLite file
+        _db_fields (dict): The field names of each table
+        _db_index_names (dict): The indexed field names of each table
+        _db_mirror (StorageBackend): Where writes are mirrored to, if anywhere
+        _db_transaction_lock (asyncio.Lock): Held while a transaction is open
+    """
+
+    def __init__(self, database_file: str, mirror: StorageBackend = None):
+        """Initialize the Database class"""
+        logger.debug(f"Opening SQLite Database: {database_file}")
+        self._db_connection = sqlite3.connect(database_file, isolation_level=None)
+        self._db_connection.create_collation("CASEFOLD", compare_casefold)
+        self._db_connection.execute("PRAGMA journal_mode=WAL")
+        self._db_connection.execute("PRAGMA synchronous=NORMAL")
+        self._db_fields: dict[str, list[str]] = {}
+        self._db_index_names: dict[str, set[str]] = {}
+        self._db_mirror: StorageBackend = mirror
+        self._db_transaction_lock: asyncio.Lock = None
+
+    def add_table(self, table_name: str, field_names: list[str]) -> None:
+        """Make sure a table exists, with a column for each field name"""
+        self._db_fields[table_name] = list(field_names)
+        columns = [f"{quote_name(field_names[0])} TEXT UNIQUE COLLATE CASEFOLD"]
+        columns += [f"{quote_name(name)} TEXT" for name in field_names[1:]]
+        self._db_connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote_name(table_name)} ({', '.join(columns)})"
+        )
+        # Fields added since the table was created
+        existing = self._db_connection.execute(
+            f"PRAGMA table_info({quote_name(table_name)})"
+        ).fetchall()
+        existing_names = [column[1] for column in existing]
+        for name in field_names:
+            if name not in existing_names:
+                logger.info(f"Adding column '{name}' to SQLite table {table_name}")
+                self._db_connection.execute(
+                    f"ALTER TABLE {quote_name(table_name)} ADD COLUMN {quote_name(name)} TEXT"
+                )
+        if self._db_mirror:
+            self._db_mirror.add_table(table_name, field_names)
+
+    def add_table_index(self, table_name: str, columns: list[int]) -> None:
+        """Maintain an index on some columns of a table"""
+        if table_name not in self._db_fields:
+            logger.warning(f"Index not added to unknown SQLite table {table_name}")
+            return
+        index_names = self._db_index_names.setdefault(table_name, set())
+        for column in columns:
+            name = self._db_fields[table_name][column]
+            index_names.add(name)
+            self._db_connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote_name(f'ix_{table_name}_{name}')}"
+                f" ON {quote_name(table_name)} ({quote_name(name)} COLLATE CASEFOLD)"
+            )
+
+    def set_cache_policy(self, table_name: str, policy: CachePolicy) -> None:
+        """Pass the cache policy of a table on to the mirror"""
+        if self._db_mirror:
+            self._db_mirror.set_cache_policy(table_name, policy)
+
+    def enable_soft_delete(self, table_name: str) -> None:
+        """Soft-delete on the mirror (local rows are removed right away)"""
+        if self._db_mirror:
+            self._db_mirror.enable_soft_delete(table_name)
+
+    def create_missing_tables(self) -> None:
+        """Create the tables missing from the mirror (local ones already exist)"""
+        if self._db_mirror:
+            self._db_mirror.create_missing_tables()
+
+    async def start(self) -> None:
+        """Start the mirror's background work"""
+        if self._db_mirror:
+            await self._db_mirror.start()
+
+    async def prefetch_tables(self, table_names: list[str] = None) -> None:
+        """Seed local tables that are still empty from the mirror
+
+        Defaults to every table registered through `add_table_index` (i.e. every
+        `BaseTable`). All of them are read from the mirror in a single request.
+        """
+        if not self._db_mirror:
+            return
+        if table_names is None:
+            table_names = list(self._db_index_names.keys())
+        empty_tables = [
+            table_name
+            for table_name in table_names
+            if not self._select(table_name, limit=1)
+        ]
+        if not empty_tables:
+            return
+        logger.info(f"Seeding SQLite tables from the mirror: {empty_tables}")
+        try:
+            await self._db_mirror.prefetch_tables(empty_tables)
+            writes = []
+            for table_name in empty_tables:
+                table_data = await self._db_mirror.get_table_data(table_name)
+                for row in table_data[1:]:  # skip header row
+                    if row and row[0] not in (None, ""):
+                        writes.append([table_name, WriteOperations.INSERT] + list(row))
+            async with self._get_transaction_lock():
+                self._execute_writes(writes)
+        except Exception as error:
+            logger.exception(f"Failed to seed SQLite tables from the mirror:\n{error}")
+
+    async def get_table_data(
+        self, table_name: str
+    ) -> list[list[int | float | str | None]]:
+        """Get all the data from a table, header row included"""
+        return [list(self._db_fields[table_name])] + self._select(table_name)
+
+    async def get_table_row(
+        self, table_name: str, record_id: str
+    ) -> list[int | float | str | None] | None:
+        """Get a single row of a table by its record ID"""
+        key_name = self._db_fields[table_name][0]
+        where = f"WHERE {quote_name(key_name)} = ? COLLATE CASEFOLD"
+        rows = self._select(table_name, where, [sql_value(record_id)], limit=1)
+        return rows[0] if rows else None
+
+    async def find_table_rows(
+        self, table_name: str, filters: dict[int, int | float | str]
+    ) -> list[list[int | float | str | None]]:
+        """Get the candidate rows of a table for a set of column filters
+
+        Only the record ID and indexed columns are filtered on here. Candidates
+        are returned in table order, and still need to be matched against every
+        filter by the caller.
+        """
+        field_names = self._db_fields[table_name]
+        indexed_names = self._db_index_names.get(table_name, set())
+        conditions, parameters = [], []
+        for column, value in filters.items():
+            name = field_names[column]
+            if column == 0 or name in indexed_names:
+                conditions.append(f"{quote_name(name)} = ? COLLATE CASEFOLD")
+                parameters.append(sql_value(value))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._select(table_name, where, parameters)
+
+    async def append_row(
+        self, table_name: str, row_data: list[int | float | str | None]
+    ) -> None:
+        """Insert a record into a table"""
+        await self.apply_writes([[table_name, WriteOperations.INSERT] + row_data])
+
+    async def update_row(
+        self, table_name: str, row_data: list[int | float | str | None]
+    ) -> None:
+        """Update a record in a table"""
+        await self.apply_writes([[table_name, WriteOperations.UPDATE] + row_data])
+
+    async def delete_row(self, table_name: str, record_id: str) -> None:
+        """Delete a record from a table"""
+        await self.apply_writes([[table_name, WriteOperations.DELETE, record_id]])
+
+    async def replace_table(
+        self, table_name: str, table_data: list[list[int | float | str | None]]
+    ) -> None:
+        """Replace all the data in a table (the first row is the header)"""
+        await self.apply_writes([[table_name, WriteOperations.REPLACE] + table_data])
+
+    async def apply_writes(self, writes: list[list[int | float | str | None]]) -> None:
+        """Apply a batch of write operations in one transaction, then mirror them
+
+        Inside a `transaction()`, the writes are only committed, and mirrored,
+        when it ends.
+        """
+        transaction = self.get_transaction()
+        if transaction is not None:
+            self._execute_writes(writes)
+            transaction.writes += writes
+            return
+        async with self._get_transaction_lock():
+            self._execute_writes(writes)
+        if self._db_mirror:
+            await self._db_mirror.apply_writes(writes)
+
+    async def _begin_transaction(self, transaction: Transaction) -> None:
+        """Open a SQLite transaction, once no other one is open"""
+        await self._get_transaction_lock().acquire()
+        try:
+            self._db_connection.execute("BEGIN")
+        except sqlite3.Error as error:
+            self._db_transaction_lock.release()
+            raise DbErrors.EmlWorksheetWriteError(f"Error writing to SQLite: {error}")
+
+    async def _commit_transaction(self, transaction: Transaction) -> None:
+        """Commit the SQLite transaction, then mirror its writes as one batch"""
+        try:
+            self._db_connection.execute("COMMIT")
+        except sqlite3.Error as error:
+            self._db_connection.execute("ROLLBACK")
+            raise DbErrors.EmlWorksheetWriteError(f"Error writing to SQLite: {error}")
+        finally:
+            self._db_transaction_lock.release()
+        if self._db_mirror and transaction.writes:
+            await self._db_mirror.apply_writes(transaction.writes)
+
+    async def _rollback_transaction(self, transaction: Transaction) -> None:
+        """Roll the SQLite transaction back"""
+        try:
+            self._db_connection.execute("ROLLBACK")
+        finally:
+            self._db_transaction_lock.release()
+        logger.info(f"Rolled back {len(transaction.writes)} write(s)")
+
+    async def archive_rows(
+        self,
+        table_name: str,
+        column: int,
+        before: str,
+        archive: HistoryArchive,
+        key_column: int = 0,
+    ) -> int:
+        """Move the rows whose `column` sorts before `before` to an archive
+
+        With a mirror, its copy of the rows is the one archived, and the local
+        rows are only deleted.
+        """
+        name = quote_name(self._db_fields[table_name][column])
+        where = f"WHERE {name} <> '' AND {name} < ?"
+        if self._db_mirror:
+            count = await self._db_mirror.archive_rows(
+                table_name, column, before, archive, key_column
+            )
+        else:
+            rows = self._select(table_name, where, [before])
+            if rows:
+                await asyncio.to_thread(
+                    archive.add_segment,
+                    table_name,
+                    self._db_fields[table_name],
+                    rows,
+                    key_column,
+                )
+            count = len(rows)
+        try:
+            async with self._get_transaction_lock():
+                self._db_connection.execute(
+                    f"DELETE FROM {quote_name(table_name)} {where}", [before]
+                )
+        except sqlite3.Error as error:
+            raise DbErrors.EmlWorksheetWriteError(f"Error writing to SQLite: {error}")
+        return count
+
+    async def compact_tables(self) -> None:
+        """Compact the mirror (local rows are removed right away)"""
+        if self._db_mirror:
+            await self._db_mirror.compact_tables()
+
+    async def get_pending_writes(self) -> list[list[int | float | str | None]]:
+        """Get all write operations not yet mirrored"""
+        if not self._db_mirror:
+            return []
+        return await self._db_mirror.get_pending_writes()
+
+    def _execute_writes(self, writes: list[list[int | float | str | None]]) -> None:
+        """Execute write operations all together, or none of them
+
+        Inside an open transaction, they are only committed with it.
+        """
+        cursor = self._db_connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT writes")
+            for write in writes:
+                if len(write) < 3:
+                    logger.warning(
+                        f"Write operation discarded for missing data: {write}"
+                    )
+                    continue
+                self._execute_write(cursor, write[0], write[1], write[2:])
+            cursor.execute("RELEASE writes")
+        except sqlite3.Error as error:
+            cursor.execute("ROLLBACK TO writes")
+            cursor.execute("RELEASE writes")
+            raise DbErrors.EmlWorksheetWriteError(f"Error writing to SQLite: {error}")
+        finally:
+            cursor.close()
+
+    def _execute_write(
+        self, cursor: sqlite3.Cursor, table_name: str, operation: str, data: list
+    ) -> None:
+        """Execute one write operation"""
+        table = quote_name(table_name)
+        field_names = self._db_fields[table_name]
+        names = [quote_name(name) for name in field_names]
+        if operation == WriteOperations.REPLACE:
+            cursor.execute(f"DELETE FROM {table}")
+            for row in data[1:]:  # skip header row
+                self._execute_write(cursor, table_name, WriteOperations.INSERT, row)
+            return
+        values = [sql_value(value) for value in data[: len(field_names)]]
+        values += [None] * (len(field_names) - len(values))
+        if operation == WriteOperations.INSERT:
+            updates = ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(names)})"
+                f" VALUES ({', '.join('?' * len(names))})"
+                f" ON CONFLICT ({names[0]}) DO UPDATE SET {updates}",
+                values,
+            )
+        elif operation == WriteOperations.UPDATE:
+            updates = ", ".join(f"{name} = ?" for name in names[1:])
+            cursor.execute(
+                f"UPDATE {table} SET {updates} WHERE {names[0]} = ?",
+                values[1:] + values[:1],
+            )
+        elif operation == WriteOperations.DELETE:
+            cursor.execute(f"DELETE FROM {table} WHERE {names[0]} = ?", values[:1])
+
+    def _get_transaction_lock(self) -> asyncio.Lock:
+        """Get the lock held by open transactions (created inside the event loop)"""
+        if self._db_transaction_lock is None:
+            self._db_transaction_lock = asyncio.Lock()
+        return self._db_transaction_lock
+
+    def _select(
+        self,
+        table_name: str,
+        where: str = "",
+        parameters: list = None,
+        limit: int = None,
+    ) -> list[list[int | float | str | None]]:
+        """Select the rows of a table in table order, empty values as `""`"""
+        names = ", ".join(quote_name(name) for name in self._db_fields[table_name])
+        query = f"SELECT {names} FROM {quote_name(table_name)} {where} ORDER BY rowid"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        try:
+            rows = self._db_connection.execute(query, parameters or []).fetchall()
+        except sqlite3.Error as error:
+            raise DbErrors.EmlWorksheetReadError(f"Error reading SQLite: {error}")
+        return [["" if value is None else value for value in row] for row in rows]
+
+
+def compare_casefold(a: str, b: str) -> int:
+    """SQLite collation comparing text the way `str.casefold` does"""
+    a, b = a.casefold(), b.casefold()
+    return (a > b) - (a < b)
+
+
+def quote_name(name: str) -> str:
+    """Quote a table or column name for use in SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_value(value: int | float | str | None) -> str | None:
+    """Convert a value to the text the Google Sheet would read back"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    return str(value)
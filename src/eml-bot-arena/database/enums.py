@@ -1,4 +1,4 @@
-from enum import EnumCheck, StrEnum, verify
+from enum import EnumCheck, IntEnum, StrEnum, verify
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +13,23 @@ class WriteOperations(StrEnum):
     INSERT = "INSERT"
     UPDATE = "UPDATE"
     DELETE = "DELETE"
+    REPLACE = "REPLACE"
+
+
+@verify(EnumCheck.UNIQUE)
+class WriteConflictPolicies(StrEnum):
+    """Lookup for what to do when a record was edited on the sheet since it was read"""
+
+    OVERWRITE = "OVERWRITE"  # The bot's write wins
+    KEEP_SHEET = "KEEP_SHEET"  # The edit on the sheet wins, the bot's batch is dropped
+
+
+@verify(EnumCheck.UNIQUE)
+class RequestPriority(IntEnum):
+    """Lookup for the priority of Sheets API calls (lower goes first)"""
+
+    INTERACTIVE = 0  # A command is waiting on the call
+    BACKGROUND = 1  # Background flushes and cache refreshes
 
 
 ### Common ###
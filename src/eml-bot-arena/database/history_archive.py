@@ -0,0 +1,89 @@
+import datetime
+import gzip
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+History Archive
+
+Old rows moved out of the live spreadsheet, into compressed local files.
+"""
+
+
+class HistoryArchive:
+    """A directory of gzipped JSONL segments, with an index of their records
+
+    Each segment holds some rows of one table, as one JSON object per line
+    (field name to value). `index.json` maps the key of each archived row (by
+    table) to the segments holding it, so `find_rows` only opens those.
+    Files are replaced atomically, and a segment is written before the index
+    points at it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self._index_path: str = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+
+    def add_segment(
+        self,
+        table_name: str,
+        header: list[str],
+        rows: list[list[int | float | str | None]],
+        key_column: int = 0,
+    ) -> str:
+        """Archive rows of a table in a new segment, indexed by `key_column`"""
+        timestamp = datetime.datetime.now(datetime.timezone.utc)
+        segment = f"{table_name}/{timestamp.strftime('%Y%m%dT%H%M%S%fZ')}.jsonl.gz"
+        lines = [json.dumps(dict(zip(header, row)), default=str) for row in rows]
+        content = gzip.compress("\n".join(lines).encode("utf-8") + b"\n")
+        write_file(os.path.join(self.directory, segment), content)
+        index = self.read_index()
+        table_index = index.setdefault(
+            table_name, {"key_field": header[key_column], "segments": {}}
+        )
+        for row in rows:
+            key = str(row[key_column]).casefold()
+            segments = table_index["segments"].setdefault(key, [])
+            if segment not in segments:
+                segments.append(segment)
+        write_file(self._index_path, json.dumps(index).encode("utf-8"))
+        logger.info(f"Archived {len(rows)} row(s) of {table_name} to {segment}")
+        return segment
+
+    def find_rows(self, table_name: str, key: str) -> list[dict]:
+        """Get the archived rows of a table with a key (e.g. record ID), oldest first"""
+        table_index = self.read_index().get(table_name)
+        if not table_index:
+            return []
+        key = str(key).casefold()
+        rows = []
+        for segment in table_index["segments"].get(key, []):
+            segment_path = os.path.join(self.directory, segment)
+            with gzip.open(segment_path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    row = json.loads(line)
+                    if str(row.get(table_index["key_field"])).casefold() == key:
+                        rows.append(row)
+        return rows
+
+    def read_index(self) -> dict[str, dict]:
+        """Read the index of archived rows, by table"""
+        if not os.path.exists(self._index_path):
+            return {}
+        with open(self._index_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+
+def write_file(file_path: str, content: bytes) -> None:
+    """Durably replace a file with some content"""
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
@@ -0,0 +1,146 @@
+from database.enums import RequestPriority
+from typing import Awaitable, Callable
+import constants
+import errors.database_errors as DbErrors
+import asyncio
+import collections
+import contextvars
+import gspread
+import heapq
+import itertools
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Request Scheduler
+
+Keeps Sheets API calls within the per-minute read and write quotas.
+"""
+
+READ = "read"
+WRITE = "write"
+
+request_priority: contextvars.ContextVar[RequestPriority] = contextvars.ContextVar(
+    "request_priority", default=RequestPriority.INTERACTIVE
+)
+"""Priority of the Sheets API calls made by the current task"""
+
+
+class RequestScheduler:
+    """Token buckets over a sliding window, one for reads and one for writes
+
+    A call waits for a free token of its kind. When calls are queued, the one
+    with the best `request_priority` (then the oldest) goes first. A call
+    rejected for quota (429) is retried after a back-off with jitter: its whole
+    kind is paused for half of it, and each retried call waits its own share
+    of the rest. Any other error (e.g. 403) is raised immediately. A call gives
+    up when it would wait more than `LEAGUE_DB_QUOTA_MAX_WAIT_SECONDS` in all.
+    """
+
+    def __init__(
+        self,
+        reads_per_window: int = constants.LEAGUE_DB_QUOTA_READS_PER_MINUTE,
+        writes_per_window: int = constants.LEAGUE_DB_QUOTA_WRITES_PER_MINUTE,
+        window_seconds: float = 60,
+    ):
+        self._limits: dict[str, int] = {
+            READ: reads_per_window,
+            WRITE: writes_per_window,
+        }
+        self._window_seconds: float = window_seconds
+        self._granted: dict[str, collections.deque] = {
+            READ: collections.deque(),
+            WRITE: collections.deque(),
+        }
+        self._waiting: dict[str, list] = {READ: [], WRITE: []}
+        self._paused_until: dict[str, float] = {READ: 0.0, WRITE: 0.0}
+        self._dispatchers: dict[str, asyncio.Task] = {}
+        self._sequence = itertools.count()
+
+    async def run(self, kind: str, call: Callable[[], Awaitable]):
+        """Make a Sheets API call of a kind (`READ` or `WRITE`) within its quota"""
+        priority = request_priority.get()
+        deadline = time.monotonic() + constants.LEAGUE_DB_QUOTA_MAX_WAIT_SECONDS
+        for attempt in itertools.count():
+            await self.acquire(kind, priority, deadline - time.monotonic())
+            try:
+                return await call()
+            except gspread.exceptions.APIError as error:
+                if (
+                    error.code != 429
+                    or attempt >= constants.LEAGUE_DB_QUOTA_MAX_RETRIES
+                    or deadline - time.monotonic()
+                    < constants.LEAGUE_DB_QUOTA_BACKOFF_BASE_SECONDS
+                ):
+                    raise
+                delay = self._back_off(kind, attempt, deadline)
+                logger.warning(
+                    f"Sheets {kind} quota exceeded, backing off for {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    async def acquire(
+        self,
+        kind: str,
+        priority: RequestPriority,
+        timeout: float = constants.LEAGUE_DB_QUOTA_MAX_WAIT_SECONDS,
+    ) -> None:
+        """Wait for a token of a kind, queueing by priority under pressure"""
+        if not self._waiting[kind] and self._get_delay(kind) <= 0:
+            self._granted[kind].append(time.monotonic())
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting[kind], (priority, next(self._sequence), future))
+        dispatcher = self._dispatchers.get(kind)
+        if dispatcher is None or dispatcher.done():
+            self._dispatchers[kind] = asyncio.get_running_loop().create_task(
+                self._dispatch(kind), name=f"db-quota-{kind}"
+            )
+        try:
+            await asyncio.wait_for(future, timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            raise DbErrors.EmlDatabaseTimeout(f"Sheets {kind} quota exhausted")
+
+    async def _dispatch(self, kind: str) -> None:
+        """Hand out tokens of a kind to the queued calls, best priority first"""
+        waiting = self._waiting[kind]
+        while waiting:
+            delay = self._get_delay(kind)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, future = heapq.heappop(waiting)
+            if future.done():
+                continue  # gave up waiting
+            self._granted[kind].append(time.monotonic())
+            future.set_result(None)
+
+    def _get_delay(self, kind: str) -> float:
+        """Get how long until a token of a kind is free"""
+        now = time.monotonic()
+        granted = self._granted[kind]
+        while granted and granted[0] <= now - self._window_seconds:
+            granted.popleft()
+        delay = self._paused_until[kind] - now
+        if len(granted) >= self._limits[kind]:
+            delay = max(delay, granted[0] + self._window_seconds - now)
+        return delay
+
+    def _back_off(self, kind: str, attempt: int, deadline: float) -> float:
+        """Get an exponential delay with jitter, ending by a deadline
+
+        All calls of the kind are paused for the first half of the delay; the
+        jitter is left to the retried call, so that calls rejected together
+        are not retried together.
+        """
+        now = time.monotonic()
+        ceiling = min(
+            constants.LEAGUE_DB_QUOTA_BACKOFF_MAX_SECONDS,
+            constants.LEAGUE_DB_QUOTA_BACKOFF_BASE_SECONDS * 2**attempt,
+            deadline - now,
+        )
+        self._paused_until[kind] = max(self._paused_until[kind], now + ceiling / 2)
+        return random.uniform(ceiling / 2, ceiling)
@@ -0,0 +1,442 @@
+from database.sheets_transport import HttpErrorResponse
+import collections
+import datetime
+import gspread
+import json
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Fake Sheets
+
+An in-memory stand-in for the parts of `gspread` the database uses, so the bot
+can run (and be measured) without a live Google spreadsheet. Every API call is
+counted, and can be slowed down or fail with a quota error (429) on purpose.
+
+    client = FakeClient(latency_seconds=0.2, quota_error_rate=0.05)
+    database_core = CoreDatabase(client, "https://fake/spreadsheet")
+    ...
+    client.calls  # e.g. Counter({"values_batch_get": 3, "batch_update": 1})
+"""
+
+
+class FakeClient:
+    """Fake `gspread.Client`, holding in-memory spreadsheets by URL
+
+    Attributes:
+        latency_seconds (float): Delay added to every API call
+        quota_error_rate (float): Chance (0 to 1) of an API call failing with 429
+        calls (collections.Counter): Number of API calls made, by method name
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        quota_error_rate: float = 0.0,
+        seed: int = None,
+    ):
+        self.latency_seconds: float = latency_seconds
+        self.quota_error_rate: float = quota_error_rate
+        self.calls: collections.Counter = collections.Counter()
+        self._spreadsheets: dict[str, FakeSpreadsheet] = {}
+        self._random = random.Random(seed)
+        self._forced_errors: list[int] = []
+        self._lock = threading.RLock()
+
+    def open_by_url(self, url: str) -> "FakeSpreadsheet":
+        """Open a spreadsheet, creating it empty the first time"""
+        self._api_call("open_by_url")
+        with self._lock:
+            if url not in self._spreadsheets:
+                spreadsheet_id = f"fake{len(self._spreadsheets)}"
+                self._spreadsheets[url] = FakeSpreadsheet(self, spreadsheet_id, url)
+            return self._spreadsheets[url]
+
+    def set_timeout(self, timeout: float) -> None:
+        """Accepted for compatibility, calls never time out"""
+
+    def fail_next(self, count: int = 1, status_code: int = 429) -> None:
+        """Make the next `count` API calls fail with an HTTP error"""
+        with self._lock:
+            self._forced_errors += [status_code] * count
+
+    def reset_counters(self) -> None:
+        """Forget all the API calls made so far"""
+        with self._lock:
+            self.calls.clear()
+
+    def _api_call(self, method: str) -> None:
+        """Count an API call, wait out its latency and maybe fail it"""
+        with self._lock:
+            self.calls[method] += 1
+            status_code = self._forced_errors.pop(0) if self._forced_errors else None
+            if status_code is None and self._random.random() < self.quota_error_rate:
+                status_code = 429
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if status_code is not None:
+            raise api_error(status_code, f"Fake error on '{method}'")
+
+
+class FakeSpreadsheet:
+    """Fake `gspread.Spreadsheet`"""
+
+    def __init__(self, client: FakeClient, spreadsheet_id: str, url: str):
+        self.client: FakeClient = client
+        self.id: str = spreadsheet_id
+        self.url: str = url
+        self.title: str = "Fake Spreadsheet"
+        self._worksheets: list[FakeWorksheet] = []
+        self._next_sheet_id: int = 0
+        self._contents_hash: int = None
+        self._last_update_time: str = None
+
+    def worksheets(self, exclude_hidden: bool = False) -> list["FakeWorksheet"]:
+        """Get all the worksheets"""
+        self.client._api_call("fetch_sheet_metadata")
+        with self.client._lock:
+            return list(self._worksheets)
+
+    def worksheet(self, title: str) -> "FakeWorksheet":
+        """Get a worksheet by title"""
+        self.client._api_call("fetch_sheet_metadata")
+        with self.client._lock:
+            return self._get_worksheet(title)
+
+    def add_worksheet(
+        self, title: str, rows: int, cols: int, index: int = None
+    ) -> "FakeWorksheet":
+        """Add an empty worksheet"""
+        self.client._api_call("batch_update")
+        with self.client._lock:
+            return self._add_worksheet(title, rows, cols)
+
+    def del_worksheet(self, worksheet: "FakeWorksheet") -> None:
+        """Delete a worksheet"""
+        self.client._api_call("batch_update")
+        with self.client._lock:
+            self._worksheets.remove(worksheet)
+
+    def get_lastUpdateTime(self) -> str:
+        """Get when anything in the spreadsheet last changed (Drive `modifiedTime`)"""
+        self.client._api_call("get_file_drive_metadata")
+        with self.client._lock:
+            contents = [(ws.title, ws._rows) for ws in self._worksheets]
+            contents_hash = hash(json.dumps(contents, default=str))
+            if contents_hash != self._contents_hash:
+                self._contents_hash = contents_hash
+                self._last_update_time = datetime.datetime.now(
+                    datetime.timezone.utc
+                ).isoformat()
+            return self._last_update_time
+
+    def values_get(self, range_name: str, params: dict = None) -> dict:
+        """Get the values of one A1 range"""
+        self.client._api_call("values_get")
+        with self.client._lock:
+            return self._get_value_range(range_name)
+
+    def values_batch_get(self, ranges: list[str], params: dict = None) -> dict:
+        """Get the values of many A1 ranges"""
+        self.client._api_call("values_batch_get")
+        with self.client._lock:
+            value_ranges = [self._get_value_range(name) for name in ranges]
+            return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+    def batch_update(self, body: dict) -> dict:
+        """Apply `spreadsheets.batchUpdate` requests, all or nothing"""
+        self.client._api_call("batch_update")
+        with self.client._lock:
+            snapshot = [
+                (ws, [list(row) for row in ws._rows]) for ws in self._worksheets
+            ]
+            worksheets = list(self._worksheets)
+            try:
+                replies = [self._apply_request(request) for request in body["requests"]]
+            except Exception:
+                self._worksheets = worksheets
+                for worksheet, rows in snapshot:
+                    worksheet._rows = rows
+                raise
+            return {"spreadsheetId": self.id, "replies": replies}
+
+    def _add_worksheet(
+        self, title: str, rows: int, cols: int, sheet_id: int = None
+    ) -> "FakeWorksheet":
+        """Add an empty worksheet (no API call)"""
+        if any(worksheet.title == title for worksheet in self._worksheets):
+            raise api_error(400, f"A sheet with the name '{title}' already exists")
+        if sheet_id is None:
+            sheet_id = self._next_sheet_id
+        self._next_sheet_id = max(self._next_sheet_id, sheet_id) + 1
+        worksheet = FakeWorksheet(self, sheet_id, title, rows, cols)
+        self._worksheets.append(worksheet)
+        return worksheet
+
+    def _get_worksheet(self, title: str) -> "FakeWorksheet":
+        """Get a worksheet by title (no API call)"""
+        for worksheet in self._worksheets:
+            if worksheet.title == title:
+                return worksheet
+        raise gspread.WorksheetNotFound(title)
+
+    def _get_worksheet_by_id(self, sheet_id: int) -> "FakeWorksheet":
+        """Get a worksheet by ID (no API call)"""
+        for worksheet in self._worksheets:
+            if worksheet.id == sheet_id:
+                return worksheet
+        raise api_error(400, f"No grid with id: {sheet_id}")
+
+    def _get_value_range(self, range_name: str) -> dict:
+        """Get the values of one A1 range, as the API returns them"""
+        title, _, cells = range_name.rpartition("!")
+        if not title:
+            title, cells = cells, ""
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        try:
+            worksheet = self._get_worksheet(title)
+        except gspread.WorksheetNotFound:
+            raise api_error(400, f"Unable to parse range: {range_name}")
+        grid = gspread.utils.a1_range_to_grid_range(cells) if cells else {}
+        values = worksheet._get_values(
+            grid.get("startRowIndex", 0),
+            grid.get("endRowIndex"),
+            grid.get("startColumnIndex", 0),
+            grid.get("endColumnIndex"),
+        )
+        value_range = {"range": range_name, "majorDimension": "ROWS"}
+        if values:
+            value_range["values"] = values
+        return value_range
+
+    def _apply_request(self, request: dict) -> dict:
+        """Apply one `batchUpdate` request"""
+        kind, body = next(iter(request.items()))
+        if kind == "addSheet":
+            properties = body.get("properties", {})
+            grid = properties.get("gridProperties", {})
+            worksheet = self._add_worksheet(
+                properties["title"],
+                grid.get("rowCount", 1000),
+                grid.get("columnCount", 26),
+                properties.get("sheetId"),
+            )
+            worksheet.frozen_row_count = grid.get("frozenRowCount", 0)
+            return {"addSheet": {"properties": worksheet._properties}}
+        if kind == "deleteSheet":
+            self._worksheets.remove(self._get_worksheet_by_id(body["sheetId"]))
+        elif kind == "appendCells":
+            worksheet = self._get_worksheet_by_id(body["sheetId"])
+            worksheet._append([row_values(row) for row in body.get("rows", [])])
+        elif kind == "updateCells":
+            start = body.get("start") or body.get("range", {})
+            worksheet = self._get_worksheet_by_id(start["sheetId"])
+            if "rows" in body:
+                worksheet._set_values(
+                    start.get("rowIndex", start.get("startRowIndex", 0)),
+                    start.get("columnIndex", start.get("startColumnIndex", 0)),
+                    [row_values(row) for row in body["rows"]],
+                )
+            else:
+                worksheet._clear_values(body["range"])
+        elif kind == "deleteDimension":
+            grid = body["range"]
+            worksheet = self._get_worksheet_by_id(grid["sheetId"])
+            if grid.get("dimension") == "ROWS":
+                del worksheet._rows[grid.get("startIndex", 0) : grid.get("endIndex")]
+        elif kind not in ("repeatCell", "updateSheetProperties"):
+            raise api_error(400, f"Unsupported request: {kind}")
+        return {}
+
+
+class FakeWorksheet:
+    """Fake `gspread.Worksheet`, keeping its cells as a list of rows"""
+
+    def __init__(
+        self,
+        spreadsheet: FakeSpreadsheet,
+        sheet_id: int,
+        title: str,
+        rows: int,
+        cols: int,
+    ):
+        self.spreadsheet: FakeSpreadsheet = spreadsheet
+        self.client: FakeClient = spreadsheet.client
+        self.id: int = sheet_id
+        self.title: str = title
+        self.row_count: int = rows
+        self.col_count: int = cols
+        self.frozen_row_count: int = 0
+        self._rows: list[list[int | float | str | bool | None]] = []
+
+    @property
+    def _properties(self) -> dict:
+        return {
+            "sheetId": self.id,
+            "title": self.title,
+            "sheetType": "GRID",
+            "gridProperties": {
+                "rowCount": self.row_count,
+                "columnCount": self.col_count,
+                "frozenRowCount": self.frozen_row_count,
+            },
+        }
+
+    def get_all_values(self) -> list[list[str]]:
+        """Get all the values, padded to the same width"""
+        self.client._api_call("values_get")
+        with self.client._lock:
+            values = self._get_values(0, None, 0, None)
+        width = max((len(row) for row in values), default=0)
+        return [row + [""] * (width - len(row)) for row in values]
+
+    def append_row(self, values: list, **kwargs) -> dict:
+        """Append a row after the last row with data"""
+        return self.append_rows([values], **kwargs)
+
+    def append_rows(self, values: list[list], **kwargs) -> dict:
+        """Append rows after the last row with data"""
+        self.client._api_call("values_append")
+        with self.client._lock:
+            self._append([list(row) for row in values])
+        return {"updates": {"updatedRows": len(values)}}
+
+    def find(self, query: str, in_column: int = None, **kwargs) -> gspread.cell.Cell:
+        """Find the first cell with a value, optionally in one (1-based) column"""
+        self.client._api_call("values_get")
+        with self.client._lock:
+            for row_index, row in enumerate(self._rows):
+                for col_index, value in enumerate(row):
+                    if in_column is not None and col_index != in_column - 1:
+                        continue
+                    if format_value(value) == str(query):
+                        return gspread.cell.Cell(
+                            row_index + 1, col_index + 1, format_value(value)
+                        )
+        return None
+
+    def update(self, range_name: str, values: list[list] = None, **kwargs) -> dict:
+        """Write rows of values starting at the top left cell of an A1 range"""
+        if isinstance(range_name, list):
+            range_name, values = values, range_name  # update(values, range_name)
+        self.client._api_call("values_update")
+        grid = gspread.utils.a1_range_to_grid_range(range_name or "A1")
+        with self.client._lock:
+            self._set_values(
+                grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0), values
+            )
+        return {"updatedRows": len(values)}
+
+    def delete_rows(self, start_index: int, end_index: int = None) -> dict:
+        """Delete rows by 1-based index, inclusive"""
+        self.client._api_call("batch_update")
+        with self.client._lock:
+            del self._rows[start_index - 1 : end_index or start_index]
+        return {}
+
+    def clear(self) -> dict:
+        """Clear all the values"""
+        self.client._api_call("values_clear")
+        with self.client._lock:
+            self._rows = []
+        return {}
+
+    def format(self, ranges: str, format: dict) -> dict:
+        """Accepted for compatibility, formats are not kept"""
+        self.client._api_call("batch_update")
+        return {}
+
+    def freeze(self, rows: int = None, cols: int = None) -> dict:
+        """Freeze the first rows"""
+        self.client._api_call("batch_update")
+        if rows is not None:
+            self.frozen_row_count = rows
+        return {}
+
+    def _last_row(self) -> int:
+        """Get the number of rows up to the last one with data"""
+        last = len(self._rows)
+        while last > 0 and all(value in (None, "") for value in self._rows[last - 1]):
+            last -= 1
+        return last
+
+    def _append(self, rows: list[list]) -> None:
+        """Append rows after the last row with data (no API call)"""
+        del self._rows[self._last_row() :]
+        self._rows += rows
+
+    def _set_values(self, row_index: int, col_index: int, rows: list[list]) -> None:
+        """Write rows of values from a 0-based cell (no API call)"""
+        for i, values in enumerate(rows):
+            while len(self._rows) <= row_index + i:
+                self._rows.append([])
+            row = self._rows[row_index + i]
+            if len(row) < col_index + len(values):
+                row += [None] * (col_index + len(values) - len(row))
+            row[col_index : col_index + len(values)] = values
+
+    def _clear_values(self, grid: dict) -> None:
+        """Clear the values in a grid range (no API call)"""
+        start_col = grid.get("startColumnIndex", 0)
+        end_col = grid.get("endColumnIndex")
+        for row in self._rows[grid.get("startRowIndex", 0) : grid.get("endRowIndex")]:
+            stop = len(row) if end_col is None else min(end_col, len(row))
+            row[start_col:stop] = [None] * max(stop - start_col, 0)
+
+    def _get_values(
+        self, start_row: int, end_row: int | None, start_col: int, end_col: int | None
+    ) -> list[list[str]]:
+        """Get formatted values as the API does, without trailing empty cells"""
+        values = []
+        for row in self._rows[
+            start_row : min(end_row or self._last_row(), self._last_row())
+        ]:
+            row_values = [format_value(value) for value in row[start_col:end_col]]
+            while row_values and row_values[-1] == "":
+                row_values.pop()
+            values.append(row_values)
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+
+def api_error(status_code: int, message: str) -> gspread.exceptions.APIError:
+    """Build the error `gspread` raises for an HTTP error response"""
+    statuses = {
+        400: "INVALID_ARGUMENT",
+        403: "PERMISSION_DENIED",
+        429: "RESOURCE_EXHAUSTED",
+    }
+    body = {
+        "error": {
+            "code": status_code,
+            "message": message,
+            "status": statuses.get(status_code, "UNKNOWN"),
+        }
+    }
+    return gspread.exceptions.APIError(HttpErrorResponse(status_code, json.dumps(body)))
+
+
+def format_value(value: int | float | str | bool | None) -> str:
+    """Format a cell value the way the API returns it (`FORMATTED_VALUE`)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def row_values(row_data: dict) -> list[int | float | str | bool | None]:
+    """Convert a Sheets API `RowData` to a list of cell values"""
+    values = []
+    for cell in row_data.get("values", []):
+        entered = cell.get("userEnteredValue", {})
+        values.append(next(iter(entered.values()), None))
+    return values
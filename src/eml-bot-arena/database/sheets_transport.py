@@ -0,0 +1,137 @@
+import constants
+import errors.database_errors as DbErrors
+import asyncio
+import concurrent.futures
+import functools
+import gspread
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Sheets Transports
+
+The runtime Sheets v4 operations used by the database, behind one interface so
+the HTTP implementation can be swapped (see `DB_TRANSPORT` in `main.py`).
+"""
+
+
+class SheetsTransport:
+    """Base class for the ways of talking to the Sheets v4 API
+
+    All ranges are A1 notation (e.g. `'Player'` or `'Player'!A2`).
+    Errors from the API are raised as `gspread.exceptions.APIError`.
+    """
+
+    async def values_get(self, range: str) -> list[list[str]]:
+        """Get the values of one range"""
+        raise NotImplementedError
+
+    async def values_batch_get(self, ranges: list[str]) -> list[list[list[str]]]:
+        """Get the values of many ranges in one request, in the same order"""
+        raise NotImplementedError
+
+    async def batch_update(self, requests: list[dict]) -> dict:
+        """Apply a list of `spreadsheets.batchUpdate` requests in one request"""
+        raise NotImplementedError
+
+    async def get_last_update_time(self) -> str:
+        """Get when anything in the spreadsheet last changed (Drive `modifiedTime`)"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release any connections held by the transport"""
+
+
+class GspreadTransport(SheetsTransport):
+    """Sheets transport using `gspread`, with its blocking calls in a thread pool
+
+    A call that times out cannot be stopped, and a write may still be applied
+    after it: every later call waits for that write to finish first.
+    """
+
+    def __init__(
+        self,
+        spreadsheet: gspread.Spreadsheet,
+        max_workers: int = constants.LEAGUE_DB_EXECUTOR_MAX_WORKERS,
+    ):
+        self._spreadsheet = spreadsheet
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db-io"
+        )
+        self._running_write: asyncio.Future = None
+
+    async def values_get(self, range: str) -> list[list[str]]:
+        """Get the values of one range"""
+        response = await self._run_blocking(self._spreadsheet.values_get, range)
+        return response.get("values", [])
+
+    async def values_batch_get(self, ranges: list[str]) -> list[list[list[str]]]:
+        """Get the values of many ranges in one request, in the same order"""
+        response = await self._run_blocking(self._spreadsheet.values_batch_get, ranges)
+        value_ranges = response.get("valueRanges", [])
+        return [value_range.get("values", []) for value_range in value_ranges]
+
+    async def batch_update(self, requests: list[dict]) -> dict:
+        """Apply a list of `spreadsheets.batchUpdate` requests in one request"""
+        return await self._run_blocking(
+            self._spreadsheet.batch_update, {"requests": requests}, write=True
+        )
+
+    async def get_last_update_time(self) -> str:
+        """Get when anything in the spreadsheet last changed (Drive `modifiedTime`)"""
+        return await self._run_blocking(self._spreadsheet.get_lastUpdateTime)
+
+    async def close(self) -> None:
+        """Release any connections held by the transport"""
+        self._executor.shutdown(wait=False)
+
+    async def _run_blocking(self, func, *args, write: bool = False):
+        """Run a blocking Sheets call in the I/O thread pool, with a timeout
+
+        If a `write` times out, it is kept track of until it finishes.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = constants.LEAGUE_DB_REQUEST_TIMEOUT_SECONDS
+        name = getattr(func, "__name__", func)
+        if self._running_write is not None:
+            done, _ = await asyncio.wait({self._running_write}, timeout=timeout)
+            if not done:
+                raise DbErrors.EmlDatabaseTimeout(
+                    f"Sheets call '{name}' waited too long for a write still running"
+                )
+            self._running_write = None
+        future = loop.run_in_executor(self._executor, functools.partial(func, *args))
+        if write:
+            # no one awaits it after a timeout: mark its error as retrieved
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        try:
+            async with asyncio.timeout(timeout):
+                return await (asyncio.shield(future) if write else future)
+        except asyncio.TimeoutError:
+            if write:
+                self._running_write = future
+            raise DbErrors.EmlDatabaseTimeout(f"Sheets call '{name}' timed out")
+
+
+class HttpErrorResponse:
+    """The parts of a `requests.Response` that `gspread.exceptions.APIError` reads"""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self) -> dict:
+        return json.loads(self.text)
+
+
+def fill_rows(values: list[list[str]]) -> list[list[str]]:
+    """Pad rows to the same width, as `gspread`'s `get_all_values` does"""
+    width = max((len(row) for row in values), default=0)
+    return [row + [""] * (width - len(row)) for row in values]
+
+
+def quote_title(title: str) -> str:
+    """Quote a worksheet title for use in an A1 range"""
+    return "'" + title.replace("'", "''") + "'"
@@ -0,0 +1,126 @@
+from database.sheets_transport import HttpErrorResponse, SheetsTransport
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2.service_account import Credentials
+import constants
+import errors.database_errors as DbErrors
+import aiohttp
+import asyncio
+import gspread
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Sheets Transport (aiohttp)
+
+Talks to the Sheets v4 REST API natively over a pooled, keep-alive HTTP session.
+"""
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+DRIVE_API_URL = "https://www.googleapis.com/drive/v3/files"
+SHEETS_API_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+class AiohttpTransport(SheetsTransport):
+    """Sheets transport using `aiohttp`, without any threads
+
+    The HTTP session (and its connection pool) is created on first use, inside
+    the event loop, and kept open for the life of the bot. The service account
+    token is reused until it expires.
+    """
+
+    def __init__(
+        self,
+        credentials_file: str,
+        spreadsheet_id: str,
+        max_connections: int = constants.LEAGUE_DB_HTTP_MAX_CONNECTIONS,
+    ):
+        self._credentials = Credentials.from_service_account_file(
+            credentials_file, scopes=SHEETS_API_SCOPES
+        )
+        self._spreadsheet_url = f"{SHEETS_API_URL}/{spreadsheet_id}"
+        self._drive_file_url = f"{DRIVE_API_URL}/{spreadsheet_id}"
+        self._max_connections = max_connections
+        self._session: aiohttp.ClientSession = None
+        self._token_lock: asyncio.Lock = None
+
+    async def values_get(self, range: str) -> list[list[str]]:
+        """Get the values of one range"""
+        # batchGet takes the range as a query parameter, avoiding path escaping
+        values_list = await self.values_batch_get([range])
+        return values_list[0] if values_list else []
+
+    async def values_batch_get(self, ranges: list[str]) -> list[list[list[str]]]:
+        """Get the values of many ranges in one request, in the same order"""
+        params = [("ranges", range) for range in ranges]
+        response = await self._request(
+            "GET", f"{self._spreadsheet_url}/values:batchGet", params=params
+        )
+        value_ranges = response.get("valueRanges", [])
+        return [value_range.get("values", []) for value_range in value_ranges]
+
+    async def batch_update(self, requests: list[dict]) -> dict:
+        """Apply a list of `spreadsheets.batchUpdate` requests in one request"""
+        return await self._request(
+            "POST", f"{self._spreadsheet_url}:batchUpdate", body={"requests": requests}
+        )
+
+    async def get_last_update_time(self) -> str:
+        """Get when anything in the spreadsheet last changed (Drive `modifiedTime`)"""
+        params = [("fields", "modifiedTime"), ("supportsAllDrives", "true")]
+        response = await self._request("GET", self._drive_file_url, params=params)
+        return response["modifiedTime"]
+
+    async def close(self) -> None:
+        """Release any connections held by the transport"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _request(
+        self, method: str, url: str, params: list = None, body: dict = None
+    ) -> dict:
+        """Send an authorized request to the Sheets (or Drive) API"""
+        session = self._get_session()
+        headers = {"Authorization": f"Bearer {await self._get_token()}"}
+        try:
+            async with session.request(
+                method, url, params=params, json=body, headers=headers
+            ) as response:
+                text = await response.text()
+                if response.status >= 400:
+                    raise gspread.exceptions.APIError(
+                        HttpErrorResponse(response.status, text)
+                    )
+                return json.loads(text) if text else {}
+        except asyncio.TimeoutError:
+            raise DbErrors.EmlDatabaseTimeout(f"Sheets request timed out: {url}")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled HTTP session, creating it inside the event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._max_connections,
+                keepalive_timeout=constants.LEAGUE_DB_HTTP_KEEPALIVE_SECONDS,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=constants.LEAGUE_DB_REQUEST_TIMEOUT_SECONDS
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def _get_token(self) -> str:
+        """Get the service account token, refreshing it only when expired"""
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if not self._credentials.valid:
+                logger.debug("Refreshing Sheets API token")
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None, self._credentials.refresh, GoogleAuthRequest()
+                )
+        return self._credentials.token
@@ -0,0 +1,228 @@
+from database.cache_policy import CachePolicy
+from database.enums import WriteOperations
+from database.history_archive import HistoryArchive
+import contextlib
+import contextvars
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Storage Backend
+
+The operations the tables need from a database, so the engine behind them can be
+swapped (see `DB_BACKEND` in `main.py`).
+"""
+
+
+class StorageBackend:
+    """Base class for the databases the tables can be stored in
+
+    Tables are lists of rows, and the first row is the header (field names).
+    The first column of every table is its record ID, and record IDs are
+    matched case-insensitively.
+    ## Setup:
+    - `add_table(table_name, field_names)`: Make sure a table exists
+    - `add_table_index(table_name, columns)`: Index some columns of a table
+    - `set_cache_policy(table_name, policy)`: Say how a table should be cached
+    - `enable_soft_delete(table_name)`: Mark deleted rows instead of removing them
+    - `create_missing_tables()`: Create all the tables that do not exist yet
+    - `start()`: Start any background work, once the event loop is running
+    ## Read:
+    - `prefetch_tables(table_names)`: Get tables ready to be read quickly
+    - `get_table_data(table_name)`: Get all the rows of a table, header included
+    - `get_table_row(table_name, record_id)`: Get a row by its record ID
+    - `find_table_rows(table_name, filters)`: Get the candidate rows for some filters
+    ## Write:
+    - `append_row(table_name, row_data)`: Insert a row
+    - `update_row(table_name, row_data)`: Update a row by its record ID
+    - `delete_row(table_name, record_id)`: Delete a row by its record ID
+    - `replace_table(table_name, table_data)`: Replace all the rows of a table
+    - `apply_writes(writes)`: Apply a batch of `[table_name, operation, *data]` writes
+    - `flush()`: Wait until all writes are durable
+    - `transaction()`: Apply all the writes made inside as one batch, or none
+    ## Maintenance:
+    - `archive_rows(table_name, column, before, archive)`: Move old rows to an archive
+    - `compact_tables()`: Remove the rows marked as deleted
+    """
+
+    def add_table(self, table_name: str, field_names: list[str]) -> None:
+        """Make sure a table exists, with the given field names"""
+        raise NotImplementedError
+
+    def add_table_index(self, table_name: str, columns: list[int]) -> None:
+        """Maintain an index on some columns of a table"""
+        raise NotImplementedError
+
+    def set_cache_policy(self, table_name: str, policy: CachePolicy) -> None:
+        """Say how a table should be cached, for databases that cache tables"""
+
+    def enable_soft_delete(self, table_name: str) -> None:
+        """Mark the deleted rows of a table, for databases where removing them is slow"""
+
+    def create_missing_tables(self) -> None:
+        """Create all the tables added with `add_table` that do not exist yet"""
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        """Start any background work, once the event loop is running"""
+
+    async def prefetch_tables(self, table_names: list[str] = None) -> None:
+        """Get tables ready to be read quickly (all of them by default)"""
+
+    async def get_table_data(
+        self, table_name: str
+    ) -> list[list[int | float | str | None]]:
+        """Get all the data from a table, header row included"""
+        raise NotImplementedError
+
+    async def get_table_row(
+        self, table_name: str, record_id: str
+    ) -> list[int | float | str | None] | None:
+        """Get a single row of a table by its record ID"""
+        raise NotImplementedError
+
+    async def find_table_rows(
+        self, table_name: str, filters: dict[int, int | float | str]
+    ) -> list[list[int | float | str | None]]:
+        """Get the candidate rows of a table for a set of column filters
+
+        Candidates are returned in table order, and still need to be matched
+        against every filter by the caller.
+        """
+        raise NotImplementedError
+
+    async def append_row(
+        self, table_name: str, row_data: list[int | float | str | None]
+    ) -> None:
+        """Insert a record into a table"""
+        raise NotImplementedError
+
+    async def update_row(
+        self, table_name: str, row_data: list[int | float | str | None]
+    ) -> None:
+        """Update a record in a table"""
+        raise NotImplementedError
+
+    async def delete_row(self, table_name: str, record_id: str) -> None:
+        """Delete a record from a table"""
+        raise NotImplementedError
+
+    async def replace_table(
+        self, table_name: str, table_data: list[list[int | float | str | None]]
+    ) -> None:
+        """Replace all the data in a table"""
+        raise NotImplementedError
+
+    async def apply_writes(self, writes: list[list[int | float | str | None]]) -> None:
+        """Apply a batch of `[table_name, operation, *data]` write operations"""
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        """Wait until all writes are durable"""
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        """Apply all the writes made inside as one batch at exit, or none of them
+
+        Reads inside the transaction already see its writes. If an exception
+        escapes, the writes are rolled back instead. A transaction opened inside
+        another one (in the same task) joins it.
+        """
+        if self.get_transaction() is not None:
+            yield
+            return
+        transaction = Transaction(self)
+        await self._begin_transaction(transaction)
+        token = _current_transaction.set(transaction)
+        try:
+            yield
+        except BaseException:
+            _current_transaction.reset(token)
+            await self._rollback_transaction(transaction)
+            raise
+        _current_transaction.reset(token)
+        await self._commit_transaction(transaction)
+
+    def get_transaction(self) -> "Transaction | None":
+        """Get the transaction open on this database in the current task, if any"""
+        transaction = _current_transaction.get()
+        if transaction is None or transaction.backend is not self:
+            return None
+        return transaction
+
+    async def _begin_transaction(self, transaction: "Transaction") -> None:
+        """Prepare for the writes of a transaction"""
+
+    async def _commit_transaction(self, transaction: "Transaction") -> None:
+        """Apply the writes of a transaction as one batch"""
+        if transaction.writes:
+            await self.apply_writes(transaction.writes)
+
+    async def _rollback_transaction(self, transaction: "Transaction") -> None:
+        """Undo the writes of a transaction"""
+        raise NotImplementedError
+
+    async def archive_rows(
+        self,
+        table_name: str,
+        column: int,
+        before: str,
+        archive: HistoryArchive,
+        key_column: int = 0,
+    ) -> int:
+        """Move the rows whose `column` sorts before `before` to an archive
+
+        Rows with an empty `column` are kept. Returns the number of rows moved.
+        """
+        raise NotImplementedError
+
+    async def compact_tables(self) -> None:
+        """Remove the rows marked as deleted (see `enable_soft_delete`)"""
+
+    async def get_pending_writes(self) -> list[list[int | float | str | None]]:
+        """Get all write operations that are not durable yet"""
+        return []
+
+    async def get_cache_times(self) -> dict[str, float]:
+        """Get the time each cached table was last read from storage"""
+        return {}
+
+
+class Transaction:
+    """The writes made inside a `StorageBackend.transaction()`
+
+    Attributes:
+        backend (StorageBackend): The database the transaction is open on
+        writes (list): The `[table_name, operation, *data]` writes, in order
+        undo (list): Writes that restore what the transaction overwrote, if used
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend: StorageBackend = backend
+        self.writes: list[list[int | float | str | None]] = []
+        self.undo: list[list[int | float | str | None]] = []
+
+
+_current_transaction: contextvars.ContextVar[Transaction | None] = (
+    contextvars.ContextVar("current_transaction", default=None)
+)
+
+
+def get_undo_write(
+    write: list[int | float | str | None],
+    old_data: list | None,
+) -> list[int | float | str | None] | None:
+    """Get the write that restores what a write operation overwrote
+
+    `old_data` is the row with the same record ID before the write (or the
+    whole table, header included, for a `REPLACE`), or `None` if there was none.
+    """
+    table_name, operation = write[0], write[1]
+    if operation == WriteOperations.REPLACE:
+        return [table_name, WriteOperations.REPLACE] + list(old_data)
+    if old_data is None:
+        if operation == WriteOperations.DELETE:
+            return None
+        return [table_name, WriteOperations.DELETE, write[2]]
+    return [table_name, WriteOperations.INSERT] + list(old_data)
@@ -1,8 +1,9 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
+from database.cache_policy import SLOW_CACHE_POLICY
 from database.enums import Bool
 from database.fields import CommandLockFields
 from database.records import CommandLockRecord
+from database.storage_backend import StorageBackend
 import constants
 import gspread
 import logging
@@ -17,10 +18,12 @@ CommandLock Table
 class CommandLockTable(BaseTable):
     """A class to manipulate the CommandLock table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [CommandLockFields.command_name]
+    _cache_policy = SLOW_CACHE_POLICY
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the CommandLock Table class"""
         super().__init__(
             db,
@@ -69,9 +72,11 @@ class CommandLockTable(BaseTable):
         if is_allowed is not None:
             is_allowed = Bool.TRUE if is_allowed else Bool.FALSE
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id, command_name=command_name
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched record
             if (
                 (
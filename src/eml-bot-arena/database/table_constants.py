@@ -1,8 +1,9 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
+from database.cache_policy import SLOW_CACHE_POLICY
 from database.enums import Bool
 from database.fields import ConstantsFields
 from database.records import ConstantsRecord
+from database.storage_backend import StorageBackend
 import constants
 import gspread
 import logging
@@ -17,10 +18,11 @@ Constants Table
 class ConstantsTable(BaseTable):
     """A class to manipulate the Constants table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _cache_policy = SLOW_CACHE_POLICY
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the ConstantsLock Table class"""
         super().__init__(
             db,
@@ -33,9 +35,9 @@ class ConstantsTable(BaseTable):
     ) -> list[ConstantsRecord]:
         """Get an existing Constants record"""
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(name=name)
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched record
             if (
                 (
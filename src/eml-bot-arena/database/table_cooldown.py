@@ -1,7 +1,7 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import CooldownFields
 from database.records import CooldownRecord
+from database.storage_backend import StorageBackend
 import constants
 import gspread
 import utils.general_helpers as general_helpers
@@ -17,10 +17,13 @@ Cooldown Table
 class CooldownTable(BaseTable):
     """A class to manipulate the Cooldown table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [CooldownFields.player_id]
+    _soft_delete = True
+    _expires_field = CooldownFields.expires_at
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Cooldown Table class"""
         super().__init__(
             db, constants.LEAGUE_DB_TAB_COOLDOWN, CooldownRecord, CooldownFields
@@ -81,22 +84,19 @@ class CooldownTable(BaseTable):
     ) -> list[CooldownRecord]:
         """Get an existing Cooldown record
 
-        Note: Since this has to walk the whole table anyway, this is also used to clean up expired records
+        Expired records are left out (see `delete_expired_records`)
         """
-        # Prepare for expired records
+        # Prepare to leave out expired records
         now = await general_helpers.epoch_timestamp()
-        expired_records = []
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(record_id=record_id, player_id=player_id)
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for expired record
             expiration_epoch = int(
                 await general_helpers.epoch_timestamp(row[CooldownFields.expires_at])
             )
             if int(now) > expiration_epoch:
-                expired_record = CooldownRecord(row)
-                expired_records.append(expired_record)
                 continue
             # Check for matched record
             if (
@@ -116,8 +116,5 @@ class CooldownTable(BaseTable):
                 # Add matched record
                 existing_record = CooldownRecord(row)
                 existing_records.append(existing_record)
-        # Delete expired records
-        for expired_record in expired_records:
-            await self.delete_cooldown_record(expired_record)
         # Return matched records
         return existing_records
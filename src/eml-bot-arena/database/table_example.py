@@ -1,7 +1,7 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import ExampleFields
 from database.records import ExampleRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -17,10 +17,10 @@ Example Table
 class ExmapleTable(BaseTable):
     """A class to manipulate the Example table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Example Table class"""
         super().__init__(
             db, constants.LEAGUE_DB_TAB_EXAMPLE, ExampleRecord, ExampleFields
@@ -61,9 +61,9 @@ class ExmapleTable(BaseTable):
     ) -> ExampleRecord:
         """Get an existing Example record"""
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(record_id=record_id)
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched record
             if (
                 (
@@ -1,7 +1,7 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import LeagueSubMatchFields
 from database.records import LeagueSubMatchRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -17,10 +17,15 @@ LeagueSubMatch Table
 class LeagueSubMatchTable(BaseTable):
     """A class to manipulate the LeagueSubMatch table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [
+        LeagueSubMatchFields.match_id,
+        LeagueSubMatchFields.player_id,
+        LeagueSubMatchFields.team_id,
+    ]
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the LeagueSubMatch Table class"""
         super().__init__(
             db,
@@ -90,9 +95,14 @@ class LeagueSubMatchTable(BaseTable):
     ) -> list[LeagueSubMatchRecord]:
         """Get existing LeagueSubMatch records"""
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            match_id=match_id,
+            player_id=player_id,
+            team_id=team_id,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched record
             if (
                 (
@@ -1,8 +1,8 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import LeagueSubMatchInviteFields
 from database.enums import InviteStatus
 from database.records import LeagueSubMatchInviteRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -19,10 +19,17 @@ LeagueSubMatchInvite Table
 class LeagueSubMatchInviteTable(BaseTable):
     """A class to manipulate the LeagueSubMatchInvite table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [
+        LeagueSubMatchInviteFields.match_id,
+        LeagueSubMatchInviteFields.sub_player_id,
+        LeagueSubMatchInviteFields.team_id,
+    ]
+    _soft_delete = True
+    _expires_field = LeagueSubMatchInviteFields.invite_expires_at
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the LeagueSubMatchInvite Table class"""
         super().__init__(
             db,
@@ -93,22 +100,24 @@ class LeagueSubMatchInviteTable(BaseTable):
         invite_status: InviteStatus = None,
     ) -> list[LeagueSubMatchInviteRecord]:
         """Get existing LeagueSubMatchInvite records
-        Note: Since this has to walk the whole table anyway, this is also used to clean up expired records
+        Expired records are left out (see `delete_expired_records`)
         """
-        # Prepare for expired records
+        # Prepare to leave out expired records
         now = await general_helpers.epoch_timestamp()
-        expired_records = []
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            match_id=match_id,
+            sub_player_id=sub_player_id,
+            team_id=team_id,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for expired record
             expiration_epoch = await general_helpers.epoch_timestamp(
                 row[LeagueSubMatchInviteFields.invite_expires_at]
             )
             if now > expiration_epoch:
-                expired_record = LeagueSubMatchInviteRecord(row)
-                expired_records.append(expired_record)
                 continue
             # Check for matched record
             if (
@@ -140,8 +149,5 @@ class LeagueSubMatchInviteTable(BaseTable):
                 # Add matched record
                 existing_record = LeagueSubMatchInviteRecord(row)
                 existing_records.append(existing_record)
-        # Delete expired records
-        for expired_record in expired_records:
-            await self.delete_league_sub_match_invite_record(expired_record)
         # Return matched records
         return existing_records
@@ -1,9 +1,11 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
+from database.cache_policy import DEFAULT_CACHE_POLICY, FAST_CACHE_POLICY
 from database.enums import MatchType, MatchStatus
 from database.fields import MatchFields
 from database.records import MatchRecord
+from database.storage_backend import StorageBackend
 import constants
+import datetime
 import errors.database_errors as DbErrors
 import gspread
 from utils import general_helpers, match_helpers
@@ -20,13 +22,56 @@ Match Table
 class MatchTable(BaseTable):
     """A class to manipulate the Match table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [
+        MatchFields.match_week,
+        MatchFields.team_a_id,
+        MatchFields.team_b_id,
+    ]
+    _cache_policy = DEFAULT_CACHE_POLICY
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Match Table class"""
         super().__init__(db, constants.LEAGUE_DB_TAB_MATCH, MatchRecord, MatchFields)
 
+    async def update_cache_policy(self) -> bool:
+        """Cache the table with the fast policy during match windows only
+
+        A match window opens `LEAGUE_DB_MATCH_WINDOW_BEFORE_SECONDS` before a
+        scheduled match and closes `LEAGUE_DB_MATCH_WINDOW_AFTER_SECONDS` after
+        it, while results are reported and edited on the sheet.
+        Returns whether a match window is open.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        window_start = now - datetime.timedelta(
+            seconds=constants.LEAGUE_DB_MATCH_WINDOW_AFTER_SECONDS
+        )
+        window_end = now + datetime.timedelta(
+            seconds=constants.LEAGUE_DB_MATCH_WINDOW_BEFORE_SECONDS
+        )
+        in_match_window = False
+        for row in await self.get_table_rows():
+            try:
+                match_time = datetime.datetime.fromisoformat(
+                    str(row[MatchFields.match_timestamp])
+                )
+            except ValueError:
+                continue
+            if match_time.tzinfo is None:
+                match_time = match_time.replace(tzinfo=datetime.timezone.utc)
+            if window_start <= match_time <= window_end:
+                in_match_window = True
+                break
+        policy = FAST_CACHE_POLICY if in_match_window else DEFAULT_CACHE_POLICY
+        if policy is not self._cache_policy:
+            logger.info(
+                f"Match window {'opened' if in_match_window else 'closed'} for '{self.table_name}'"
+            )
+            self._cache_policy = policy
+            self._db.set_cache_policy(self.table_name, policy)
+        return in_match_window
+
     async def create_match_record(
         self,
         match_epoch: int,
@@ -130,9 +175,14 @@ class MatchTable(BaseTable):
         match_timestamp: str = None,
     ) -> list[MatchRecord]:
         """Get existing Match records"""
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            match_week=match_week,
+            team_a_id=team_a_id,
+            team_b_id=team_b_id,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched records
             if (
                 (
@@ -1,8 +1,8 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.enums import InviteStatus
 from database.fields import MatchInviteFields
 from database.records import MatchInviteRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -19,10 +19,13 @@ Match Invite Table
 class MatchInviteTable(BaseTable):
     """A class to manipulate the Match Invite table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [MatchInviteFields.from_team_id, MatchInviteFields.to_team_id]
+    _soft_delete = True
+    _expires_field = MatchInviteFields.invite_expires_at
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Match Invite table class"""
         super().__init__(
             db,
@@ -103,20 +106,21 @@ class MatchInviteTable(BaseTable):
         invite_status: str = None,
     ) -> list[MatchInviteRecord]:
         """Get an existing Match Invite records"""
-        # Prepare for expired records
+        # Prepare to leave out expired records
         now = await general_helpers.epoch_timestamp()
-        expired_records = []
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            from_team_id=from_team_id,
+            to_team_id=to_team_id,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for expired record
             expiration_epoch = await general_helpers.epoch_timestamp(
                 row[MatchInviteFields.invite_expires_at]
             )
             if now > expiration_epoch:
-                expired_record = MatchInviteRecord(row)
-                expired_records.append(expired_record)
                 continue
             # Check for matched record
             if (
@@ -154,8 +158,5 @@ class MatchInviteTable(BaseTable):
                 # Add matched record
                 existing_record = MatchInviteRecord(row)
                 existing_records.append(existing_record)
-        # Delete expired records
-        for expired_record in expired_records:
-            await self.delete_match_invite_record(expired_record)
         # Return matched records
         return existing_records
@@ -1,8 +1,8 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.enums import InviteStatus, MatchResult, MatchType
 from database.fields import MatchResultInviteFields
 from database.records import MatchResultInviteRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -19,10 +19,16 @@ Match Result Invite Table
 class MatchResultInviteTable(BaseTable):
     """A class to manipulate the Match Result Invite table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [
+        MatchResultInviteFields.from_team_id,
+        MatchResultInviteFields.to_team_id,
+    ]
+    _soft_delete = True
+    _expires_field = MatchResultInviteFields.invite_expires_at
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Match Result Invite table class"""
         super().__init__(
             db,
@@ -120,22 +126,23 @@ class MatchResultInviteTable(BaseTable):
         invite_status: str = None,
     ) -> list[MatchResultInviteRecord]:
         """Get existing Match Result Invite records
-        Note: Since this has to walk the whole table anyway, this is also used to clean up expired records
+        Expired records are left out (see `delete_expired_records`)
         """
-        # Prepare for expired records
+        # Prepare to leave out expired records
         now = await general_helpers.epoch_timestamp()
-        expired_records = []
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            from_team_id=from_team_id,
+            to_team_id=to_team_id,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for expired record
             expiration_epoch = await general_helpers.epoch_timestamp(
                 row[MatchResultInviteFields.invite_expires_at]
             )
             if now > expiration_epoch:
-                expired_record = MatchResultInviteRecord(row)
-                expired_records.append(expired_record)
                 continue
             # Check for matched record
             if (
@@ -178,8 +185,5 @@ class MatchResultInviteTable(BaseTable):
                 # Add matched record
                 existing_record = MatchResultInviteRecord(row)
                 existing_records.append(existing_record)
-        # Delete expired records
-        for expired_record in expired_records:
-            await self.delete_match_result_invite_record(expired_record)
         # Return matched records
         return existing_records
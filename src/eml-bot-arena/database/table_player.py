@@ -1,7 +1,7 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import PlayerFields
 from database.records import PlayerRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -17,10 +17,11 @@ Player Table
 class PlayerTable(BaseTable):
     """A class to manipulate the Player table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [PlayerFields.discord_id, PlayerFields.player_name]
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Player Table class"""
         super().__init__(db, constants.LEAGUE_DB_TAB_PLAYER, PlayerRecord, PlayerFields)
 
@@ -66,9 +67,13 @@ class PlayerTable(BaseTable):
         region: str = None,
     ) -> list[PlayerRecord]:
         """Get existing Player records"""
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            discord_id=discord_id,
+            player_name=player_name,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched records
             if (
                 (
@@ -1,7 +1,7 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import SuspensionFields
 from database.records import SuspensionRecord
+from database.storage_backend import StorageBackend
 import constants
 import gspread
 import utils.general_helpers as general_helpers
@@ -17,10 +17,12 @@ Suspension Table
 class SuspensionTable(BaseTable):
     """A class to manipulate the Suspension table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [SuspensionFields.player_id]
+    _expires_field = SuspensionFields.expires_at
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Suspension Table class"""
         super().__init__(
             db, constants.LEAGUE_DB_TAB_SUSPENSION, SuspensionRecord, SuspensionFields
@@ -79,22 +81,19 @@ class SuspensionTable(BaseTable):
     ) -> list[SuspensionRecord]:
         """Get an existing Suspension record
 
-        Note: Since this has to walk the whole table anyway, this is also used to clean up expired records
+        Expired records are left out (see `delete_expired_records`)
         """
-        # Prepare for expired records
+        # Prepare to leave out expired records
         now = await general_helpers.epoch_timestamp()
-        expired_records = []
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(record_id=record_id, player_id=player_id)
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for expired record
             expiration_epoch = await general_helpers.epoch_timestamp(
                 row[SuspensionFields.expires_at]
             )
             if now > expiration_epoch:
-                expired_record = SuspensionRecord(row)
-                expired_records.append(expired_record)
                 continue
             # Check for matched records
             if (
@@ -114,8 +113,5 @@ class SuspensionTable(BaseTable):
                 # Add the matching record to the list
                 existing_record = SuspensionRecord(row)
                 existing_records.append(existing_record)
-        # Remove expired records from the database
-        for record in expired_records:
-            await self.delete_suspension_record(record)
         # Return the matched records
         return existing_records
@@ -1,8 +1,8 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.enums import TeamStatus
 from database.fields import TeamFields
 from database.records import TeamRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -18,10 +18,11 @@ Team Table
 class TeamTable(BaseTable):
     """A class to manipulate the Team table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [TeamFields.team_name]
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Team Table class"""
         super().__init__(db, constants.LEAGUE_DB_TAB_TEAM, TeamRecord, TeamFields)
 
@@ -55,9 +56,9 @@ class TeamTable(BaseTable):
     ) -> list[TeamRecord]:
         """Get an existing Team record"""
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(record_id=record_id, team_name=team_name)
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched records
             if (
                 not record_id
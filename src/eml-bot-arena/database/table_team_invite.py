@@ -1,8 +1,8 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.enums import InviteStatus
 from database.fields import TeamInviteFields
 from database.records import TeamInviteRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -19,10 +19,13 @@ Team Invite Table
 class TeamInviteTable(BaseTable):
     """A class to manipulate the Invite table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [TeamInviteFields.from_team_id, TeamInviteFields.to_player_id]
+    _soft_delete = True
+    _expires_field = TeamInviteFields.invite_expires_at
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Invite Table class"""
         super().__init__(
             db, constants.LEAGUE_DB_TAB_TEAM_INVITE, TeamInviteRecord, TeamInviteFields
@@ -84,22 +87,23 @@ class TeamInviteTable(BaseTable):
         to_player_id: str = None,
     ) -> list[TeamInviteRecord]:
         """Get an existing Invite record
-        Note: Since this has to walk the whole table anyway, this is also used to clean up expired records
+        Expired records are left out (see `delete_expired_records`)
         """
-        # Prepare for expired records
+        # Prepare to leave out expired records
         now = await general_helpers.epoch_timestamp()
-        expired_records = []
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id,
+            from_team_id=from_team_id,
+            to_player_id=to_player_id,
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for expired record
             expiration_epoch = await general_helpers.epoch_timestamp(
                 row[TeamInviteFields.invite_expires_at]
             )
             if now > expiration_epoch:
-                expired_record = TeamInviteRecord(row)
-                expired_records.append(expired_record)
                 continue
             # Check for matched records
             if (
@@ -127,8 +131,5 @@ class TeamInviteTable(BaseTable):
                 # Add matched record
                 existing_record = TeamInviteRecord(row)
                 existing_records.append(existing_record)
-        # Delete expired records
-        for expired_record in expired_records:
-            await self.delete_team_invite_record(expired_record)
         # Return matched records
         return existing_records
@@ -1,7 +1,7 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
 from database.fields import TeamPlayerFields
 from database.records import TeamPlayerRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
@@ -18,10 +18,11 @@ TeamPlayer Table
 class TeamPlayerTable(BaseTable):
     """A class to manipulate the TeamPlayer table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [TeamPlayerFields.team_id, TeamPlayerFields.player_id]
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the TeamPlayer Table class"""
         super().__init__(
             db, constants.LEAGUE_DB_TAB_TEAM_PLAYER, TeamPlayerRecord, TeamPlayerFields
@@ -72,9 +73,11 @@ class TeamPlayerTable(BaseTable):
     ) -> list[TeamPlayerRecord]:
         """Get existing TeamPlayer records"""
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(
+            record_id=record_id, team_id=team_id, player_id=player_id
+        )
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched records
             if (
                 (
@@ -1,12 +1,12 @@
 from database.base_table import BaseTable
-from database.database_core import CoreDatabase
+from database.cache_policy import PINNED_CACHE_POLICY
 from database.enums import Bool
 from database.fields import VwRosterFields
 from database.records import VwRosterRecord
+from database.storage_backend import StorageBackend
 import constants
 import errors.database_errors as DbErrors
 import gspread
-import time
 import utils.general_helpers as general_helpers
 import logging
 
@@ -21,17 +21,16 @@ VwRoster Table
 class VwRosterTable(BaseTable):
     """A class to manipulate the Match table in the database"""
 
-    _db: CoreDatabase
+    _db: StorageBackend
     _worksheet: gspread.Worksheet
+    _index_fields = [VwRosterFields.team]
+    _cache_policy = PINNED_CACHE_POLICY
 
-    def __init__(self, db: CoreDatabase):
+    def __init__(self, db: StorageBackend):
         """Initialize the Match Table class"""
         super().__init__(
             db, constants.LEAGUE_DB_TAB_VW_ROSTER, VwRosterRecord, VwRosterFields
         )
-        self._tab: gspread.Worksheet = db.get_table_worksheet(
-            constants.LEAGUE_DB_TAB_VW_ROSTER
-        )
 
     async def create_vw_roster_record(
         self,
@@ -130,9 +129,9 @@ class VwRosterTable(BaseTable):
     ) -> list[VwRosterRecord]:
         """Get existing VwRoster records"""
         # Walk the table
-        table = await self.get_table_data()
+        table = await self.get_table_rows(record_id=record_id, team=team_name)
         existing_records = []
-        for row in table[1:]:  # skip header row
+        for row in table:
             # Check for matched record
             if (
                 (
@@ -161,11 +160,4 @@ class VwRosterTable(BaseTable):
         self, roster_table: list[list[int | float | str | None]]
     ) -> None:
         """Write a new list of VwRoster records to the database"""
-        logger.debug("[ 2 write, 0 read ] UPDATE of vwRoster")
-        try:
-            self._tab.clear()
-            time.sleep(constants.LEAGUE_DB_QUEUE_WRITE_DELAY_SECONDS)
-            self._tab.append_rows(roster_table)
-            time.sleep(constants.LEAGUE_DB_QUEUE_WRITE_DELAY_SECONDS)
-        except Exception as error:
-            logger.exception(f"    Failed to commit write: {error}")
+        await self._db.replace_table(self.table_name, roster_table)
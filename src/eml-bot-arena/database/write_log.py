@@ -0,0 +1,65 @@
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Write Log
+
+A crash-safe, on-disk copy of the write queue (a write-ahead log).
+"""
+
+
+class WriteLog:
+    """An append-only file of queued write operations, one JSON list per line
+
+    Writes are appended and `fsync`ed before they are queued, so they survive a
+    crash or restart. Once the backend acknowledges some writes, the log is
+    compacted down to the ones still pending.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path: str = file_path
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+
+    def read(self) -> list[list[int | float | str | None]]:
+        """Read all the logged writes, skipping a line cut short by a crash"""
+        if not os.path.exists(self.file_path):
+            return []
+        writes = []
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            for line_number, line in enumerate(file, start=1):
+                try:
+                    writes.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipped broken line {line_number} of write log")
+        return writes
+
+    def append(self, writes: list[list[int | float | str | None]]) -> None:
+        """Durably add writes to the end of the log"""
+        lines = "".join(dump_write(write) for write in writes)
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def rewrite(self, writes: list[list[int | float | str | None]]) -> None:
+        """Durably replace the log with the writes still pending"""
+        if not writes:
+            with open(self.file_path, "w", encoding="utf-8") as file:
+                file.flush()
+                os.fsync(file.fileno())
+            return
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write("".join(dump_write(write) for write in writes))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.file_path)
+
+
+def dump_write(write: list[int | float | str | None]) -> str:
+    """Serialize a write operation as one line of JSON"""
+    return json.dumps(write, default=str) + "\n"
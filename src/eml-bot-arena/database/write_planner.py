@@ -0,0 +1,274 @@
+from database.enums import WriteOperations
+import constants
+import logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Write Planner
+
+Folds the pending write queue into the fewest Sheets API requests possible.
+"""
+
+
+class WritePlan:
+    """The pending writes of one table, folded into their final effect
+
+    Writes are folded in queue order:
+    - Consecutive INSERTs are appended together in a single request
+    - An UPDATE of a pending INSERT is folded into the INSERT
+    - Multiple UPDATEs of the same record are folded into the last one
+    - A DELETE of a pending INSERT cancels both
+    - A REPLACE discards everything before it and rewrites the whole table
+
+    The resulting requests are order-safe: UPDATEs address rows as they are now,
+    DELETEs run from the bottom of the sheet up, and INSERTs are appended last.
+    A soft DELETE only marks the row as a tombstone, so no row moves.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name: str = table_name
+        self.replace_rows: list[list[int | float | str | None]] | None = None
+        self.inserts: list[list[int | float | str | None] | None] = []
+        self.updates: dict[str, list[int | float | str | None]] = {}
+        self.deletes: list[str] = []
+        self._insert_slots: dict[str, int] = {}
+
+    def add_write(self, operation: str, data: list) -> None:
+        """Fold a queued write operation into the plan"""
+        if operation == WriteOperations.REPLACE:
+            self.replace_rows = [list(row) for row in data]
+            self.inserts, self.updates, self.deletes = [], {}, []
+            self._insert_slots = {}
+            return
+        record_id = data[0]
+        if self.replace_rows is not None:
+            self._add_replaced_write(operation, record_id, data)
+        elif operation == WriteOperations.INSERT:
+            self._insert_slots[record_id] = len(self.inserts)
+            self.inserts.append(data)
+        elif operation == WriteOperations.UPDATE:
+            if record_id in self._insert_slots:
+                self.inserts[self._insert_slots[record_id]] = data
+            elif record_id in self.deletes:
+                logger.warning(f"Dropped UPDATE of deleted record '{record_id}'")
+            else:
+                self.updates[record_id] = data
+        elif operation == WriteOperations.DELETE:
+            if record_id in self._insert_slots:
+                self.inserts[self._insert_slots.pop(record_id)] = None
+            elif record_id not in self.deletes:
+                self.updates.pop(record_id, None)
+                self.deletes.append(record_id)
+
+    def _add_replaced_write(self, operation: str, record_id: str, data: list) -> None:
+        """Apply a write directly to the rows of a table being replaced"""
+        if operation == WriteOperations.INSERT:
+            self.replace_rows.append(data)
+            return
+        for i, row in enumerate(self.replace_rows):
+            if row and row[0] == record_id:
+                if operation == WriteOperations.UPDATE:
+                    self.replace_rows[i] = data
+                elif operation == WriteOperations.DELETE:
+                    del self.replace_rows[i]
+                return
+
+    def get_lookups(self) -> list[str]:
+        """Get the record IDs whose sheet rows must be known to build requests"""
+        if self.replace_rows is not None:
+            return []
+        return list(self.updates.keys()) + self.deletes
+
+    def get_insert_ids(self) -> list[str]:
+        """Get the record IDs of the rows to be appended"""
+        if self.replace_rows is not None:
+            return []
+        return [str(data[0]) for data in self.inserts if data is not None]
+
+    def convert_inserts_to_updates(self, record_ids: list[str]) -> None:
+        """Update these records in place instead of appending them again"""
+        for record_id in record_ids:
+            slot = self._insert_slots.pop(record_id, None)
+            if slot is not None and self.inserts[slot] is not None:
+                self.updates[record_id] = self.inserts[slot]
+                self.inserts[slot] = None
+
+    def get_requests(
+        self, sheet_id: int, row_numbers: dict[str, int], soft_delete: bool = False
+    ) -> list[dict]:
+        """Build the `batch_update` requests for this table
+
+        Args:
+            sheet_id (int): The ID of the worksheet in the spreadsheet
+            row_numbers (dict): 1-based sheet row of each record to update or delete
+            soft_delete (bool): Whether to mark deleted rows as tombstones instead
+        """
+        if self.replace_rows is not None:
+            return [
+                {
+                    "updateCells": {
+                        "range": {"sheetId": sheet_id},
+                        "fields": "userEnteredValue",
+                    }
+                },
+                append_cells_request(sheet_id, self.replace_rows),
+            ]
+        requests = []
+        # Updates
+        for record_id, data in self.updates.items():
+            if record_id not in row_numbers:
+                logger.warning(f"Dropped UPDATE of missing record '{record_id}'")
+                continue
+            requests.append(
+                {
+                    "updateCells": {
+                        "rows": [row_data(data)],
+                        "fields": "userEnteredValue",
+                        "start": {
+                            "sheetId": sheet_id,
+                            "rowIndex": row_numbers[record_id] - 1,
+                            "columnIndex": 0,
+                        },
+                    }
+                }
+            )
+        # Deletes (bottom up, adjacent rows merged)
+        rows = []
+        for record_id in self.deletes:
+            if record_id not in row_numbers:
+                logger.warning(f"Dropped DELETE of missing record '{record_id}'")
+                continue
+            rows.append(row_numbers[record_id])
+        if soft_delete:
+            requests += tombstone_requests(sheet_id, rows)
+        else:
+            requests += delete_rows_requests(sheet_id, rows)
+        # Inserts
+        inserts = [data for data in self.inserts if data is not None]
+        if inserts:
+            requests.append(append_cells_request(sheet_id, inserts))
+        return requests
+
+
+def plan_writes(writes: list[list[int | float | str | None]]) -> dict[str, WritePlan]:
+    """Group queued writes by table and fold them into a `WritePlan` each"""
+    plans: dict[str, WritePlan] = {}
+    for write in writes:
+        if len(write) < 3:
+            logger.warning(f"Write operation discarded for missing data: {write}")
+            continue
+        table_name = write[0]
+        operation = write[1]
+        data = write[2:]
+        if table_name not in plans:
+            plans[table_name] = WritePlan(table_name)
+        plans[table_name].add_write(operation, data)
+    return plans
+
+
+def merge_row_ranges(rows: list[int]) -> list[tuple[int, int]]:
+    """Merge 1-based row numbers into inclusive (start, end) ranges, bottom up"""
+    ranges: list[tuple[int, int]] = []
+    for row in sorted(set(rows), reverse=True):
+        if ranges and ranges[-1][0] == row + 1:
+            ranges[-1] = (row, ranges[-1][1])
+        else:
+            ranges.append((row, row))
+    return ranges
+
+
+def delete_rows_requests(sheet_id: int, rows: list[int]) -> list[dict]:
+    """Build the `deleteDimension` requests for 1-based rows (bottom up, merged)"""
+    return [
+        {
+            "deleteDimension": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "dimension": "ROWS",
+                    "startIndex": start - 1,
+                    "endIndex": end,
+                }
+            }
+        }
+        for start, end in merge_row_ranges(rows)
+    ]
+
+
+def tombstone_requests(sheet_id: int, rows: list[int]) -> list[dict]:
+    """Build the `updateCells` requests marking 1-based rows as tombstones"""
+    return [
+        {
+            "updateCells": {
+                "rows": [row_data([constants.LEAGUE_DB_TOMBSTONE])],
+                "fields": "userEnteredValue",
+                "start": {"sheetId": sheet_id, "rowIndex": row - 1, "columnIndex": 0},
+            }
+        }
+        for row in rows
+    ]
+
+
+def is_tombstone(row: list[int | float | str | None]) -> bool:
+    """Check if a row read from the sheet was soft-deleted"""
+    return bool(row) and row[0] == constants.LEAGUE_DB_TOMBSTONE
+
+
+def append_cells_request(sheet_id: int, rows: list[list]) -> dict:
+    """Build an `appendCells` request for a list of rows"""
+    return {
+        "appendCells": {
+            "sheetId": sheet_id,
+            "rows": [row_data(data) for data in rows],
+            "fields": "userEnteredValue",
+        }
+    }
+
+
+def new_worksheet_requests(sheet_id: int, title: str, field_names: list[str]) -> list:
+    """Build the requests adding a worksheet with a bold, frozen header row"""
+    return [
+        {
+            "addSheet": {
+                "properties": {
+                    "sheetId": sheet_id,
+                    "title": title,
+                    "gridProperties": {
+                        "rowCount": constants.LEAGUE_DB_SPREADSHEET_DEFAULT_ROWS,
+                        "columnCount": constants.LEAGUE_DB_SPREADSHEET_DEFAULT_COLS,
+                        "frozenRowCount": 1,
+                    },
+                }
+            }
+        },
+        {
+            "repeatCell": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": 0,
+                    "endRowIndex": 1,
+                    "startColumnIndex": 0,
+                    "endColumnIndex": 26,
+                },
+                "cell": {"userEnteredFormat": {"textFormat": {"bold": True}}},
+                "fields": "userEnteredFormat.textFormat.bold",
+            }
+        },
+        append_cells_request(sheet_id, [field_names]),
+    ]
+
+
+def row_data(data: list[int | float | str | None]) -> dict:
+    """Convert a list of values to a Sheets API `RowData`"""
+    return {"values": [cell_data(value) for value in data]}
+
+
+def cell_data(value: int | float | str | None) -> dict:
+    """Convert a value to a Sheets API `CellData`, as RAW input would store it"""
+    if value is None:
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
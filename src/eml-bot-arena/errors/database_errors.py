@@ -37,6 +37,18 @@ class EmlWorksheetWriteError(EmlDatabaseException):
         super().__init__(self.message)
 
 
+class EmlWorksheetWriteConflict(EmlDatabaseException):
+    def __init__(self, message="Records were edited on the worksheet meanwhile"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class EmlDatabaseTimeout(EmlDatabaseException):
+    def __init__(self, message="Database request timed out"):
+        self.message = message
+        super().__init__(self.message)
+
+
 ### Database General ###
 
 
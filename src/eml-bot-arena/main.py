@@ -1,6 +1,7 @@
 import bot_commands.show_matches
 from database.database_core import CoreDatabase
 from database.database_full import FullDatabase
+from database.history_archive import HistoryArchive
 import bot_commands
 import bot_helpers
 import constants
@@ -49,6 +50,40 @@ SPREADSHEET_URL = os.environ.get("SPREADSHEET_URL")
 SPREADSHEET_URL = (
     SPREADSHEET_URL if SPREADSHEET_URL else constants.LINK_DB_SPREADSHEET_URL
 )
+DB_TRANSPORT = os.environ.get("DB_TRANSPORT")
+DB_TRANSPORT = DB_TRANSPORT.lower() if DB_TRANSPORT else "gspread"
+DB_BACKEND = os.environ.get("DB_BACKEND")
+DB_BACKEND = DB_BACKEND.lower() if DB_BACKEND else "sheets"
+DB_SQLITE_FILE = os.environ.get("DB_SQLITE_FILE")
+DB_SQLITE_FILE = (
+    DB_SQLITE_FILE if DB_SQLITE_FILE else os.path.join(SECRETS_DIR, "eml_database.db")
+)
+DB_WRITE_LOG_FILE = os.environ.get("DB_WRITE_LOG_FILE")
+DB_WRITE_LOG_FILE = (
+    DB_WRITE_LOG_FILE
+    if DB_WRITE_LOG_FILE
+    else os.path.join(SECRETS_DIR, "eml_write_queue.log")
+)
+DB_SHEETS_MIRROR = os.environ.get("DB_SHEETS_MIRROR")
+DB_SHEETS_MIRROR = DB_SHEETS_MIRROR.lower() != "false" if DB_SHEETS_MIRROR else True
+DB_CACHE_SNAPSHOT_FILE = os.environ.get("DB_CACHE_SNAPSHOT_FILE")
+DB_CACHE_SNAPSHOT_FILE = (
+    DB_CACHE_SNAPSHOT_FILE
+    if DB_CACHE_SNAPSHOT_FILE
+    else os.path.join(SECRETS_DIR, "eml_cache_snapshot.json.gz")
+)
+DB_HISTORY_ARCHIVE_DIR = os.environ.get("DB_HISTORY_ARCHIVE_DIR")
+DB_HISTORY_ARCHIVE_DIR = (
+    DB_HISTORY_ARCHIVE_DIR
+    if DB_HISTORY_ARCHIVE_DIR
+    else os.path.join(SECRETS_DIR, "eml_history_archive")
+)
+DB_WRITE_CONFLICT_POLICY = os.environ.get("DB_WRITE_CONFLICT_POLICY")
+DB_WRITE_CONFLICT_POLICY = (
+    DB_WRITE_CONFLICT_POLICY.upper()
+    if DB_WRITE_CONFLICT_POLICY
+    else constants.LEAGUE_DB_WRITE_CONFLICT_POLICY
+)
 
 # Logger - File
 now = datetime.now(timezone.utc)
@@ -69,6 +104,14 @@ config_dict = {
     "SECRETS_DIR": SECRETS_DIR,
     "SCRIPTS_DIR": THIS_DIR,
     "LOGGER_FILE": logfile_path,
+    "DB_TRANSPORT": DB_TRANSPORT,
+    "DB_BACKEND": DB_BACKEND,
+    "DB_SQLITE_FILE": DB_SQLITE_FILE,
+    "DB_SHEETS_MIRROR": DB_SHEETS_MIRROR,
+    "DB_WRITE_LOG_FILE": DB_WRITE_LOG_FILE,
+    "DB_WRITE_CONFLICT_POLICY": DB_WRITE_CONFLICT_POLICY,
+    "DB_CACHE_SNAPSHOT_FILE": DB_CACHE_SNAPSHOT_FILE,
+    "DB_HISTORY_ARCHIVE_DIR": DB_HISTORY_ARCHIVE_DIR,
 }
 logger.info(
     "\n".join(
@@ -80,10 +123,40 @@ logger.info(
 )
 
 # Google Sheets "Database"
-# gs_client = gspread.service_account(GOOGLE_CREDENTIALS_FILE, http_client=gspread.BackOffHTTPClient)  # For 429 backoff, but breaks on 403
-gs_client = gspread.service_account(GOOGLE_CREDENTIALS_FILE)
-gs_client.set_timeout(constants.LEAGUE_DB_RESPONSE_TIMEOUT_SECONDS)
-database_core = CoreDatabase(gs_client, SPREADSHEET_URL)
+sheets_database = None
+if DB_BACKEND != "sqlite" or DB_SHEETS_MIRROR:
+    if DB_BACKEND == "fake":
+        # In-memory spreadsheet, for trying the bot out without Google
+        from database.sheets_fake import FakeClient
+
+        gs_client = FakeClient()
+    else:
+        # gs_client = gspread.service_account(GOOGLE_CREDENTIALS_FILE, http_client=gspread.BackOffHTTPClient)  # For 429 backoff, but breaks on 403
+        gs_client = gspread.service_account(GOOGLE_CREDENTIALS_FILE)
+        gs_client.set_timeout(constants.LEAGUE_DB_RESPONSE_TIMEOUT_SECONDS)
+    if DB_TRANSPORT == "aiohttp" and DB_BACKEND != "fake":
+        from database.sheets_transport_aiohttp import AiohttpTransport
+
+        db_transport = AiohttpTransport(
+            GOOGLE_CREDENTIALS_FILE, gspread.utils.extract_id_from_url(SPREADSHEET_URL)
+        )
+    else:
+        db_transport = None  # gspread, in a thread pool
+    sheets_database = CoreDatabase(
+        gs_client,
+        SPREADSHEET_URL,
+        transport=db_transport,
+        write_log_file=DB_WRITE_LOG_FILE if DB_BACKEND != "fake" else None,
+        conflict_policy=DB_WRITE_CONFLICT_POLICY,
+        snapshot_file=DB_CACHE_SNAPSHOT_FILE if DB_BACKEND == "sheets" else None,
+    )
+if DB_BACKEND == "sqlite":
+    # Local SQLite "Database", with the Google Sheet as an optional mirror
+    from database.database_sqlite import SqliteDatabase
+
+    database_core = SqliteDatabase(DB_SQLITE_FILE, mirror=sheets_database)
+else:
+    database_core = sheets_database
 db = FullDatabase(database_core)
 
 # Discord Intents
@@ -104,6 +177,18 @@ async def on_ready():
     if bot_state["synced"]:
         return
     bot_state["synced"] = True
+    # Start Database (e.g. commit writes left from the last run)
+    await database_core.start()
+    # Prefetch Database Tables
+    await database_core.prefetch_tables()
+    if constants.LEAGUE_DB_PREFETCH_INTERVAL_SECONDS > 0 and DB_BACKEND != "sqlite":
+        sheets_database.schedule_prefetch(constants.LEAGUE_DB_PREFETCH_INTERVAL_SECONDS)
+    db.schedule_expiry_sweep()
+    db.schedule_match_window_check()
+    if sheets_database is not None:
+        sheets_database.schedule_compaction()
+    if constants.LEAGUE_DB_HISTORY_ARCHIVE_DAYS > 0 and DB_BACKEND != "fake":
+        db.schedule_history_archive(HistoryArchive(DB_HISTORY_ARCHIVE_DIR))
     # Sync Commands
     synced_commands = await bot.tree.sync()
     # Log Synced Commands
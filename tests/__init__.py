@@ -0,0 +1,13 @@
+import os
+import sys
+
+"""
+Tests
+
+Run from the repository root, against the in-memory Sheets fake.
+"""
+
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "eml-bot-arena"),
+)
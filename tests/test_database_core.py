@@ -0,0 +1,608 @@
+from database.cache_policy import CachePolicy
+from database.database_core import CoreDatabase
+from database.enums import WriteOperations
+from database.history_archive import HistoryArchive
+from database.sheets_fake import FakeClient
+from database.write_log import WriteLog
+import errors.database_errors as DbErrors
+import asyncio
+import os
+import shutil
+import tempfile
+import constants
+import time
+import unittest
+from unittest import mock
+
+SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/fake"
+
+
+def make_database(client: FakeClient, **kwargs) -> CoreDatabase:
+    """Open the fake spreadsheet, with a table `T` of records (record_id, value)"""
+    database = CoreDatabase(client, SPREADSHEET_URL, **kwargs)
+    database.add_table("T", ["record_id", "value"])
+    database.add_table_index("T", [])
+    database.create_missing_tables()
+    return database
+
+
+def sheet_rows(database: CoreDatabase) -> list[list[str]]:
+    """Get the rows of table `T` as they are on the fake sheet"""
+    return [list(row) for row in database._db_spreadsheet._get_worksheet("T")._rows]
+
+
+class TestCommit(unittest.IsolatedAsyncioTestCase):
+    """Queued writes reach the sheet in a single, order-safe request"""
+
+    async def asyncSetUp(self):
+        self.client = FakeClient()
+        self.database = make_database(self.client)
+        async with self.database.transaction():
+            for record_id in "abcd":
+                await self.database.append_row("T", [record_id, "1"])
+        await self.database.flush()
+        await self.database.get_table_data("T")
+        self.client.reset_counters()
+
+    async def test_writes_are_folded_into_one_request(self):
+        async with self.database.transaction():
+            await self.database.update_row("T", ["a", "2"])
+            await self.database.update_row("T", ["a", "3"])
+            await self.database.append_row("T", ["e", "1"])
+            await self.database.update_row("T", ["e", "2"])
+            await self.database.append_row("T", ["f", "1"])
+            await self.database.delete_row("T", "f")
+        await self.database.flush()
+        self.assertEqual(self.client.calls["batch_update"], 1)
+        self.assertEqual(
+            sheet_rows(self.database)[1:],
+            [["a", "3"], ["b", "1"], ["c", "1"], ["d", "1"], ["e", "2"]],
+        )
+
+    async def test_updates_deletes_and_appends_land_on_the_right_rows(self):
+        async with self.database.transaction():
+            await self.database.delete_row("T", "b")
+            await self.database.append_row("T", ["e", "1"])
+            await self.database.update_row("T", ["c", "2"])
+            await self.database.delete_row("T", "d")
+            await self.database.update_row("T", ["a", "2"])
+        await self.database.flush()
+        self.assertEqual(
+            sheet_rows(self.database)[1:], [["a", "2"], ["c", "2"], ["e", "1"]]
+        )
+        self.assertEqual(
+            await self.database.get_table_data("T"), sheet_rows(self.database)
+        )
+
+
+class TestCommitTimeout(unittest.IsolatedAsyncioTestCase):
+    """A commit that timed out may still land, and is not sent twice"""
+
+    async def test_timed_out_insert_is_not_duplicated(self):
+        client = FakeClient()
+        database = make_database(client)
+        with mock.patch.object(constants, "LEAGUE_DB_REQUEST_TIMEOUT_SECONDS", 0.1):
+            client.latency_seconds = 0.3
+            await database.append_row("T", ["a", "1"])
+            with self.assertRaises(DbErrors.EmlWorksheetWriteError):
+                await database.flush()
+            client.latency_seconds = 0
+            await database.append_row("T", ["b", "1"])
+            await database.flush()
+        await asyncio.sleep(0.5)  # any call still running has landed by now
+        self.assertEqual(sheet_rows(database)[1:], [["a", "1"], ["b", "1"]])
+
+
+class TestTransaction(unittest.IsolatedAsyncioTestCase):
+    """A failed transaction leaves no trace, in the cache or on the sheet"""
+
+    async def test_rollback(self):
+        database = make_database(FakeClient())
+        await database.append_row("T", ["a", "1"])
+        await database.append_row("T", ["b", "1"])
+        await database.flush()
+        before = [list(row) for row in await database.get_table_data("T")]
+        with self.assertRaises(AssertionError):
+            async with database.transaction():
+                await database.update_row("T", ["a", "2"])
+                await database.delete_row("T", "b")
+                await database.append_row("T", ["c", "1"])
+                self.assertEqual(len(await database.get_table_data("T")), 3)
+                raise AssertionError("Error: Something went wrong.")
+        self.assertEqual(await database.get_table_data("T"), before)
+        self.assertEqual(await database.get_pending_writes(), [])
+        await database.flush()
+        self.assertEqual(sheet_rows(database), before)
+
+
+class TestWriteConflict(unittest.IsolatedAsyncioTestCase):
+    """A record edited on the sheet since it was read is handled by the policy"""
+
+    async def make_database(self, conflict_policy: str) -> CoreDatabase:
+        database = CoreDatabase(
+            FakeClient(), SPREADSHEET_URL, conflict_policy=conflict_policy
+        )
+        database.add_table("V", ["record_id", "created_at", "updated_at", "value"])
+        database.add_table_index("V", [])
+        database.create_missing_tables()
+        async with database.transaction():
+            for record_id in "abc":
+                await database.append_row("V", [record_id, "t0", "t0", "1"])
+        await database.flush()
+        await database.get_table_data("V")
+        # someone edits 'a' on the sheet
+        worksheet = database._db_spreadsheet._get_worksheet("V")
+        worksheet._rows[1] = ["a", "t0", "t1", "sheet"]
+        return database
+
+    async def test_keep_sheet_drops_the_whole_transaction(self):
+        database = await self.make_database("KEEP_SHEET")
+        await database.update_row("V", ["c", "t0", "t2", "2"])
+        async with database.transaction():
+            await database.update_row("V", ["a", "t0", "t2", "2"])
+            await database.update_row("V", ["b", "t0", "t2", "2"])
+        with self.assertRaises(DbErrors.EmlWorksheetWriteConflict):
+            await database.flush()
+        rows = [list(row) for row in database._db_spreadsheet._get_worksheet("V")._rows]
+        self.assertEqual(
+            rows[1:],
+            [
+                ["a", "t0", "t1", "sheet"],
+                ["b", "t0", "t0", "1"],
+                ["c", "t0", "t2", "2"],
+            ],
+        )
+        self.assertEqual(await database.get_table_data("V"), rows)
+        # the conflict is only reported once
+        await database.flush()
+
+    async def test_keep_sheet_conflict_is_reported_to_its_own_task_only(self):
+        database = await self.make_database("KEEP_SHEET")
+
+        async def edit_a():
+            await database.update_row("V", ["a", "t0", "t2", "2"])
+            await database.flush()
+
+        task = asyncio.create_task(edit_a())
+        await database.update_row("V", ["b", "t0", "t2", "2"])
+        await database.flush()
+        with self.assertRaises(DbErrors.EmlWorksheetWriteConflict):
+            await task
+
+    async def test_overwrite_commits_the_write(self):
+        database = await self.make_database("OVERWRITE")
+        await database.update_row("V", ["a", "t0", "t2", "2"])
+        await database.flush()
+        rows = database._db_spreadsheet._get_worksheet("V")._rows
+        self.assertEqual(list(rows[1]), ["a", "t0", "t2", "2"])
+
+
+class TestSecondaryIndex(unittest.IsolatedAsyncioTestCase):
+    """Finders get their candidate rows from the index of a filtered column"""
+
+    async def asyncSetUp(self):
+        self.database = CoreDatabase(FakeClient(), SPREADSHEET_URL)
+        self.database.add_table("I", ["record_id", "team", "value"])
+        self.database.add_table_index("I", [1])
+        self.database.create_missing_tables()
+        async with self.database.transaction():
+            for record_id, team in [("a", "Red"), ("b", "Blue"), ("c", "red")]:
+                await self.database.append_row("I", [record_id, team, "1"])
+        await self.database.flush()
+
+    async def find_ids(self, filters: dict) -> list[str]:
+        rows = await self.database.find_table_rows("I", filters)
+        return [row[0] for row in rows]
+
+    async def test_index_narrows_down_the_rows(self):
+        self.assertEqual(await self.find_ids({1: "RED"}), ["a", "c"])
+        self.assertEqual(await self.find_ids({1: "Green"}), [])
+
+    async def test_record_id_is_the_most_selective(self):
+        self.assertEqual(await self.find_ids({0: "c", 1: "Red"}), ["c"])
+
+    async def test_unindexed_filter_gets_all_rows(self):
+        self.assertEqual(await self.find_ids({2: "1"}), ["a", "b", "c"])
+
+    async def test_index_follows_writes(self):
+        await self.database.update_row("I", ["a", "Blue", "1"])
+        await self.database.delete_row("I", "c")
+        await self.database.append_row("I", ["d", "Red", "1"])
+        self.assertEqual(await self.find_ids({1: "red"}), ["d"])
+        self.assertEqual(await self.find_ids({1: "blue"}), ["a", "b"])
+
+
+class TestPrefetch(unittest.IsolatedAsyncioTestCase):
+    """By default, the tables whose cache policy says to preload them are prefetched"""
+
+    async def test_default_prefetch_follows_the_cache_policies(self):
+        database = CoreDatabase(FakeClient(), SPREADSHEET_URL)
+        for table_name in ["P", "N", "W"]:
+            database.add_table(table_name, ["record_id", "value"])
+        database.add_table_index("N", [])
+        database.set_cache_policy("P", CachePolicy())
+        database.set_cache_policy("N", CachePolicy(preload=False))
+        database.set_cache_policy("W", CachePolicy(write_only=True))
+        database.create_missing_tables()
+        await database.prefetch_tables()
+        self.assertEqual(list(database._db_cache_pull_times), ["P"])
+
+
+class TestStaleWhileRevalidate(unittest.IsolatedAsyncioTestCase):
+    """Stale tables are served at once and refreshed in the background"""
+
+    async def asyncSetUp(self):
+        self.client = FakeClient()
+        self.database = make_database(self.client)
+        self.database.set_cache_policy(
+            "T", CachePolicy(ttl_seconds=60, max_staleness_seconds=600)
+        )
+        await self.database.append_row("T", ["a", "1"])
+        await self.database.flush()
+        await self.database.get_table_data("T")
+        # someone edits 'a' on the sheet
+        self.database._db_spreadsheet._get_worksheet("T")._rows[1] = ["a", "2"]
+        self.client.reset_counters()
+
+    def age_table(self, seconds: float) -> None:
+        self.database._db_cache_pull_times["T"] -= seconds
+        self.database._db_cache_fetch_times["T"] -= seconds
+
+    async def test_fresh_table_is_not_refreshed(self):
+        table = await self.database.get_table_data("T")
+        self.assertEqual(table[1], ["a", "1"])
+        self.assertEqual(self.database._db_refresh_tasks, {})
+
+    async def test_stale_table_is_served_then_refreshed(self):
+        self.age_table(100)
+        table = await self.database.get_table_data("T")
+        self.assertEqual(table[1], ["a", "1"])
+        self.assertEqual(self.client.calls["values_batch_get"], 0)
+        await self.database._db_refresh_tasks["T"]
+        table = await self.database.get_table_data("T")
+        self.assertEqual(table[1], ["a", "2"])
+
+    async def test_expired_table_is_pulled_inline(self):
+        self.age_table(700)
+        table = await self.database.get_table_data("T")
+        self.assertEqual(table[1], ["a", "2"])
+        self.assertEqual(self.database._db_refresh_tasks, {})
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Concurrent reads of a table wait for the same pull"""
+
+    async def asyncSetUp(self):
+        self.client = FakeClient(latency_seconds=0.05)
+        self.database = make_database(self.client)
+        self.client.reset_counters()
+
+    async def test_concurrent_reads_pull_once(self):
+        tables = await asyncio.gather(
+            *[self.database.get_table_data("T") for _ in range(5)]
+        )
+        self.assertEqual(self.client.calls["values_batch_get"], 1)
+        self.assertTrue(all(table is tables[0] for table in tables))
+
+    async def test_cancelled_reader_does_not_cancel_the_pull(self):
+        first = asyncio.create_task(self.database.get_table_data("T"))
+        second = asyncio.create_task(self.database.get_table_data("T"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual((await second)[0], ["record_id", "value"])
+        self.assertEqual(self.client.calls["values_batch_get"], 1)
+
+    async def test_later_read_pulls_again(self):
+        await self.database.get_table_data("T")
+        self.database._expire_table("T")
+        await self.database.prefetch_tables(["T"])
+        self.assertEqual(self.client.calls["values_batch_get"], 2)
+
+
+class TestChangeDetection(unittest.IsolatedAsyncioTestCase):
+    """Tables are only read again when the spreadsheet changed, or too long ago"""
+
+    async def asyncSetUp(self):
+        self.client = FakeClient()
+        self.database = make_database(self.client)
+        self.database.set_cache_policy(
+            "T", CachePolicy(ttl_seconds=60, max_staleness_seconds=600)
+        )
+        await self.database.append_row("T", ["a", "1"])
+        await self.database.flush()
+        await self.database.get_table_data("T")
+        self.client.reset_counters()
+
+    def age_table(self, seconds: float, fetched: bool = True) -> None:
+        self.database._db_cache_pull_times["T"] -= seconds
+        if fetched:
+            self.database._db_cache_fetch_times["T"] -= seconds
+
+    async def test_unchanged_table_is_renewed(self):
+        self.age_table(700, fetched=False)
+        await self.database.get_table_data("T")
+        self.assertEqual(self.client.calls["values_batch_get"], 0)
+
+    async def test_table_is_read_again_past_its_max_staleness(self):
+        self.age_table(700)
+        await self.database.get_table_data("T")
+        self.assertEqual(self.client.calls["values_batch_get"], 1)
+
+    async def test_renewal_does_not_count_as_a_read(self):
+        self.age_table(300)
+        await self.database.prefetch_tables(["T"])
+        self.assertEqual(self.client.calls["values_batch_get"], 0)
+        self.age_table(400)
+        await self.database.prefetch_tables(["T"])
+        self.assertEqual(self.client.calls["values_batch_get"], 1)
+
+    async def test_commit_without_cached_tables_skips_revision_reads(self):
+        self.database._expire_table("T")
+        await self.database.update_row("T", ["a", "2"])
+        await self.database.flush()
+        self.assertEqual(self.client.calls["get_file_drive_metadata"], 0)
+
+
+class TestSnapshot(unittest.IsolatedAsyncioTestCase):
+    """The local cache is saved to disk, and served at startup until revalidated"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.snapshot_file = os.path.join(self.directory, "cache.json.gz")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    async def save_snapshot(self, client: FakeClient) -> None:
+        database = make_database(client, snapshot_file=self.snapshot_file)
+        await database.append_row("T", ["a", "1"])
+        await database.flush()
+        await database.get_table_data("T")
+        await database._save_snapshot()
+
+    async def test_warm_start_serves_the_snapshot(self):
+        client = FakeClient()
+        await self.save_snapshot(client)
+        client.reset_counters()
+        database = make_database(client, snapshot_file=self.snapshot_file)
+        table = await database.get_table_data("T")
+        self.assertEqual(table[1], ["a", "1"])
+        self.assertEqual(client.calls["values_batch_get"], 0)
+        # served stale, so it is revalidated in the background
+        self.assertIn("T", database._db_refresh_tasks)
+
+    async def test_snapshot_tables_are_aged_by_their_policy(self):
+        client = FakeClient()
+        await self.save_snapshot(client)
+        database = make_database(client, snapshot_file=self.snapshot_file)
+        database.set_cache_policy("T", CachePolicy(ttl_seconds=60))
+        age = time.time() - database._db_cache_pull_times["T"]
+        self.assertGreater(age, 60)
+        database = make_database(client, snapshot_file=self.snapshot_file)
+        database.set_cache_policy("T", CachePolicy(write_only=True))
+        self.assertNotIn("T", database._db_local_cache)
+
+    async def test_snapshot_of_another_spreadsheet_is_ignored(self):
+        client = FakeClient()
+        await self.save_snapshot(client)
+        database = CoreDatabase(
+            client, f"{SPREADSHEET_URL}/other", snapshot_file=self.snapshot_file
+        )
+        self.assertEqual(database._db_local_cache, {})
+
+    async def test_nothing_is_saved_during_a_transaction(self):
+        database = make_database(FakeClient(), snapshot_file=self.snapshot_file)
+        await database.get_table_data("T")
+        async with database.transaction():
+            await database.append_row("T", ["a", "1"])
+            self.assertIsNone(database._get_snapshot_state())
+        await database.flush()
+        self.assertIn("T", database._get_snapshot_state()["tables"])
+
+
+class TestSoftDelete(unittest.IsolatedAsyncioTestCase):
+    """Deleted rows are marked as tombstones, and removed by compaction"""
+
+    async def asyncSetUp(self):
+        self.client = FakeClient()
+        self.database = make_database(self.client)
+        self.database.enable_soft_delete("T")
+        async with self.database.transaction():
+            for record_id in "abc":
+                await self.database.append_row("T", [record_id, "1"])
+        await self.database.flush()
+        await self.database.get_table_data("T")
+
+    async def test_deleted_row_is_marked_and_hidden(self):
+        await self.database.delete_row("T", "b")
+        await self.database.flush()
+        rows = sheet_rows(self.database)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[2][0], constants.LEAGUE_DB_TOMBSTONE)
+        self.database._expire_table("T")
+        table = await self.database.get_table_data("T")
+        self.assertEqual([row[0] for row in table[1:]], ["a", "c"])
+
+    async def test_compaction_removes_tombstones(self):
+        await self.database.delete_row("T", "a")
+        await self.database.flush()
+        self.client.reset_counters()
+        await self.database.compact_tables()
+        self.assertEqual(self.client.calls["batch_update"], 1)
+        self.assertEqual(sheet_rows(self.database)[1:], [["b", "1"], ["c", "1"]])
+        # the sheet rows were indexed again, so writes land on the right rows
+        await self.database.update_row("T", ["c", "2"])
+        await self.database.flush()
+        self.assertEqual(sheet_rows(self.database)[1:], [["b", "1"], ["c", "2"]])
+
+    async def test_compaction_without_tombstones_writes_nothing(self):
+        self.client.reset_counters()
+        await self.database.compact_tables()
+        self.assertEqual(self.client.calls["batch_update"], 0)
+
+
+class TestArchiveRows(unittest.IsolatedAsyncioTestCase):
+    """Old rows are moved from the sheet to the archive"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = HistoryArchive(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    async def test_old_rows_are_archived_then_deleted(self):
+        database = CoreDatabase(FakeClient(), SPREADSHEET_URL)
+        database.add_table("H", ["record_id", "created_at", "value"])
+        database.create_missing_tables()
+        async with database.transaction():
+            await database.append_row("H", ["a", "2020-01-01", "1"])
+            await database.append_row("H", ["b", "2030-01-01", "2"])
+            await database.append_row("H", ["c", "2020-06-01", "3"])
+        await database.flush()
+        await database.get_table_data("H")
+        count = await database.archive_rows("H", 1, "2025", self.archive)
+        self.assertEqual(count, 2)
+        rows = database._db_spreadsheet._get_worksheet("H")._rows
+        self.assertEqual([list(row) for row in rows[1:]], [["b", "2030-01-01", "2"]])
+        self.assertEqual(self.archive.find_rows("H", "c")[0]["value"], "3")
+        # the cached copy is pulled again
+        table = await database.get_table_data("H")
+        self.assertEqual([row[0] for row in table[1:]], ["b"])
+        self.assertEqual(await database.archive_rows("H", 1, "2025", self.archive), 0)
+
+
+class TestWriteLog(unittest.IsolatedAsyncioTestCase):
+    """Writes left in the write log are replayed at startup"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write_log_file = os.path.join(self.directory, "writes.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    async def test_replayed_insert_is_not_duplicated(self):
+        client = FakeClient()
+        database = make_database(client, write_log_file=self.write_log_file)
+        async with database.transaction():
+            await database.append_row("T", ["a", "1"])
+            await database.append_row("T", ["b", "1"])
+        # stop "after" the commit, but before the write log is cleared
+        shutil.copy(self.write_log_file, f"{self.write_log_file}.crash")
+        await database.flush()
+        shutil.copy(f"{self.write_log_file}.crash", self.write_log_file)
+        database = make_database(client, write_log_file=self.write_log_file)
+        await database.start()
+        await database.flush()
+        self.assertEqual(sheet_rows(database)[1:], [["a", "1"], ["b", "1"]])
+
+    async def test_uncommitted_insert_is_replayed(self):
+        WriteLog(self.write_log_file).append([["T", WriteOperations.INSERT, "a", "1"]])
+        database = make_database(FakeClient(), write_log_file=self.write_log_file)
+        await database.start()
+        await database.flush()
+        self.assertEqual(sheet_rows(database)[1:], [["a", "1"]])
+
+    async def test_log_is_written_off_the_event_loop(self):
+        database = make_database(FakeClient(), write_log_file=self.write_log_file)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        with mock.patch("os.fsync", side_effect=lambda fd: time.sleep(0.2)):
+            await database.append_row("T", ["a", "1"])
+        ticker.cancel()
+        self.assertGreater(ticks, 5)
+        await database.flush()
+
+    async def test_log_keeps_the_order_of_the_queue(self):
+        database = make_database(
+            FakeClient(latency_seconds=0.2), write_log_file=self.write_log_file
+        )
+        await asyncio.gather(
+            *[database.append_row("T", [str(i), "1"]) for i in range(10)]
+        )
+        self.assertEqual(
+            WriteLog(self.write_log_file).read(), await database.get_pending_writes()
+        )
+        await database.flush()
+        self.assertEqual(WriteLog(self.write_log_file).read(), [])
+
+
+class TestFlush(unittest.IsolatedAsyncioTestCase):
+    """Flush is a barrier for the writes queued before it, and only those"""
+
+    async def test_flush_does_not_wait_for_later_writes(self):
+        database = make_database(FakeClient(latency_seconds=0.2))
+        await database.append_row("T", ["a", "1"])
+        flush = asyncio.create_task(database.flush())
+        await asyncio.sleep(0.1)
+        await database.append_row("T", ["b", "1"])
+        await flush
+        self.assertIn(["a", "1"], sheet_rows(database))
+        start_time = time.monotonic()
+        await database.flush()
+        self.assertIn(["b", "1"], sheet_rows(database))
+        self.assertLess(time.monotonic() - start_time, 2)
+
+    async def test_flush_raises_if_its_writes_fail(self):
+        client = FakeClient()
+        database = make_database(client)
+        await database.append_row("T", ["a", "1"])
+        client.fail_next(1, 500)
+        with self.assertRaises(DbErrors.EmlWorksheetWriteError):
+            await database.flush()
+        await database.flush()
+        self.assertEqual(sheet_rows(database)[1:], [["a", "1"]])
+
+    async def test_flush_raises_permission_errors_at_once(self):
+        client = FakeClient()
+        database = make_database(client)
+        client.fail_next(1, 403)
+        await database.append_row("T", ["a", "1"])
+        await database.append_row("T", ["b", "1"])
+        with self.assertRaisesRegex(DbErrors.EmlWorksheetWriteError, "403"):
+            await database.flush()
+        self.assertEqual(client.calls["batch_update"], 2)  # incl. create_missing_tables
+        self.assertEqual(await database.get_pending_writes(), [])
+
+
+class TestWriteWorker(unittest.IsolatedAsyncioTestCase):
+    """Writes refused for good are dropped, and the rest of the queue goes on"""
+
+    async def test_refused_batch_does_not_block_the_queue(self):
+        database = make_database(FakeClient())
+        await database.append_row("Missing", ["x", "1"])
+        await database.append_row("T", ["a", "1"])
+        for _ in range(100):
+            if not await database.get_pending_writes():
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(await database.get_pending_writes(), [])
+        self.assertEqual(sheet_rows(database)[1:], [["a", "1"]])
+
+    async def test_only_the_batch_at_fault_is_dropped(self):
+        database = make_database(FakeClient())
+
+        async def write_missing():
+            await database.append_row("Missing", ["x", "1"])
+            await database.flush()
+
+        await database.append_row("T", ["a", "1"])
+        task = asyncio.create_task(write_missing())
+        await asyncio.sleep(0)
+        await database.append_row("T", ["b", "1"])
+        await database.flush()
+        with self.assertRaises(DbErrors.EmlWorksheetWriteError):
+            await task
+        self.assertEqual(sheet_rows(database)[1:], [["a", "1"], ["b", "1"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
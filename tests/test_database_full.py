@@ -0,0 +1,44 @@
+from database.database_core import CoreDatabase
+from database.database_full import FullDatabase
+from database.fields import CooldownFields
+from database.sheets_fake import FakeClient
+import time
+import unittest
+
+SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/fake"
+
+
+class TestExpirySweep(unittest.IsolatedAsyncioTestCase):
+    """Expired records are hidden by finders, and deleted by the sweep"""
+
+    async def asyncSetUp(self):
+        self.core_database = CoreDatabase(FakeClient(), SPREADSHEET_URL)
+        self.database = FullDatabase(self.core_database)
+        table = self.database.table_cooldown
+        now = int(time.time())
+        await table.create_cooldown_record("p1", "t1", "P1", "T1", now - 60)
+        await table.create_cooldown_record("p2", "t1", "P2", "T1", now + 3600)
+        await self.core_database.flush()
+
+    async def get_player_ids(self) -> list[str]:
+        rows = await self.database.table_cooldown.get_table_rows()
+        return [row[CooldownFields.player_id] for row in rows]
+
+    async def test_finders_leave_expired_records_out(self):
+        records = await self.database.table_cooldown.get_cooldown_records()
+        self.assertEqual(
+            [await record.get_field(CooldownFields.player_id) for record in records],
+            ["p2"],
+        )
+        # still in the table until the sweep
+        self.assertEqual(await self.get_player_ids(), ["p1", "p2"])
+
+    async def test_sweep_deletes_expired_records(self):
+        self.assertEqual(await self.database.delete_expired_records(), 1)
+        await self.core_database.flush()
+        self.assertEqual(await self.get_player_ids(), ["p2"])
+        self.assertEqual(await self.database.delete_expired_records(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
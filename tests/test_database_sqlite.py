@@ -0,0 +1,72 @@
+from database.database_sqlite import SqliteDatabase
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+
+class TestTransaction(unittest.IsolatedAsyncioTestCase):
+    """A transaction is one SQLite transaction, committed or rolled back whole"""
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.directory, "league.db")
+        self.database = SqliteDatabase(self.database_file)
+        self.database.add_table("T", ["record_id", "value"])
+        self.database.add_table_index("T", [1])
+        await self.database.append_row("T", ["a", "1"])
+        await self.database.append_row("T", ["b", "1"])
+
+    async def asyncTearDown(self):
+        self.database._db_connection.close()
+        shutil.rmtree(self.directory)
+
+    def committed_rows(self) -> list[tuple]:
+        """Read table `T` from another connection, which only sees committed data"""
+        connection = sqlite3.connect(self.database_file)
+        try:
+            return connection.execute('SELECT * FROM "T" ORDER BY rowid').fetchall()
+        finally:
+            connection.close()
+
+    async def test_writes_are_committed_at_exit(self):
+        async with self.database.transaction():
+            await self.database.update_row("T", ["a", "2"])
+            await self.database.append_row("T", ["c", "1"])
+            self.assertEqual(len(await self.database.get_table_data("T")), 4)
+            self.assertEqual(self.committed_rows(), [("a", "1"), ("b", "1")])
+        self.assertEqual(self.committed_rows(), [("a", "2"), ("b", "1"), ("c", "1")])
+
+    async def test_rollback(self):
+        before = await self.database.get_table_data("T")
+        with self.assertRaises(AssertionError):
+            async with self.database.transaction():
+                await self.database.update_row("T", ["a", "2"])
+                await self.database.delete_row("T", "b")
+                await self.database.append_row("T", ["c", "1"])
+                raise AssertionError("Error: Something went wrong.")
+        self.assertEqual(await self.database.get_table_data("T"), before)
+        self.assertEqual(self.committed_rows(), [("a", "1"), ("b", "1")])
+
+    async def test_other_writes_wait_and_are_not_rolled_back(self):
+        inside = asyncio.Event()
+
+        async def failed_transaction():
+            async with self.database.transaction():
+                await self.database.append_row("T", ["c", "1"])
+                inside.set()
+                await asyncio.sleep(0.05)
+                raise AssertionError("Error: Something went wrong.")
+
+        task = asyncio.create_task(failed_transaction())
+        await inside.wait()
+        await self.database.append_row("T", ["d", "1"])
+        with self.assertRaises(AssertionError):
+            await task
+        self.assertEqual(self.committed_rows(), [("a", "1"), ("b", "1"), ("d", "1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+from database.history_archive import HistoryArchive
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestHistoryArchive(unittest.TestCase):
+    """Archived rows are found again by key, across segments"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = HistoryArchive(os.path.join(self.directory, "archive"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rows_are_found_by_key_oldest_first(self):
+        header = ["history_id", "record_id", "value"]
+        self.archive.add_segment("H", header, [["1", "A", "x"], ["2", "b", "y"]], 1)
+        self.archive.add_segment("H", header, [["3", "a", "z"]], 1)
+        rows = self.archive.find_rows("H", "a")
+        self.assertEqual([row["history_id"] for row in rows], ["1", "3"])
+        self.assertEqual(self.archive.find_rows("H", "c"), [])
+        self.assertEqual(self.archive.find_rows("Other", "a"), [])
+
+    def test_index_only_points_at_segments_of_the_key(self):
+        header = ["record_id", "value"]
+        first = self.archive.add_segment("H", header, [["a", "1"]])
+        second = self.archive.add_segment("H", header, [["b", "2"]])
+        segments = self.archive.read_index()["H"]["segments"]
+        self.assertEqual(segments, {"a": [first], "b": [second]})
+
+
+if __name__ == "__main__":
+    unittest.main()
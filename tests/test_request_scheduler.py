@@ -0,0 +1,56 @@
+from database.request_scheduler import READ, RequestScheduler
+from database.sheets_fake import api_error
+import errors.database_errors as DbErrors
+import constants
+import gspread
+import unittest
+from unittest import mock
+
+
+class TestBackOff(unittest.IsolatedAsyncioTestCase):
+    """Quota errors are retried after a back-off, other errors are raised at once"""
+
+    def setUp(self):
+        self.calls = 0
+        patcher = mock.patch.object(
+            constants, "LEAGUE_DB_QUOTA_BACKOFF_BASE_SECONDS", 0.01
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def failing_call(self, status_code: int, failures: int):
+        async def call():
+            self.calls += 1
+            if self.calls <= failures:
+                raise api_error(status_code, "Fake error")
+            return "ok"
+
+        return call
+
+    async def test_quota_error_is_retried(self):
+        scheduler = RequestScheduler()
+        self.assertEqual(await scheduler.run(READ, self.failing_call(429, 2)), "ok")
+        self.assertEqual(self.calls, 3)
+
+    async def test_permission_error_is_raised_at_once(self):
+        scheduler = RequestScheduler()
+        with self.assertRaises(gspread.exceptions.APIError):
+            await scheduler.run(READ, self.failing_call(403, 1))
+        self.assertEqual(self.calls, 1)
+
+    async def test_gives_up_after_max_retries(self):
+        scheduler = RequestScheduler()
+        with self.assertRaises(gspread.exceptions.APIError):
+            await scheduler.run(READ, self.failing_call(429, 100))
+        self.assertEqual(self.calls, constants.LEAGUE_DB_QUOTA_MAX_RETRIES + 1)
+
+    async def test_waits_for_a_token_under_pressure(self):
+        scheduler = RequestScheduler(reads_per_window=1, window_seconds=60)
+        await scheduler.run(READ, self.failing_call(429, 0))
+        with mock.patch.object(constants, "LEAGUE_DB_QUOTA_MAX_WAIT_SECONDS", 0.05):
+            with self.assertRaises(DbErrors.EmlDatabaseTimeout):
+                await scheduler.run(READ, self.failing_call(429, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
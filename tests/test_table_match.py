@@ -0,0 +1,47 @@
+from database.cache_policy import DEFAULT_CACHE_POLICY, FAST_CACHE_POLICY
+from database.database_core import CoreDatabase
+from database.sheets_fake import FakeClient
+from database.table_match import MatchTable
+import constants
+import time
+import unittest
+from unittest import mock
+
+SPREADSHEET_URL = "https://docs.google.com/spreadsheets/d/fake"
+
+
+class TestMatchWindow(unittest.IsolatedAsyncioTestCase):
+    """The Match table is cached with the fast policy around scheduled matches"""
+
+    async def asyncSetUp(self):
+        self.database = CoreDatabase(FakeClient(), SPREADSHEET_URL)
+        self.table = MatchTable(self.database)
+        self.database.create_missing_tables()
+
+    async def add_match(self, match_epoch: int) -> None:
+        await self.table.create_match_record(
+            match_epoch=match_epoch,
+            team_a_id="a",
+            team_b_id="b",
+            vw_team_a="A",
+            vw_team_b="B",
+        )
+        await self.database.flush()
+
+    async def test_no_match_keeps_the_default_policy(self):
+        await self.add_match(int(time.time()) + 86400)
+        self.assertFalse(await self.table.update_cache_policy())
+        self.assertIs(self.database.get_cache_policy("Match"), DEFAULT_CACHE_POLICY)
+
+    async def test_policy_follows_the_match_window(self):
+        await self.add_match(int(time.time()) + 600)
+        self.assertTrue(await self.table.update_cache_policy())
+        self.assertIs(self.database.get_cache_policy("Match"), FAST_CACHE_POLICY)
+        # the window only opens a minute before the match
+        with mock.patch.object(constants, "LEAGUE_DB_MATCH_WINDOW_BEFORE_SECONDS", 60):
+            self.assertFalse(await self.table.update_cache_policy())
+        self.assertIs(self.database.get_cache_policy("Match"), DEFAULT_CACHE_POLICY)
+
+
+if __name__ == "__main__":
+    unittest.main()
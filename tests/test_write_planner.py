@@ -0,0 +1,103 @@
+from database.enums import WriteOperations
+from database.write_planner import plan_writes
+import unittest
+
+
+class TestWriteFolding(unittest.TestCase):
+    """Queued writes are folded into their final effect"""
+
+    def test_update_of_pending_insert_is_folded_into_it(self):
+        plan = plan_writes(
+            [
+                ["T", WriteOperations.INSERT, "a", "1"],
+                ["T", WriteOperations.UPDATE, "a", "2"],
+            ]
+        )["T"]
+        self.assertEqual(plan.inserts, [["a", "2"]])
+        self.assertEqual(plan.updates, {})
+
+    def test_updates_of_a_record_are_folded_into_the_last(self):
+        plan = plan_writes(
+            [
+                ["T", WriteOperations.UPDATE, "a", "1"],
+                ["T", WriteOperations.UPDATE, "a", "2"],
+            ]
+        )["T"]
+        self.assertEqual(plan.updates, {"a": ["a", "2"]})
+
+    def test_delete_of_pending_insert_cancels_both(self):
+        plan = plan_writes(
+            [
+                ["T", WriteOperations.INSERT, "a", "1"],
+                ["T", WriteOperations.DELETE, "a"],
+            ]
+        )["T"]
+        self.assertEqual(plan.get_insert_ids(), [])
+        self.assertEqual(plan.deletes, [])
+
+    def test_delete_drops_earlier_update(self):
+        plan = plan_writes(
+            [
+                ["T", WriteOperations.UPDATE, "a", "1"],
+                ["T", WriteOperations.DELETE, "a"],
+            ]
+        )["T"]
+        self.assertEqual(plan.updates, {})
+        self.assertEqual(plan.deletes, ["a"])
+
+    def test_writes_are_grouped_by_table(self):
+        plans = plan_writes(
+            [
+                ["A", WriteOperations.INSERT, "a", "1"],
+                ["B", WriteOperations.INSERT, "b", "1"],
+            ]
+        )
+        self.assertEqual(sorted(plans), ["A", "B"])
+
+
+class TestCommitOrdering(unittest.TestCase):
+    """Requests update rows in place, then delete bottom up, then append"""
+
+    def test_requests_order(self):
+        plan = plan_writes(
+            [
+                ["T", WriteOperations.INSERT, "e", "5"],
+                ["T", WriteOperations.DELETE, "b"],
+                ["T", WriteOperations.UPDATE, "c", "9"],
+                ["T", WriteOperations.DELETE, "d"],
+            ]
+        )["T"]
+        requests = plan.get_requests(0, {"b": 3, "c": 4, "d": 5})
+        self.assertEqual(
+            [next(iter(request)) for request in requests],
+            ["updateCells", "deleteDimension", "deleteDimension", "appendCells"],
+        )
+        self.assertEqual(requests[0]["updateCells"]["start"]["rowIndex"], 3)
+        deleted = [
+            request["deleteDimension"]["range"]["startIndex"]
+            for request in requests[1:3]
+        ]
+        self.assertEqual(deleted, [4, 2])
+
+    def test_adjacent_deletes_are_merged(self):
+        plan = plan_writes(
+            [
+                ["T", WriteOperations.DELETE, "b"],
+                ["T", WriteOperations.DELETE, "c"],
+            ]
+        )["T"]
+        requests = plan.get_requests(0, {"b": 2, "c": 3})
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(
+            requests[0]["deleteDimension"]["range"],
+            {"sheetId": 0, "dimension": "ROWS", "startIndex": 1, "endIndex": 3},
+        )
+
+    def test_soft_delete_marks_rows_in_place(self):
+        plan = plan_writes([["T", WriteOperations.DELETE, "b"]])["T"]
+        requests = plan.get_requests(0, {"b": 2}, soft_delete=True)
+        self.assertEqual([next(iter(request)) for request in requests], ["updateCells"])
+
+
+if __name__ == "__main__":
+    unittest.main()